@@ -6,7 +6,7 @@ import pathlib
 import pytest
 
 from digsim.circuit import Circuit
-from digsim.circuit.components import YosysComponent
+from digsim.circuit.components import BitParallelNetlist, YosysComponent
 from digsim.synth import Synthesis
 from digsim.utils import YosysNetlist
 
@@ -118,3 +118,22 @@ def test_arith_rshift(dut):
     """Test the ARITH RSHIFT operation"""
     assert dut.alu_op(ALU_OP_ARITH_RSHIFT, 0x30, 4) == 0x03
     assert dut.alu_op(ALU_OP_ARITH_RSHIFT, 0xF0, 2) == 0xFC
+
+
+def test_add_sub_all_operands(current_path):
+    """Test ADD and SUB for all operands, all input vectors are evaluated bit-parallel"""
+    _dut_synthesis = Synthesis([str(current_path / "alu.v")], "alu")
+    netlist = BitParallelNetlist(YosysNetlist(**_dut_synthesis.synth_to_dict()))
+    operands = [(A, B) for A in range(256) for B in range(256)]
+    for op, expected in [
+        (ALU_OP_ADD, [(A + B) & 0xFF for A, B in operands]),
+        (ALU_OP_SUB, [(A - B) & 0xFF for A, B in operands]),
+    ]:
+        outputs = netlist.evaluate(
+            {
+                "op": [op] * len(operands),
+                "A": [A for A, _ in operands],
+                "B": [B for _, B in operands],
+            }
+        )
+        assert outputs["O"] == expected
@@ -20,6 +20,7 @@ from ._component_selection import ComponentSelection
 from ._top_bar import TopBar
 from ._utils import are_you_sure_destroy_circuit
 from ._warning_dialog import WarningDialog
+from ._waveform_dock import WaveformDock
 
 
 class CircuitEditor(QSplitter):
@@ -95,6 +96,7 @@ class MainWindow(QMainWindow):
         central_widget = CentralWidget(app_model, self)
         self.setWindowTitle("DigSim - Interactive Digital Logic Simulator")
         self.setCentralWidget(central_widget)
+        self.addDockWidget(Qt.BottomDockWidgetArea, WaveformDock(app_model, self))
         self.setAcceptDrops(True)  # Needed to avoid "No drag target set."
         self._app_model.sig_error.connect(self.error_dialog)
         self._app_model.sig_warning_log.connect(self.warning_log_dialog)
@@ -0,0 +1,223 @@
+# Copyright (c) Fredrik Andersson, 2023-2025
+# All rights reserved
+
+"""The waveform dock widget, shows the recorded waves of the circuit"""
+
+from PySide6.QtCore import QPoint, QRect, Qt
+from PySide6.QtGui import QColor, QFont, QPainter, QPen
+from PySide6.QtWidgets import QDockWidget, QScrollArea, QWidget
+
+
+class WaveformView(QWidget):
+    """
+    The waveform view, the recorded waves are queried with level-of-detail decimation,
+    only one value change per pixel column is drawn.
+    Mouse wheel: zoom, drag: pan, double click: zoom to fit
+    """
+
+    NAME_WIDTH = 160
+    SIGNAL_HEIGHT = 24
+    SIGNAL_MARGIN = 5
+    TIME_AXIS_HEIGHT = 20
+    ZOOM_FACTOR = 1.25
+
+    _WAVE_FONT = QFont("Arial", 8)
+    _WAVE_PEN = QPen(Qt.green)
+    _X_PEN = QPen(Qt.red)
+    _AXIS_PEN = QPen(Qt.gray)
+    _BUSY_COLOR = QColor(0, 128, 0)
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self._reader = None
+        self._signals = []
+        self._start_ns = 0
+        self._stop_ns = 1
+        self._end_ns = 1
+        self._drag_pos = None
+
+    def set_reader(self, reader):
+        """Set the waves reader, the view is zoomed to fit if the end time is shown"""
+        if self._reader is not None:
+            self._reader.close()
+        self._reader = reader
+        if reader is None:
+            self._signals = []
+        else:
+            self._signals = reader.signals
+            _, end_ns = reader.time_range
+            fit = self._stop_ns >= self._end_ns
+            self._end_ns = max(end_ns, 1)
+            if fit:
+                self.zoom_to_fit()
+        self.setMinimumHeight(self.TIME_AXIS_HEIGHT + len(self._signals) * self.SIGNAL_HEIGHT)
+        self.update()
+
+    def zoom_to_fit(self):
+        """Show the whole recording"""
+        self._start_ns = 0
+        self._stop_ns = self._end_ns
+        self.update()
+
+    def _wave_width(self):
+        return max(self.width() - self.NAME_WIDTH, 1)
+
+    def _time_to_x(self, time_ns):
+        span_ns = self._stop_ns - self._start_ns
+        return self.NAME_WIDTH + (time_ns - self._start_ns) * self._wave_width() // span_ns
+
+    def _x_to_time(self, xpos):
+        span_ns = self._stop_ns - self._start_ns
+        return self._start_ns + int(xpos - self.NAME_WIDTH) * span_ns // self._wave_width()
+
+    def _set_window(self, start_ns, stop_ns):
+        span_ns = max(stop_ns - start_ns, 10)
+        start_ns = min(max(start_ns, 0), max(self._end_ns - span_ns, 0))
+        self._start_ns = start_ns
+        self._stop_ns = start_ns + span_ns
+        self.update()
+
+    def wheelEvent(self, event):
+        """QT event callback function"""
+        xpos = max(event.position().x(), self.NAME_WIDTH)
+        time_ns = self._x_to_time(xpos)
+        if event.angleDelta().y() > 0:
+            factor = 1 / self.ZOOM_FACTOR
+        else:
+            factor = self.ZOOM_FACTOR
+        self._set_window(
+            int(time_ns - (time_ns - self._start_ns) * factor),
+            int(time_ns + (self._stop_ns - time_ns) * factor),
+        )
+        event.accept()
+
+    def mousePressEvent(self, event):
+        """QT event callback function"""
+        if event.button() == Qt.LeftButton:
+            self._drag_pos = event.position().x()
+
+    def mouseMoveEvent(self, event):
+        """QT event callback function"""
+        if self._drag_pos is None:
+            return
+        xpos = event.position().x()
+        delta_ns = self._x_to_time(self._drag_pos) - self._x_to_time(xpos)
+        self._drag_pos = xpos
+        self._set_window(self._start_ns + delta_ns, self._stop_ns + delta_ns)
+
+    def mouseReleaseEvent(self, event):
+        """QT event callback function"""
+        if event.button() == Qt.LeftButton:
+            self._drag_pos = None
+
+    def mouseDoubleClickEvent(self, _):
+        """QT event callback function"""
+        self.zoom_to_fit()
+
+    def _paint_time_axis(self, painter):
+        painter.setPen(self._AXIS_PEN)
+        painter.drawText(
+            QRect(self.NAME_WIDTH, 0, self._wave_width(), self.TIME_AXIS_HEIGHT),
+            Qt.AlignLeft | Qt.AlignVCenter,
+            f"{self._start_ns / 1000:.3f} us",
+        )
+        painter.drawText(
+            QRect(
+                self.NAME_WIDTH, 0, self._wave_width() - self.SIGNAL_MARGIN, self.TIME_AXIS_HEIGHT
+            ),
+            Qt.AlignRight | Qt.AlignVCenter,
+            f"{self._stop_ns / 1000:.3f} us",
+        )
+
+    def _paint_bit(self, painter, decimated, top, bottom):
+        last_x = self.NAME_WIDTH
+        last_value = decimated[0][1]
+        for time_ns, value, changes in [*decimated[1:], (self._stop_ns, None, 0)]:
+            xpos = self._time_to_x(time_ns)
+            if last_value == "X":
+                painter.setPen(self._X_PEN)
+                painter.drawLine(last_x, (top + bottom) // 2, xpos, (top + bottom) // 2)
+            else:
+                painter.setPen(self._WAVE_PEN)
+                level_y = top if last_value else bottom
+                painter.drawLine(last_x, level_y, xpos, level_y)
+            if value is None:
+                break
+            painter.setPen(self._WAVE_PEN)
+            painter.drawLine(xpos, top, xpos, bottom)
+            if changes > 1:
+                # More than one change in the pixel column
+                painter.fillRect(QRect(xpos, top, 2, bottom - top), self._BUSY_COLOR)
+            last_x, last_value = xpos, value
+
+    def _paint_bus(self, painter, decimated, top, bottom):
+        last_x = self.NAME_WIDTH
+        last_value = decimated[0][1]
+        for time_ns, value, changes in [*decimated[1:], (self._stop_ns, None, 0)]:
+            xpos = self._time_to_x(time_ns)
+            painter.setPen(self._X_PEN if last_value == "X" else self._WAVE_PEN)
+            painter.drawLine(last_x, top, xpos, top)
+            painter.drawLine(last_x, bottom, xpos, bottom)
+            if xpos - last_x > 30:
+                text = "X" if last_value == "X" else f"{last_value:x}"
+                painter.drawText(
+                    QRect(last_x, top, xpos - last_x, bottom - top), Qt.AlignCenter, text
+                )
+            if value is None:
+                break
+            painter.setPen(self._WAVE_PEN)
+            painter.drawLine(xpos, top, xpos, bottom)
+            if changes > 1:
+                painter.fillRect(QRect(xpos, top, 2, bottom - top), self._BUSY_COLOR)
+            last_x, last_value = xpos, value
+
+    def paintEvent(self, _):
+        """QT event callback function"""
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.black)
+        painter.setFont(self._WAVE_FONT)
+        if self._reader is None:
+            return
+        self._paint_time_axis(painter)
+        for row, signal in enumerate(self._signals):
+            top = self.TIME_AXIS_HEIGHT + row * self.SIGNAL_HEIGHT + self.SIGNAL_MARGIN
+            bottom = self.TIME_AXIS_HEIGHT + (row + 1) * self.SIGNAL_HEIGHT - self.SIGNAL_MARGIN
+            painter.setPen(self._AXIS_PEN)
+            painter.drawText(QPoint(self.SIGNAL_MARGIN, bottom), signal)
+            decimated = self._reader.decimate(
+                signal, self._start_ns, self._stop_ns, self._wave_width()
+            )
+            if self._reader.width(signal) == 1:
+                self._paint_bit(painter, decimated, top, bottom)
+            else:
+                self._paint_bus(painter, decimated, top, bottom)
+
+
+class WaveformDock(QDockWidget):
+    """
+    The waveform dock, shown when the waves are recorded (settings),
+    the waves are updated when the simulation is stopped
+    """
+
+    def __init__(self, app_model, parent):
+        super().__init__("Waves", parent)
+        self._app_model = app_model
+        self._waveform_view = WaveformView(self)
+        scroll_area = QScrollArea(self)
+        scroll_area.setWidgetResizable(True)
+        scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        scroll_area.setWidget(self._waveform_view)
+        self.setWidget(scroll_area)
+        self._app_model.sig_waves_notify.connect(self._waves_notify)
+        self._app_model.sig_waves_close.connect(self._waves_close)
+        self.hide()
+
+    def _waves_notify(self):
+        if self._app_model.is_running:
+            return
+        reader = self._app_model.waves.reader()
+        self._waveform_view.set_reader(reader)
+        self.setVisible(reader is not None)
+
+    def _waves_close(self):
+        self._waveform_view.set_reader(None)
@@ -3,6 +3,8 @@
 
 """A Logic Analyzer component placed in the GUI"""
 
+import math
+
 from PySide6.QtCore import QPoint, QRect, Qt
 from PySide6.QtGui import QPainterPath, QPen
 
@@ -19,7 +21,8 @@ class LogicAnalyzerObject(ImageObject):
 
     _ANALYZER_PEN = QPen(Qt.green)
     _SIGNAL_VERTICAL_SCALE = 10
-    _SIGNAL_HORIZONTAL_SCALE = 2
+    # The sample value to search for to find a level change from a level
+    _LEVEL_CHANGE = {0: b"\x01", 1: b"\x00"}
 
     def __init__(self, app_model, component, xpos, ypos):
         super().__init__(app_model, component, xpos, ypos)
@@ -44,43 +47,41 @@ class LogicAnalyzerObject(ImageObject):
         pen = self._ANALYZER_PEN
         pen.setWidth(2)
         painter.setPen(pen)
-        signal_data_dict = self.component.signal_data()
-        for portname, signal_data in signal_data_dict.items():
-            signal_data = signal_data_dict[portname]
+        buffers, start, stop = self.component.signal_window()
+        for portname, buffer in buffers.items():
             port_pos = self.get_port_pos(portname)
-            path = QPainterPath(
-                QPoint(
-                    self.object_pos.x() + self.SIGNAL_NAME_WIDTH,
-                    port_pos.y() - signal_data[0] * self._SIGNAL_VERTICAL_SCALE,
-                )
-            )
-            last_level = signal_data[0]
-            for idx, level in enumerate(signal_data[1:]):
-                if level == last_level:
-                    continue
-                path.lineTo(
-                    QPoint(
-                        self.object_pos.x()
-                        + self.SIGNAL_NAME_WIDTH
-                        + (idx + 1) * self._SIGNAL_HORIZONTAL_SCALE,
-                        port_pos.y() - last_level * self._SIGNAL_VERTICAL_SCALE,
-                    )
-                )
-                path.lineTo(
-                    QPoint(
-                        self.object_pos.x()
-                        + self.SIGNAL_NAME_WIDTH
-                        + (idx + 1) * self._SIGNAL_HORIZONTAL_SCALE,
-                        port_pos.y() - level * self._SIGNAL_VERTICAL_SCALE,
-                    )
-                )
-                last_level = level
-            path.lineTo(
-                QPoint(
-                    self.object_pos.x()
-                    + self.SIGNAL_NAME_WIDTH
-                    + len(signal_data) * self._SIGNAL_HORIZONTAL_SCALE,
-                    port_pos.y() - last_level * self._SIGNAL_VERTICAL_SCALE,
-                )
+            painter.drawPath(self._signal_path(buffer, start, stop, port_pos.y()))
+
+    def _signal_path(self, buffer, start, stop, ypos):
+        """
+        Create the path for the samples buffer[start:stop],
+        the level changes are found with bytearray.find and only
+        one level change is drawn per pixel column
+        """
+        xpos = self.object_pos.x() + self.SIGNAL_NAME_WIDTH
+        scale = self.ANALYZER_DISPLAY_WIDTH / (stop - start)
+        level = buffer[start]
+        path = QPainterPath(QPoint(xpos, ypos - level * self._SIGNAL_VERTICAL_SCALE))
+        index = start
+        while True:
+            index = buffer.find(self._LEVEL_CHANGE[level], index + 1, stop)
+            if index < 0:
+                break
+            column = int((index - start) * scale)
+            for new_level in [level, 1 - level]:
+                path.lineTo(QPoint(xpos + column, ypos - new_level * self._SIGNAL_VERTICAL_SCALE))
+            level = 1 - level
+            # Skip to the last sample in this pixel column
+            column_stop = start + math.ceil((column + 1) / scale) - 1
+            if column_stop > index and column_stop < stop:
+                index = column_stop
+                if buffer[index] != level:
+                    level = buffer[index]
+                    path.lineTo(QPoint(xpos + column, ypos - level * self._SIGNAL_VERTICAL_SCALE))
+        path.lineTo(
+            QPoint(
+                xpos + self.ANALYZER_DISPLAY_WIDTH,
+                ypos - level * self._SIGNAL_VERTICAL_SCALE,
             )
-            painter.drawPath(path)
+        )
+        return path
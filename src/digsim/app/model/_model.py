@@ -16,6 +16,7 @@ from digsim.storage_model import AppFileDataClass
 from ._model_objects import ModelObjects
 from ._model_settings import ModelSettings
 from ._model_shortcuts import ModelShortcuts
+from ._model_waves import ModelWaves
 
 
 class AppModel(QThread):
@@ -30,6 +31,8 @@ class AppModel(QThread):
     sig_update_wires = Signal()
     sig_delete_component = Signal(ComponentObject)
     sig_delete_wires = Signal()
+    sig_waves_notify = Signal()
+    sig_waves_close = Signal()
     sig_error = Signal(str)
     sig_warning_log = Signal(str, str)
     sig_zoom_in_gui = Signal()
@@ -48,6 +51,7 @@ class AppModel(QThread):
         self._model_objects = ModelObjects(self)
         self._model_shortcuts = ModelShortcuts(self)
         self._model_settings = ModelSettings(self)
+        self._model_waves = ModelWaves(self)
 
     @property
     def objects(self):
@@ -64,6 +68,11 @@ class AppModel(QThread):
         """return the model settings"""
         return self._model_settings
 
+    @property
+    def waves(self):
+        """return the model waves"""
+        return self._model_waves
+
     @property
     def is_running(self):
         """Return True if the simulation thread is running"""
@@ -82,9 +91,13 @@ class AppModel(QThread):
 
     def model_init(self):
         """(Re)initialize the model/circuit"""
+        # The waves reader must be closed before the waveform file is reopened
+        self.sig_waves_close.emit()
+        self.waves.init()
         self.objects.circuit.init()
         self.objects.init()
         self.sig_sim_time_notify.emit(0)
+        self.sig_waves_notify.emit()
 
     def model_start(self):
         """Start model simulation thread"""
@@ -161,6 +174,7 @@ class AppModel(QThread):
         self._single_step = False
         self.sig_control_notify.emit()
         self.sig_audio_start.emit(False)
+        self.sig_waves_notify.emit()
 
     def save_circuit(self, path):
         """Save the circuit with GUI information"""
@@ -0,0 +1,51 @@
+# Copyright (c) Fredrik Andersson, 2023-2025
+# All rights reserved
+
+"""Handle the waves recording in the model"""
+
+import tempfile
+from pathlib import Path
+
+
+class ModelWaves:
+    """
+    Class to handle the waves recording in the model,
+    the ports of the toplevel components are recorded in a DigSim waveform file (.dsw)
+    """
+
+    WAVES_FILENAME = "digsim_waves.dsw"
+
+    def __init__(self, app_model):
+        self._app_model = app_model
+        self._waves_folder = None
+        self._recording = False
+
+    @property
+    def is_recording(self):
+        """Return True if the waves are recorded"""
+        return self._recording
+
+    def init(self):
+        """
+        Start or stop the waves recording from the 'record_waves' setting,
+        called before the circuit is (re)initialized
+        """
+        circuit = self._app_model.objects.circuit
+        record_waves = self._app_model.settings.get("record_waves")
+        if record_waves and not self._recording:
+            if self._waves_folder is None:
+                self._waves_folder = tempfile.TemporaryDirectory(prefix="digsim_")
+            circuit.vcd(str(Path(self._waves_folder.name) / self.WAVES_FILENAME), max_depth=1)
+            self._recording = True
+        elif not record_waves and self._recording:
+            circuit.vcd_close()
+            self._recording = False
+
+    def reader(self):
+        """
+        Get a reader for the recorded waves, None if the waves are not recorded,
+        must not be called when the simulation is running
+        """
+        if not self._recording:
+            return None
+        return self._app_model.objects.circuit.waves_reader()
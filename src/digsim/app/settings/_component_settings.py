@@ -316,7 +316,10 @@ class ComponentSettingsDialog(QDialog):
         parameters_list = list(parameters.keys())
         first_key = parameters_list[0]
         settings = {}
-        is_file_path = len(parameters_list) == 1 and parameters[first_key]["type"] == "path"
+        # The other parameters (if any) use their default values
+        is_file_path = parameters[first_key]["type"] == "path" and all(
+            "default" in parameters[key] for key in parameters_list[1:]
+        )
         if is_file_path:
             description = parameters[first_key]["description"]
             fileinfo = parameters[first_key]["fileinfo"]
@@ -325,6 +328,8 @@ class ComponentSettingsDialog(QDialog):
             )
             if len(path[0]) > 0:
                 settings[first_key] = path[0]
+                for key in parameters_list[1:]:
+                    settings[key] = parameters[key]["default"]
         return is_file_path, settings
 
     @classmethod
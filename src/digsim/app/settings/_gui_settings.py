@@ -24,6 +24,7 @@ class GuiSettingsDialog(QDialog):
 
         self._slow_to_real_time = QCheckBox("", self)
         self._show_wire_value = QCheckBox("", self)
+        self._record_waves = QCheckBox("", self)
 
         # OK / Cancel
         self.buttonBox = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
@@ -41,11 +42,15 @@ class GuiSettingsDialog(QDialog):
         self.layout().addWidget(QLabel("Show Wire Value", self), row, 0, 1, 1)
         self.layout().addWidget(self._show_wire_value, row, 1, 1, 1)
         row += 1
+        self.layout().addWidget(QLabel("Record Waves (at reset)", self), row, 0, 1, 1)
+        self.layout().addWidget(self._record_waves, row, 1, 1, 1)
+        row += 1
         self.layout().addWidget(self.buttonBox, row, 0, 1, 2, alignment=Qt.AlignCenter)
 
         self._settings = self._app_model.settings.get_all()
         self._slow_to_real_time.setChecked(self._settings["real_time"])
         self._show_wire_value.setChecked(self._settings["color_wires"])
+        self._record_waves.setChecked(self._settings["record_waves"])
 
         index = self._update_frequency.findData(self._settings["update_frequency"])
         self._update_frequency.setCurrentIndex(index)
@@ -57,6 +62,7 @@ class GuiSettingsDialog(QDialog):
             "real_time": True,
             "color_wires": True,
             "update_frequency": 20,
+            "record_waves": False,
         }
 
     def start(self):
@@ -65,6 +71,7 @@ class GuiSettingsDialog(QDialog):
         if result == QDialog.DialogCode.Accepted:
             self._settings["real_time"] = self._slow_to_real_time.isChecked()
             self._settings["color_wires"] = self._show_wire_value.isChecked()
+            self._settings["record_waves"] = self._record_waves.isChecked()
             self._settings["update_frequency"] = self._update_frequency.itemData(
                 self._update_frequency.currentIndex()
             )
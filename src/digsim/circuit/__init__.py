@@ -3,5 +3,15 @@
 
 """All classes within digsim.circuit namespace"""
 
-from ._circuit import Circuit  # noqa: F401
+from ._batch import BatchResult, run_many  # noqa: F401
+from ._capture import WaveCapture, WaveCaptureException  # noqa: F401
+from ._circuit import Circuit, CircuitCheckpoint  # noqa: F401
+from ._profiler import CircuitProfiler, ProfileStats  # noqa: F401
+from ._waves_binary import (  # noqa: F401
+    BinaryWavesReader,
+    BinaryWavesWriter,
+    WavesFormatException,
+    binary_waves_to_vcd,
+)
+from ._waves_trigger import WavesTrigger, WavesTriggerException  # noqa: F401
 from .components import PortConnectionError  # noqa: F401
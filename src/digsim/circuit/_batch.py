@@ -0,0 +1,142 @@
+# Copyright (c) Fredrik Andersson, 2023-2025
+# All rights reserved
+
+"""
+Module with a batch runner for independent simulations
+
+The circuit is built once in each worker process and the stimuli
+are streamed to a multiprocessing pool, the results are returned in stimuli order.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import pathlib
+import traceback
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Union
+
+from digsim.storage_model import CircuitDataClass
+
+from ._circuit import Circuit
+
+
+CIRCUIT_SOURCE_TYPE = Union[Callable[[], Circuit], CircuitDataClass, str, pathlib.Path]
+
+
+@dataclass
+class BatchResult:
+    """The result of one batch job"""
+
+    index: int
+    stimulus: Any
+    value: Any = None
+    error: str | None = None
+    vcd_path: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        """Return True if the testbench did not raise an exception"""
+        return self.error is None
+
+
+def _build_circuit(circuit_source: CIRCUIT_SOURCE_TYPE) -> Circuit:
+    """Build circuit from factory function, circuit dataclass or circuit json file"""
+    if isinstance(circuit_source, CircuitDataClass):
+        circuit = Circuit(name=circuit_source.name)
+        circuit.from_dataclass(circuit_source)
+        return circuit
+    if isinstance(circuit_source, (str, pathlib.Path)):
+        circuit = Circuit()
+        circuit.from_json_file(
+            str(circuit_source), folder=str(pathlib.Path(circuit_source).parent)
+        )
+        return circuit
+    return circuit_source()
+
+
+class _BatchWorker:
+    """The circuit and testbench in one worker process"""
+
+    def __init__(self, circuit_source, testbench, vcd_folder):
+        self._circuit = _build_circuit(circuit_source)
+        self._testbench = testbench
+        self._vcd_folder = vcd_folder
+
+    def run(self, index: int, stimulus: Any) -> BatchResult:
+        """Run the testbench for one stimulus, the circuit is initialized before each job"""
+        result = BatchResult(index=index, stimulus=stimulus)
+        self._circuit.init()
+        if self._vcd_folder is not None:
+            result.vcd_path = str(pathlib.Path(self._vcd_folder) / f"job_{index}.vcd")
+            self._circuit.vcd(result.vcd_path)
+        try:
+            result.value = self._testbench(self._circuit, stimulus)
+        except Exception:
+            result.error = traceback.format_exc()
+        finally:
+            self._circuit.vcd_close()
+        return result
+
+
+_worker: _BatchWorker | None = None
+_worker_error: str | None = None
+
+
+def _worker_init(circuit_source, testbench, vcd_folder):
+    # An exception in a pool initializer makes the pool restart the worker forever,
+    # the error is instead returned in the job results
+    global _worker, _worker_error
+    try:
+        _worker = _BatchWorker(circuit_source, testbench, vcd_folder)
+    except Exception:
+        _worker_error = traceback.format_exc()
+
+
+def _worker_run(job: tuple[int, Any]) -> BatchResult:
+    if _worker is None:
+        index, stimulus = job
+        return BatchResult(index=index, stimulus=stimulus, error=_worker_error)
+    return _worker.run(*job)
+
+
+def run_many(
+    circuit_source: CIRCUIT_SOURCE_TYPE,
+    testbench: Callable[[Circuit, Any], Any],
+    stimuli: Iterable[Any],
+    workers: int | None = None,
+    vcd_folder: str | None = None,
+    chunksize: int = 1,
+) -> list[BatchResult]:
+    """
+    Run a testbench for each stimulus, in a pool of worker processes
+
+    circuit_source: A function that returns a circuit, a CircuitDataClass or a circuit
+                    json file, the circuit is built once in each worker.
+    testbench: Function testbench(circuit, stimulus), the return value is the job result.
+               Circuit.init() is called before each job, an exception (for example a
+               failed assertion) is stored in the result.
+    stimuli: The stimuli, one job per stimulus.
+    workers: The number of worker processes, default is the number of CPUs,
+             with 1 worker the jobs are run in the current process.
+    vcd_folder: Store one VCD file per job in this folder.
+
+    The circuit source, testbench and stimuli must be picklable, e.g. module level functions.
+    The circuit is also built in the current process before the pool is started,
+    an exception (for example a missing circuit file) is raised from run_many.
+    Return the job results in stimuli order.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    jobs = enumerate(stimuli)
+    worker = _BatchWorker(circuit_source, testbench, vcd_folder)
+    if workers <= 1:
+        return [worker.run(index, stimulus) for index, stimulus in jobs]
+
+    with multiprocessing.Pool(
+        processes=workers,
+        initializer=_worker_init,
+        initargs=(circuit_source, testbench, vcd_folder),
+    ) as pool:
+        return list(pool.imap(_worker_run, jobs, chunksize=chunksize))
@@ -0,0 +1,182 @@
+# Copyright (c) Fredrik Andersson, 2023-2025
+# All rights reserved
+
+"""
+Module with the in-memory waveform capture, for testbenches
+
+The value changes of the captured ports are stored in array('q') buffers,
+one buffer with change times and one with values per port, where "X" is stored as -1.
+"""
+
+from __future__ import annotations
+
+import bisect
+from array import array
+
+from .components.atoms import VALUE_TYPE, DigsimException, Port
+
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+
+_X_VALUE = -1
+
+
+class WaveCaptureException(DigsimException):
+    """Exception for waveform capture errors"""
+
+
+class WaveCapture:
+    """
+    Class that records the value changes of a set of ports, created with Circuit.capture()
+
+    Example:
+        capture = circuit.capture([dut.clk, dut.value])
+        circuit.run(ms=10)
+        times, values = capture.to_numpy(dut.value)
+        assert capture.sample(dut.value, [1000, 2000]) == [0, 1]
+    """
+
+    def __init__(self, circuit, ports: list[Port]):
+        self._circuit = circuit
+        self._ports: dict[Port, int] = {}
+        for port in ports:
+            if port.width > 63:
+                raise WaveCaptureException(
+                    f"Port '{port.path()}.{port.name()}' is too wide to be captured"
+                )
+            self._ports.setdefault(port, len(self._ports))
+        self._times: list[array] = [array("q") for _ in self._ports]
+        self._values: list[array] = [array("q") for _ in self._ports]
+        self._port_captures: dict[Port, list[tuple[Port, int]]] = {}
+        self._active: bool = False
+        self._record_current_values()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.stop()
+
+    @property
+    def ports(self) -> list[Port]:
+        """Get the captured ports"""
+        return list(self._ports)
+
+    @property
+    def active(self) -> bool:
+        """Return True if the value changes are recorded"""
+        return self._active
+
+    def start(self):
+        """Start recording value changes, done by Circuit.capture()"""
+        if not self._active:
+            self._circuit.add_trace_callback(self.write)
+            self._active = True
+
+    def stop(self):
+        """Stop recording value changes, the recorded changes are kept"""
+        if self._active:
+            self._circuit.remove_trace_callback(self.write)
+            self._active = False
+
+    def clear(self):
+        """Remove the recorded changes, the current values are kept as the first changes"""
+        for port_id in range(len(self._ports)):
+            del self._times[port_id][:]
+            del self._values[port_id][:]
+        self._record_current_values()
+
+    def _record_current_values(self):
+        time_ns = self._circuit.time_ns
+        for port, port_id in self._ports.items():
+            self._add_change(port_id, time_ns, port.value)
+
+    def _captured_ports(self, port: Port) -> list[tuple[Port, int]]:
+        """Get the captured ports (and port ids) that change with the port"""
+        return [
+            (wired_port, self._ports[wired_port])
+            for wired_port in port.get_wired_ports_recursive()
+            if wired_port in self._ports
+        ]
+
+    def write(self, port: Port, time_ns: int):
+        """Record the value of a changed port, the circuit trace callback"""
+        port_captures = self._port_captures.get(port)
+        if port_captures is None:
+            port_captures = self._captured_ports(port)
+            self._port_captures[port] = port_captures
+        for captured_port, port_id in port_captures:
+            self._add_change(port_id, time_ns, captured_port.value)
+
+    def _add_change(self, port_id: int, time_ns: int, value: VALUE_TYPE):
+        value = _X_VALUE if value == "X" else value
+        times = self._times[port_id]
+        values = self._values[port_id]
+        if values and values[-1] == value:
+            return
+        if times and times[-1] == time_ns:
+            # Glitch, only the last value at a timestamp is kept
+            if len(values) > 1 and values[-2] == value:
+                times.pop()
+                values.pop()
+            else:
+                values[-1] = value
+            return
+        times.append(time_ns)
+        values.append(value)
+
+    def _port_id(self, port: Port) -> int:
+        port_id = self._ports.get(port)
+        if port_id is None:
+            raise WaveCaptureException(f"Port '{port.path()}.{port.name()}' is not captured")
+        return port_id
+
+    def times(self, port: Port) -> array:
+        """Get the change times (ns) of a port"""
+        return self._times[self._port_id(port)]
+
+    def values(self, port: Port) -> list[VALUE_TYPE]:
+        """Get the change values of a port"""
+        return ["X" if value == _X_VALUE else value for value in self._values[self._port_id(port)]]
+
+    def changes(self, port: Port) -> list[tuple[int, VALUE_TYPE]]:
+        """Get the value changes (time_ns, value) of a port"""
+        return list(zip(self.times(port), self.values(port)))
+
+    def to_numpy(self, port: Port):
+        """
+        Get the change times and values of a port as NumPy int64 arrays,
+        where "X" is -1 (requires numpy)
+        """
+        if np is None:
+            raise WaveCaptureException("WaveCapture.to_numpy requires numpy")
+        port_id = self._port_id(port)
+        return (
+            np.frombuffer(self._times[port_id], dtype=np.int64).copy(),
+            np.frombuffer(self._values[port_id], dtype=np.int64).copy(),
+        )
+
+    def value_at(self, port: Port, time_ns: int) -> VALUE_TYPE:
+        """Get the value of a port at a time, "X" before the capture was started"""
+        port_id = self._port_id(port)
+        index = bisect.bisect_right(self._times[port_id], time_ns) - 1
+        if index < 0:
+            return "X"
+        value = self._values[port_id][index]
+        return "X" if value == _X_VALUE else value
+
+    def sample(self, port: Port, times: list[int]) -> list[VALUE_TYPE]:
+        """Get the values of a port at a list of times"""
+        return [self.value_at(port, time_ns) for time_ns in times]
+
+    def sample_period(
+        self, port: Port, period_ns: int, start_ns: int = 0, stop_ns: int | None = None
+    ) -> list[VALUE_TYPE]:
+        """Get the values of a port every period_ns, until stop_ns (default: the current time)"""
+        if stop_ns is None:
+            stop_ns = self._circuit.time_ns
+        return self.sample(port, list(range(start_ns, stop_ns + 1, period_ns)))
@@ -7,81 +7,74 @@ Module that handles the circuit simulation of components
 
 from __future__ import annotations
 
-import heapq
 import pathlib
-from typing import Tuple
+from dataclasses import dataclass
+from typing import Any, Callable, Tuple
 
 from digsim.storage_model import CircuitDataClass, CircuitFileDataClass
 
+from ._capture import WaveCapture
+from ._profiler import CircuitProfiler
+from ._scheduler import SCHEDULERS, Scheduler
+from ._waves_binary import BinaryWavesReader, BinaryWavesWriter, is_binary_waves_file
+from ._waves_trigger import WavesTrigger
 from ._waves_writer import WavesWriter
-from .components.atoms import VALUE_TYPE, Component, DigsimException, PortOutDelta
+from .components.atoms import (
+    VALUE_TYPE,
+    Component,
+    DigsimException,
+    Port,
+    PortMultiBitOutDelta,
+    PortMultiBitWire,
+    PortOutDelta,
+)
 
 
 class CircuitError(DigsimException):
     """A circuit error class"""
 
 
-class CircuitEvent:
-    """
-    The circuit event class for storing the
-    delta events in the simulation.
-    """
+@dataclass(frozen=True)
+class CircuitCheckpoint:
+    """The simulation state of a circuit, created with Circuit.checkpoint()"""
 
-    def __init__(self, time_ns: int, port: PortOutDelta, value: VALUE_TYPE):
-        self._time_ns: int = time_ns
-        self._port: PortOutDelta = port
-        self._value: VALUE_TYPE = value
-
-    @property
-    def time_ns(self) -> int:
-        """Get the simulation time (ns) of this event"""
-        return self._time_ns
-
-    @property
-    def port(self) -> PortOutDelta:
-        """Get the port of this event"""
-        return self._port
-
-    @property
-    def value(self) -> VALUE_TYPE:
-        """Get the delta cycle value of this event"""
-        return self._value
-
-    def is_same_event(self, port: PortOutDelta):
-        """Return True if the in the event is the same as"""
-        return port == self._port
-
-    def update(self, time_ns: int, value: VALUE_TYPE):
-        """Update the event with a new time (ns) and a new value"""
-        self._time_ns = time_ns
-        self._value = value
-
-    def __lt__(self, other) -> bool:
-        return other.time_ns > self.time_ns
-
-    def __eq__(self, other) -> bool:
-        return (
-            isinstance(other, CircuitEvent)
-            and self._port == other._port
-            and self._time_ns == other._time_ns
-            and self._value == other._value
-        )
+    time_ns: int
+    scheduler_snapshot: Any
+    components: tuple[Component, ...]
+    component_states: tuple[Any, ...]
+    ports: tuple[Port, ...]
+    port_states: tuple[tuple, ...]
+    update_batch: tuple[Component, ...] | None
 
 
 class Circuit:
     """Class thay handles the circuit simulation"""
 
-    def __init__(self, name: str | None = None, vcd: str | None = None):
+    def __init__(
+        self,
+        name: str | None = None,
+        vcd: str | None = None,
+        scheduler: str = "heap",
+        batch_update: bool = False,
+        yosys_engine: str = "event",
+    ):
+        scheduler_class = SCHEDULERS.get(scheduler)
+        if scheduler_class is None:
+            raise CircuitError(f"Unknown scheduler '{scheduler}'")
         self._components: dict[str, Component] = {}
-        self._circuit_events: list[CircuitEvent] = []
-        self._events_by_port: dict[PortOutDelta, CircuitEvent] = {}
+        self._scheduler: Scheduler = scheduler_class()
         self._name: str | None = name
         self._time_ns: int = 0
         self._folder: str | None = None
-        self._vcd: WavesWriter | None = None
+        self._vcd: WavesWriter | BinaryWavesWriter | None = None
+        self._vcd_trigger: WavesTrigger | None = None
+        self._trace_callbacks: list[Callable[[Port, int], None]] = []
+        self._update_batch: dict[Component, None] | None = {} if batch_update else None
+        self._deferred_events: dict[PortOutDelta, VALUE_TYPE] = {}
+        self._yosys_engine: str = yosys_engine
 
         if vcd is not None:
-            self._vcd = WavesWriter(filename=vcd)
+            self._vcd = self._create_waves_writer(vcd)
 
     @property
     def name(self) -> str | None:
@@ -93,6 +86,11 @@ class Circuit:
         """Get the current simulation time (ns)"""
         return self._time_ns
 
+    @property
+    def yosys_engine(self) -> str:
+        """Get the yosys component simulation engine, see YosysComponent.ENGINES"""
+        return self._yosys_engine
+
     @property
     def components(self) -> list[Component]:
         """Get the components in this circuit"""
@@ -124,12 +122,12 @@ class Circuit:
     def init(self):
         """Initialize circuit and components (and ports)"""
         self._time_ns = 0
-        self._circuit_events = []
-        self._events_by_port = {}
+        self._scheduler.clear()
         if self._vcd is not None:
             self._vcd_init()
         for _, comp in self._components.items():
             comp.init()
+        self._elaborate_nets()
         for _, comp in self._components.items():
             comp.default_state()
         self.run_until(ns=0)  # Handle all time zero events
@@ -140,30 +138,124 @@ class Circuit:
             comp.clear()
         self._components = {}
 
-    def vcd(self, filename):
-        """Start wave collecting in a gtkwave .vcd file"""
+    @staticmethod
+    def _create_waves_writer(
+        filename: str, flush_interval: float = 0.5, **port_filter
+    ) -> WavesWriter | BinaryWavesWriter:
+        if is_binary_waves_file(filename):
+            return BinaryWavesWriter(filename=filename, **port_filter)
+        return WavesWriter(filename=filename, flush_interval=flush_interval, **port_filter)
+
+    def vcd(
+        self,
+        filename,
+        flush_interval: float = 0.5,
+        include: list[str] | None = None,
+        exclude: list[str] | None = None,
+        max_depth: int | None = None,
+        trigger: WavesTrigger | None = None,
+    ):
+        """
+        Start wave collecting in a gtkwave .vcd file,
+        the waves are written to the file (at least) every flush_interval seconds
+        and when the file is closed.
+        If the filename suffix is .dsw the waves are written in the DigSim waveform format,
+        see BinaryWavesReader and binary_waves_to_vcd.
+
+        The ports can be filtered with globs matching '<component path>.<port name>',
+        '*' matches within one level and '**' matches any number of levels.
+        include: Only collect waves for ports matching these globs, e.g. ["6502.*"]
+        exclude: Do not collect waves for ports matching these globs, e.g. ["*.gates.**"]
+        max_depth: Only collect waves for components at this depth, 1 is toplevel components
+        trigger: Only write waves between the WavesTrigger start and stop conditions
+        """
         if self._vcd is not None:
             raise CircuitError("VCD already started")
-        self._vcd = WavesWriter(filename=filename)
+        self._vcd = self._create_waves_writer(
+            filename,
+            flush_interval=flush_interval,
+            include=include,
+            exclude=exclude,
+            max_depth=max_depth,
+        )
+        self._vcd_trigger = trigger
         self._vcd_init()
 
     def vcd_close(self):
         """Close gtkwave .vcd file"""
         if self._vcd is not None:
+            self.remove_trace_callback(self._vcd_callback())
             self._vcd.close()
             self._vcd = None
+            self._vcd_trigger = None
 
-    def _vcd_init(self):
-        port_info = []
-        for _, comp in self._components.items():
-            for port in comp.ports:
-                port_info.append((port.path(), port.name(), port.width))
-        self._vcd.init(port_info)
+    def waves_reader(self) -> BinaryWavesReader:
+        """
+        Get a reader for the waves collected so far in a DigSim waveform file (.dsw),
+        the reader must not be used while the simulation is running
+        """
+        if not isinstance(self._vcd, BinaryWavesWriter):
+            raise CircuitError("No DigSim waveform file (.dsw) started")
+        return self._vcd.reader()
 
-        # Dump initial state in vcd
-        for _, comp in self._components.items():
-            for port in comp.ports:
+    def add_trace_callback(self, callback: Callable[[Port, int], None]):
+        """
+        Add a trace callback, callback(port, time_ns) is called when a port value
+        changes in the simulation, for example to write waves
+        """
+        self._trace_callbacks.append(callback)
+
+    def remove_trace_callback(self, callback: Callable[[Port, int], None]):
+        """Remove a trace callback"""
+        self._trace_callbacks.remove(callback)
+
+    def trace_value(self, port: Port):
+        """
+        Notify the trace callbacks about a port value change that is not an event,
+        nothing is done if there are no trace callbacks
+        """
+        for callback in self._trace_callbacks:
+            callback(port, self._time_ns)
+
+    def capture(self, ports: Port | list[Port]) -> WaveCapture:
+        """
+        Start recording the value changes of ports in memory (no file),
+        the recording is stopped with WaveCapture.stop()
+        """
+        if isinstance(ports, Port):
+            ports = [ports]
+        wave_capture = WaveCapture(self, ports)
+        wave_capture.start()
+        return wave_capture
+
+    def profile(self) -> CircuitProfiler:
+        """
+        Start profiling the simulation (events per port, component updates and wall time),
+        the profiling is stopped with CircuitProfiler.stop()
+        """
+        profiler = CircuitProfiler(self, self._scheduler)
+        profiler.start()
+        return profiler
+
+    def _vcd_callback(self) -> Callable[[Port, int], None]:
+        if self._vcd_trigger is not None:
+            return self._vcd_trigger.write
+        return self._vcd.write
+
+    def _vcd_init(self):
+        ports = [port for comp in self._components.values() for port in comp.ports]
+        self._vcd.init(ports)
+
+        if self._vcd_trigger is not None:
+            # The initial state is written when the trigger starts the recording
+            self._vcd_trigger.init(self._vcd, ports, self._time_ns)
+        else:
+            # Dump initial state in vcd
+            for port in ports:
                 self._vcd.write(port, self._time_ns)
+        vcd_callback = self._vcd_callback()
+        if vcd_callback not in self._trace_callbacks:
+            self.add_trace_callback(vcd_callback)
 
     def _time_to_ns(self, s=None, ms=None, us=None, ns=None) -> int:
         time_ns = 0
@@ -174,45 +266,77 @@ class Circuit:
         return int(time_ns)
 
     def __exit__(self, exc_type, exc_value, exc_traceback):
-        self._vcd.close()
+        self.vcd_close()
+
+    def _execute_event(self, time_ns: int, port: PortOutDelta, value: VALUE_TYPE) -> bool:
+        """Execute a simulation event, return True if it is a toplevel event"""
+        # print(f"Execute event {port.path()}.{port.name()} {time_ns} {value}")
+        self._time_ns = time_ns
+        port.delta_cycle(value)
+        for callback in self._trace_callbacks:
+            callback(port, time_ns)
+        return port.parent().is_toplevel()
 
     def process_single_event(self, stop_time_ns=None) -> Tuple[bool, bool]:
         """
         Process one simulation event
         Return False if ther are now events of if the stop_time has passed
         """
-        while self._circuit_events:
-            event = heapq.heappop(self._circuit_events)
-
-            # Check if this is the latest event for this port
-            if event != self._events_by_port.get(event.port):
-                # This is a stale event, ignore it
-                continue
-
-            if stop_time_ns is not None and event.time_ns > stop_time_ns:
-                # Put the event back if it's after the stop time
-                heapq.heappush(self._circuit_events, event)
-                return False, False
-
-            del self._events_by_port[event.port]
-            # print(
-            #     f"Execute event {event.port.path()}.{event.port.name()}"
-            #     f" {event.time_ns} {event.value}"
-            # )
-            self._time_ns = event.time_ns
-            event.port.delta_cycle(event.value)
-            toplevel = event.port.parent().is_toplevel()
-            if self._vcd is not None:
-                self._vcd.write(event.port, self._time_ns)
-            return True, toplevel
-
-        return False, False
+        event = self._scheduler.pop(stop_time_ns)
+        if event is None:
+            return False, False
+        return True, self._execute_event(*event)
+
+    def _process_delta_cycles(self) -> bool:
+        """
+        Process all events and component updates for the current simulation time
+        Return True if a toplevel event has been processed
+        """
+        toplevel = False
+        while True:
+            while True:
+                event = self._scheduler.pop(self._time_ns)
+                if event is None:
+                    break
+                time_ns, port, value = event
+                if port.parent() in self._update_batch and isinstance(port, PortOutDelta):
+                    # The component is updated in this delta cycle, and the update will
+                    # supersede the event (as in the default mode), unless it does not
+                    # set the port (for example a flip-flop without a clock edge)
+                    self._deferred_events[port] = value
+                    continue
+                toplevel = self._execute_event(time_ns, port, value) or toplevel
+            if not self._update_batch:
+                return toplevel
+            update_batch = self._update_batch
+            self._update_batch = {}
+            for component in update_batch:
+                component.update()
+            deferred_events = self._deferred_events
+            self._deferred_events = {}
+            for port, value in deferred_events.items():
+                toplevel = self._execute_event(self._time_ns, port, value) or toplevel
+
+    def process_time_step(self, stop_time_ns=None) -> Tuple[bool, bool]:
+        """
+        Process all simulation events for the next simulation time (batch update)
+        The events are processed in delta cycles, a component with changed inputs
+        is updated once when all events in the delta cycle have been processed.
+        A pending output event of a component that is updated in the delta cycle
+        is deferred until after the update, so that the update can supersede it.
+        Return False if ther are now events of if the stop_time has passed
+        """
+        more_events, toplevel = self.process_single_event(stop_time_ns)
+        if not more_events:
+            return False, False
+        toplevel = self._process_delta_cycles() or toplevel
+        return True, toplevel
 
     def _is_toplevel_event(self) -> bool:
-        if len(self._circuit_events) == 0:
+        port = self._scheduler.next_port()
+        if port is None:
             return False
-        event = self._circuit_events[0]
-        return event.port.parent().is_toplevel()
+        return port.parent().is_toplevel()
 
     def run(
         self,
@@ -225,8 +349,14 @@ class Circuit:
         """Run simulation for a period of time"""
         stop_time_ns = self._time_ns + self._time_to_ns(s=s, ms=ms, us=us, ns=ns)
         single_step_stop = False
-        while len(self._circuit_events) > 0 and self._time_ns <= stop_time_ns:
-            more_events, top_level_event = self.process_single_event(stop_time_ns)
+        if self._update_batch is not None:
+            # Update components with inputs changed outside of the simulation
+            self._process_delta_cycles()
+            process_func = self.process_time_step
+        else:
+            process_func = self.process_single_event
+        while self._scheduler.has_events() and self._time_ns <= stop_time_ns:
+            more_events, top_level_event = process_func(stop_time_ns)
             if not more_events:
                 break
             if single_step and top_level_event:
@@ -247,13 +377,86 @@ class Circuit:
         if stop_time_ns >= self._time_ns:
             self.run(ns=stop_time_ns - self._time_ns)
 
+    def _all_ports(self) -> list[Port]:
+        """Get all ports with simulation state, including internal ports and bus bits"""
+        ports = []
+        for comp in self._components.values():
+            for port in vars(comp).values():
+                if not isinstance(port, Port):
+                    continue
+                ports.append(port)
+                if isinstance(port, (PortMultiBitWire, PortMultiBitOutDelta)):
+                    ports.extend(port.get_bit(bit_id) for bit_id in range(port.width))
+        return list(dict.fromkeys(ports))
+
+    def _elaborate_nets(self):
+        """
+        Resolve each port to a flat list of sink ports and pass-through ports,
+        a value change is then propagated without walking the pass-through port chains
+        """
+        for port in self._all_ports():
+            port.elaborate()
+
+    def checkpoint(self) -> CircuitCheckpoint:
+        """
+        Get a checkpoint of the simulation state, the pending events,
+        the port values and the component internal state (for example memory contents)
+        """
+        components = tuple(self._components.values())
+        ports = tuple(self._all_ports())
+        return CircuitCheckpoint(
+            time_ns=self._time_ns,
+            scheduler_snapshot=self._scheduler.snapshot(),
+            components=components,
+            component_states=tuple(comp.checkpoint_state() for comp in components),
+            ports=ports,
+            port_states=tuple(port.checkpoint_state() for port in ports),
+            update_batch=None if self._update_batch is None else tuple(self._update_batch),
+        )
+
+    def restore(self, checkpoint: CircuitCheckpoint):
+        """
+        Restore the simulation state from a checkpoint,
+        a checkpoint can be restored several times.
+        The waves files and captures cannot be rewound, a checkpoint earlier than
+        the simulation time can only be restored when no waves are collected.
+        """
+        if checkpoint.components != tuple(self._components.values()):
+            raise CircuitError("The checkpoint does not match the circuit components")
+        if checkpoint.time_ns < self._time_ns and self._trace_callbacks:
+            raise CircuitError("Cannot restore an earlier checkpoint while collecting waves")
+        self._time_ns = checkpoint.time_ns
+        self._scheduler.restore(checkpoint.scheduler_snapshot)
+        if self._update_batch is not None:
+            self._update_batch = dict.fromkeys(checkpoint.update_batch or ())
+        for comp, state in zip(checkpoint.components, checkpoint.component_states):
+            if state is not None:
+                comp.restore_state(state)
+        for port, state in zip(checkpoint.ports, checkpoint.port_states):
+            port.restore_state(state)
+
     def add_event(self, port: PortOutDelta, value: VALUE_TYPE, propagation_delay_ns: int):
         """Add delta cycle event, this will also write values to .vcd file"""
         event_time_ns = self._time_ns + propagation_delay_ns
         # print(f"Add event {port.parent().name()}:{port.name()} => {value}")
-        event = CircuitEvent(event_time_ns, port, value)
-        self._events_by_port[port] = event
-        heapq.heappush(self._circuit_events, event)
+        self._scheduler.add(event_time_ns, port, value)
+        if self._deferred_events:
+            # The new event supersedes the deferred event (batch update)
+            self._deferred_events.pop(port, None)
+
+    def has_pending_event(self, port: PortOutDelta) -> bool:
+        """Return True if there is a pending delta cycle event for the port"""
+        return self._scheduler.is_pending(port) or port in self._deferred_events
+
+    def request_update(self, component: Component):
+        """
+        Request a component update,
+        the update is postponed to the end of the delta cycle if batch update is active
+        """
+        if self._update_batch is None:
+            component.update()
+        else:
+            self._update_batch[component] = None
 
     def add_component(self, component: Component):
         """Add component to circuit"""
@@ -0,0 +1,218 @@
+# Copyright (c) Fredrik Andersson, 2023-2025
+# All rights reserved
+
+"""
+Module with the circuit simulation profiler
+
+The profiler replaces the scheduler pop function and the component update functions
+with counting versions (instance attributes), and removes them when it is stopped,
+so there is no overhead when the circuit is not profiled.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from .components.atoms import Component, Port
+
+
+@dataclass
+class ProfileStats:
+    """Profile statistics for a component, or a component class"""
+
+    updates: int = 0
+    total_s: float = 0.0  # Cumulative wall time, including updates of other components
+    self_s: float = 0.0  # Wall time, excluding updates of other components
+
+
+class CircuitProfiler:
+    """
+    Class that profiles a circuit simulation, created with Circuit.profile()
+
+    Example:
+        with circuit.profile() as profiler:
+            circuit.run(ms=10)
+        print(profiler.report())
+    """
+
+    # The scheduler queue sizes are sampled every QUEUE_SAMPLE_INTERVAL events (from the first)
+    QUEUE_SAMPLE_INTERVAL = 256
+
+    def __init__(self, circuit, scheduler):
+        self._circuit = circuit
+        self._scheduler = scheduler
+        self._components: list[Component] = []
+        self._events_by_port: dict[Port, int] = {}
+        self._component_stats: dict[Component, ProfileStats] = {}
+        self._child_time: list[float] = []
+        self._events: int = 0
+        self._queue_samples: int = 0
+        self._queue_size_sum: int = 0
+        self._stale_sum: int = 0
+        self._max_queue_size: int = 0
+        self._wall_time_s: float = 0.0
+        self._sim_time_ns: int = 0
+        self._start_wall_time: float | None = None
+        self._start_sim_time_ns: int = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.stop()
+
+    @property
+    def active(self) -> bool:
+        """Return True if the profiler is active"""
+        return self._start_wall_time is not None
+
+    def start(self):
+        """Start profiling, done by Circuit.profile(), the statistics are not cleared"""
+        if self.active:
+            return
+        self._scheduler.pop = self._profiled_pop(self._scheduler.pop)
+        self._components = list(self._circuit.components)
+        for component in self._components:
+            component.update = self._profiled_update(component, component.update)
+        self._start_wall_time = time.perf_counter()
+        self._start_sim_time_ns = self._circuit.time_ns
+
+    def stop(self):
+        """Stop profiling, the profiled functions are removed"""
+        if not self.active:
+            return
+        self._wall_time_s += time.perf_counter() - self._start_wall_time
+        self._sim_time_ns += self._circuit.time_ns - self._start_sim_time_ns
+        self._start_wall_time = None
+        del self._scheduler.pop
+        for component in self._components:
+            del component.update
+        self._components = []
+
+    def _profiled_pop(self, pop: Callable) -> Callable:
+        events_by_port = self._events_by_port
+        scheduler = self._scheduler
+
+        def profiled_pop(stop_time_ns=None):
+            event = pop(stop_time_ns)
+            if event is not None:
+                port = event[1]
+                events_by_port[port] = events_by_port.get(port, 0) + 1
+                self._events += 1
+                if self._events % self.QUEUE_SAMPLE_INTERVAL == 1:
+                    queue_size, pending = scheduler.queue_sizes()
+                    self._queue_samples += 1
+                    self._queue_size_sum += queue_size
+                    self._stale_sum += queue_size - pending
+                    self._max_queue_size = max(self._max_queue_size, queue_size)
+            return event
+
+        return profiled_pop
+
+    def _profiled_update(self, component: Component, update: Callable) -> Callable:
+        stats = self._component_stats.setdefault(component, ProfileStats())
+        child_time = self._child_time
+
+        def profiled_update():
+            start = time.perf_counter()
+            child_time.append(0.0)
+            try:
+                update()
+            finally:
+                elapsed = time.perf_counter() - start
+                stats.updates += 1
+                stats.total_s += elapsed
+                stats.self_s += elapsed - child_time.pop()
+                if child_time:
+                    child_time[-1] += elapsed
+
+        return profiled_update
+
+    @property
+    def events(self) -> int:
+        """Get the number of processed events"""
+        return self._events
+
+    @property
+    def wall_time_s(self) -> float:
+        """Get the profiled wall time (seconds)"""
+        if self.active:
+            return self._wall_time_s + time.perf_counter() - self._start_wall_time
+        return self._wall_time_s
+
+    @property
+    def sim_time_ns(self) -> int:
+        """Get the profiled simulation time (ns)"""
+        if self.active:
+            return self._sim_time_ns + self._circuit.time_ns - self._start_sim_time_ns
+        return self._sim_time_ns
+
+    @property
+    def events_per_second(self) -> float:
+        """Get the number of processed events per wall time second"""
+        wall_time_s = self.wall_time_s
+        return self._events / wall_time_s if wall_time_s > 0 else 0.0
+
+    @property
+    def max_queue_size(self) -> int:
+        """Get the max sampled scheduler queue size (including stale events)"""
+        return self._max_queue_size
+
+    @property
+    def stale_event_ratio(self) -> float:
+        """Get the average part of the sampled scheduler queue that is stale events"""
+        if self._queue_size_sum == 0:
+            return 0.0
+        return self._stale_sum / self._queue_size_sum
+
+    def port_events(self) -> dict[str, int]:
+        """Get the number of events per port, '<component path>.<port name>'"""
+        return {
+            f"{port.path()}.{port.name()}": events for port, events in self._events_by_port.items()
+        }
+
+    def component_stats(self) -> dict[str, ProfileStats]:
+        """Get the profile statistics per component path"""
+        return {component.path(): stats for component, stats in self._component_stats.items()}
+
+    def class_stats(self) -> dict[str, ProfileStats]:
+        """Get the profile statistics per component class"""
+        class_stats: dict[str, ProfileStats] = {}
+        for component, stats in self._component_stats.items():
+            total = class_stats.setdefault(type(component).__name__, ProfileStats())
+            total.updates += stats.updates
+            total.total_s += stats.total_s
+            total.self_s += stats.self_s
+        return class_stats
+
+    @staticmethod
+    def _stats_table(title: str, stats_dict: dict[str, ProfileStats], top: int) -> list[str]:
+        lines = [
+            "",
+            f"{title:<48} {'updates':>10} {'self (s)':>10} {'total (s)':>10}",
+        ]
+        hot_spots = sorted(stats_dict.items(), key=lambda item: item[1].self_s, reverse=True)
+        for name, stats in hot_spots[:top]:
+            lines.append(
+                f"{name[-48:]:<48} {stats.updates:>10} {stats.self_s:>10.4f} {stats.total_s:>10.4f}"
+            )
+        return lines
+
+    def report(self, top: int = 10) -> str:
+        """Get a report with the hot spots (the top components, classes and ports)"""
+        lines = [
+            f"Simulation time: {self.sim_time_ns} ns",
+            f"Wall time: {self.wall_time_s:.3f} s",
+            f"Events: {self._events} ({self.events_per_second:.0f} events/s)",
+            f"Max scheduler queue size: {self._max_queue_size}",
+            f"Stale event ratio: {self.stale_event_ratio:.2f}",
+        ]
+        lines.extend(self._stats_table("Component class", self.class_stats(), top))
+        lines.extend(self._stats_table("Component", self.component_stats(), top))
+        lines.extend(["", f"{'Port':<48} {'events':>10}"])
+        port_events = sorted(self.port_events().items(), key=lambda item: item[1], reverse=True)
+        for name, events in port_events[:top]:
+            lines.append(f"{name[-48:]:<48} {events:>10}")
+        return "\n".join(lines)
@@ -0,0 +1,258 @@
+# Copyright (c) Fredrik Andersson, 2023-2025
+# All rights reserved
+
+"""
+Module with the event schedulers used by the circuit simulation
+"""
+
+from __future__ import annotations
+
+import abc
+import heapq
+from typing import Any, Tuple
+
+from .components.atoms import VALUE_TYPE, PortOutDelta
+
+
+SCHEDULED_EVENT_TYPE = Tuple[int, PortOutDelta, VALUE_TYPE]
+
+
+class CircuitEvent:
+    """
+    The circuit event class for storing the
+    delta events in the simulation.
+    """
+
+    def __init__(self, time_ns: int, port: PortOutDelta, value: VALUE_TYPE):
+        self._time_ns: int = time_ns
+        self._port: PortOutDelta = port
+        self._value: VALUE_TYPE = value
+
+    @property
+    def time_ns(self) -> int:
+        """Get the simulation time (ns) of this event"""
+        return self._time_ns
+
+    @property
+    def port(self) -> PortOutDelta:
+        """Get the port of this event"""
+        return self._port
+
+    @property
+    def value(self) -> VALUE_TYPE:
+        """Get the delta cycle value of this event"""
+        return self._value
+
+    def is_same_event(self, port: PortOutDelta):
+        """Return True if the in the event is the same as"""
+        return port == self._port
+
+    def update(self, time_ns: int, value: VALUE_TYPE):
+        """Update the event with a new time (ns) and a new value"""
+        self._time_ns = time_ns
+        self._value = value
+
+    def __lt__(self, other) -> bool:
+        return other.time_ns > self.time_ns
+
+    def __eq__(self, other) -> bool:
+        return (
+            isinstance(other, CircuitEvent)
+            and self._port == other._port
+            and self._time_ns == other._time_ns
+            and self._value == other._value
+        )
+
+
+class Scheduler(abc.ABC):
+    """
+    The abstract base class for the circuit event schedulers.
+    A scheduler holds at most one pending event per port,
+    adding a new event for a port will supersede the old one.
+    """
+
+    @abc.abstractmethod
+    def clear(self):
+        """Remove all pending events"""
+
+    @abc.abstractmethod
+    def add(self, time_ns: int, port: PortOutDelta, value: VALUE_TYPE):
+        """Add event, supersedes any pending event for the same port"""
+
+    @abc.abstractmethod
+    def pop(self, stop_time_ns: int | None = None) -> SCHEDULED_EVENT_TYPE | None:
+        """
+        Pop the next event as a (time_ns, port, value) tuple
+        Return None if there are no events or if the next event is after stop_time_ns
+        """
+
+    @abc.abstractmethod
+    def has_events(self) -> bool:
+        """Return True if there are (possibly stale) events in the scheduler"""
+
+    @abc.abstractmethod
+    def is_pending(self, port: PortOutDelta) -> bool:
+        """Return True if there is a pending event for the port"""
+
+    @abc.abstractmethod
+    def next_port(self) -> PortOutDelta | None:
+        """Get the port of the next event without removing it from the scheduler"""
+
+    @abc.abstractmethod
+    def queue_sizes(self) -> tuple[int, int]:
+        """Get the number of queued events (including stale events) and pending events"""
+
+    @abc.abstractmethod
+    def snapshot(self) -> Any:
+        """Get a copy of the pending events, used for circuit checkpoints"""
+
+    @abc.abstractmethod
+    def restore(self, snapshot: Any):
+        """Restore the pending events from a snapshot"""
+
+
+class HeapScheduler(Scheduler):
+    """
+    The reference scheduler, a heap of CircuitEvent objects.
+    Superseded events are left in the heap and are skipped when popped.
+    """
+
+    def __init__(self):
+        self._circuit_events: list[CircuitEvent] = []
+        self._events_by_port: dict[PortOutDelta, CircuitEvent] = {}
+
+    def clear(self):
+        self._circuit_events = []
+        self._events_by_port = {}
+
+    def add(self, time_ns: int, port: PortOutDelta, value: VALUE_TYPE):
+        event = CircuitEvent(time_ns, port, value)
+        self._events_by_port[port] = event
+        heapq.heappush(self._circuit_events, event)
+
+    def pop(self, stop_time_ns: int | None = None) -> SCHEDULED_EVENT_TYPE | None:
+        while self._circuit_events:
+            event = heapq.heappop(self._circuit_events)
+
+            # Check if this is the latest event for this port
+            if event != self._events_by_port.get(event.port):
+                # This is a stale event, ignore it
+                continue
+
+            if stop_time_ns is not None and event.time_ns > stop_time_ns:
+                # Put the event back if it's after the stop time
+                heapq.heappush(self._circuit_events, event)
+                return None
+
+            del self._events_by_port[event.port]
+            return event.time_ns, event.port, event.value
+        return None
+
+    def has_events(self) -> bool:
+        return len(self._circuit_events) > 0
+
+    def is_pending(self, port: PortOutDelta) -> bool:
+        return port in self._events_by_port
+
+    def next_port(self) -> PortOutDelta | None:
+        if len(self._circuit_events) == 0:
+            return None
+        return self._circuit_events[0].port
+
+    def queue_sizes(self) -> tuple[int, int]:
+        return len(self._circuit_events), len(self._events_by_port)
+
+    def snapshot(self) -> Any:
+        # The events are not modified after they are added, a shallow copy is enough
+        return list(self._circuit_events), dict(self._events_by_port)
+
+    def restore(self, snapshot: Any):
+        circuit_events, events_by_port = snapshot
+        self._circuit_events = list(circuit_events)
+        self._events_by_port = dict(events_by_port)
+
+
+class TimeBucketScheduler(Scheduler):
+    """
+    A calendar queue scheduler with one bucket per simulation time.
+    Each bucket is an ordered dict port => value, so a superseded event
+    is removed from its bucket directly instead of being left as a stale event.
+    Only the distinct bucket times are kept in a heap.
+    """
+
+    def __init__(self):
+        self._buckets: dict[int, dict[PortOutDelta, VALUE_TYPE]] = {}
+        self._bucket_times: list[int] = []
+        self._time_by_port: dict[PortOutDelta, int] = {}
+
+    def clear(self):
+        self._buckets = {}
+        self._bucket_times = []
+        self._time_by_port = {}
+
+    def add(self, time_ns: int, port: PortOutDelta, value: VALUE_TYPE):
+        old_time_ns = self._time_by_port.get(port)
+        if old_time_ns is not None:
+            # Cancel the superseded event in place
+            del self._buckets[old_time_ns][port]
+        bucket = self._buckets.get(time_ns)
+        if bucket is None:
+            bucket = {}
+            self._buckets[time_ns] = bucket
+            heapq.heappush(self._bucket_times, time_ns)
+        bucket[port] = value
+        self._time_by_port[port] = time_ns
+
+    def _drop_empty_buckets(self):
+        """Remove the processed or superseded buckets from the top of the heap"""
+        while self._bucket_times and not self._buckets[self._bucket_times[0]]:
+            del self._buckets[heapq.heappop(self._bucket_times)]
+
+    def pop(self, stop_time_ns: int | None = None) -> SCHEDULED_EVENT_TYPE | None:
+        self._drop_empty_buckets()
+        if not self._bucket_times:
+            return None
+        time_ns = self._bucket_times[0]
+        if stop_time_ns is not None and time_ns > stop_time_ns:
+            return None
+
+        bucket = self._buckets[time_ns]
+        port = next(iter(bucket))
+        value = bucket.pop(port)
+        del self._time_by_port[port]
+        return time_ns, port, value
+
+    def has_events(self) -> bool:
+        return len(self._time_by_port) > 0
+
+    def is_pending(self, port: PortOutDelta) -> bool:
+        return port in self._time_by_port
+
+    def next_port(self) -> PortOutDelta | None:
+        self._drop_empty_buckets()
+        if not self._bucket_times:
+            return None
+        return next(iter(self._buckets[self._bucket_times[0]]))
+
+    def queue_sizes(self) -> tuple[int, int]:
+        # Superseded events are removed from the buckets, there are no stale events
+        return len(self._time_by_port), len(self._time_by_port)
+
+    def snapshot(self) -> Any:
+        return (
+            {time_ns: dict(bucket) for time_ns, bucket in self._buckets.items()},
+            list(self._bucket_times),
+            dict(self._time_by_port),
+        )
+
+    def restore(self, snapshot: Any):
+        buckets, bucket_times, time_by_port = snapshot
+        self._buckets = {time_ns: dict(bucket) for time_ns, bucket in buckets.items()}
+        self._bucket_times = list(bucket_times)
+        self._time_by_port = dict(time_by_port)
+
+
+SCHEDULERS: dict[str, type[Scheduler]] = {
+    "heap": HeapScheduler,
+    "bucket": TimeBucketScheduler,
+}
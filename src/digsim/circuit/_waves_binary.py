@@ -0,0 +1,503 @@
+# Copyright (c) Fredrik Andersson, 2023-2025
+# All rights reserved
+
+"""
+Module with the native DigSim waveform format (.dsw)
+
+The value changes are collected per signal and written in blocks.
+In each block every signal with changes has a chunk with two columns,
+the delta encoded change times and the change values, both as LEB128 varints.
+A value is stored as value + 1, where 0 is "X".
+The file ends with a json index, the signals and the time range and chunk positions
+of each block, so a signal can be read, or sampled at any time,
+without reading the whole file.
+The chunk time ranges are also used for level-of-detail decimation (for waveform viewers),
+a chunk within one decimation bucket is summarized without being decoded.
+
+File layout:
+    MAGIC, blocks of chunks, json index, index offset (uint64), MAGIC
+"""
+
+from __future__ import annotations
+
+import atexit
+import bisect
+import collections
+import heapq
+import json
+import mmap
+import pathlib
+import struct
+from array import array
+from typing import Iterator
+
+from vcd import VCDWriter
+
+from ._waves_writer import PortFilter
+from .components.atoms import VALUE_TYPE, DigsimException, Port
+
+
+BINARY_WAVES_SUFFIX = ".dsw"
+_MAGIC = b"DSWAVES1"
+_TRAILER = struct.Struct("<Q")
+
+
+class WavesFormatException(DigsimException):
+    """Exception for waveform file errors"""
+
+
+def _encode_varints(values, out: bytearray):
+    for value in values:
+        while value >= 0x80:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+
+
+def _decode_varints(data) -> list[int]:
+    values = []
+    value = 0
+    shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value = 0
+            shift = 0
+    return values
+
+
+def _encode_value(value: VALUE_TYPE) -> int:
+    return 0 if value == "X" else value + 1
+
+
+def _decode_value(value: int) -> VALUE_TYPE:
+    return "X" if value == 0 else value - 1
+
+
+class BinaryWavesWriter:
+    """
+    Class that handles the creation of DigSim waveform files,
+    used like the WavesWriter (vcd) class by the circuit
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        block_size: int = 65536,
+        include: list[str] | None = None,
+        exclude: list[str] | None = None,
+        max_depth: int | None = None,
+    ):
+        """
+        block_size: A block is written when this number of value changes are collected
+        include/exclude/max_depth: The port filter, see PortFilter
+        """
+        self._filename: str = filename
+        self._block_size: int = block_size
+        self._port_filter = PortFilter(include, exclude, max_depth)
+        self._file = None
+        self._signals: list[dict] = []
+        self._signal_ids: dict[Port, int] = {}
+        self._port_signals: dict[Port, list[tuple[Port, int]]] = {}
+        self._times: list[array] = []
+        self._values: list[list[VALUE_TYPE]] = []
+        self._last_values: list[VALUE_TYPE | None] = []
+        self._changes: int = 0
+        self._last_time_ns: int = 0
+        self._blocks: list[list] = []
+
+    def init(self, ports: list[Port]):
+        """Initialize the waveform file with the ports to register"""
+        if self._file is not None:
+            self.close()
+        self._file = open(self._filename, mode="wb")
+        self._file.write(_MAGIC)
+        self._signals = []
+        self._signal_ids = {}
+        for port in ports:
+            if not self._port_filter.is_selected(port):
+                continue
+            self._signal_ids[port] = len(self._signals)
+            self._signals.append({"path": port.path(), "name": port.name(), "width": port.width})
+        self._times = [array("q") for _ in self._signals]
+        self._values = [[] for _ in self._signals]
+        self._last_values = [None] * len(self._signals)
+        self._changes = 0
+        self._last_time_ns = 0
+        self._blocks = []
+        self._port_signals = {port: self._wired_port_signals(port) for port in ports}
+        # The index is written at exit if the file is not closed
+        atexit.register(self.close)
+
+    def _wired_port_signals(self, port: Port) -> list[tuple[Port, int]]:
+        """Get the registered ports (and signal ids) that change with the port"""
+        return [
+            (wired_port, self._signal_ids[wired_port])
+            for wired_port in port.get_wired_ports_recursive()
+            if wired_port in self._signal_ids
+        ]
+
+    def write(self, port: Port, time_ns: int):
+        """Write port value to the waveform file (buffered)"""
+        if self._file is None:
+            raise WavesFormatException("The waveform file is not initialized")
+        port_signals = self._port_signals.get(port)
+        if port_signals is None:
+            port_signals = self._wired_port_signals(port)
+            self._port_signals[port] = port_signals
+        if not port_signals:
+            return
+        self._set_time(time_ns)
+        for wired_port, signal_id in port_signals:
+            self._add_change(signal_id, time_ns, wired_port.value)
+
+    def has_port(self, port: Port) -> bool:
+        """Return True if the port is registered in the waveform file"""
+        return port in self._signal_ids
+
+    def write_value(self, port: Port, time_ns: int, value: VALUE_TYPE):
+        """Write a value of a registered port to the waveform file, e.g. a recorded value"""
+        if self._file is None:
+            raise WavesFormatException("The waveform file is not initialized")
+        signal_id = self._signal_ids.get(port)
+        if signal_id is None:
+            return
+        self._set_time(time_ns)
+        self._add_change(signal_id, time_ns, value)
+
+    def _set_time(self, time_ns: int):
+        if time_ns != self._last_time_ns:
+            if time_ns < self._last_time_ns:
+                raise WavesFormatException(f"Out of order time {time_ns} < {self._last_time_ns}")
+            # A block is only written between timestamps, so a timestamp is never split
+            if self._changes >= self._block_size:
+                self._write_block()
+            self._last_time_ns = time_ns
+
+    def _add_change(self, signal_id: int, time_ns: int, value: VALUE_TYPE):
+        if value == self._last_values[signal_id]:
+            return
+        self._last_values[signal_id] = value
+        times = self._times[signal_id]
+        values = self._values[signal_id]
+        if times and times[-1] == time_ns:
+            # Glitch, only the last value at a timestamp is written
+            if len(values) > 1 and values[-2] == value:
+                times.pop()
+                values.pop()
+                self._changes -= 1
+            else:
+                values[-1] = value
+            return
+        times.append(time_ns)
+        values.append(value)
+        self._changes += 1
+
+    def _write_block(self):
+        """Write the collected value changes as one block with one chunk per signal"""
+        if self._changes == 0:
+            return
+        chunks = []
+        for signal_id, times in enumerate(self._times):
+            if not times:
+                continue
+            values = self._values[signal_id]
+            data = bytearray()
+            previous_time_ns = times[0]
+            deltas = []
+            for time_ns in times:
+                deltas.append(time_ns - previous_time_ns)
+                previous_time_ns = time_ns
+            _encode_varints(deltas, data)
+            times_length = len(data)
+            _encode_varints([_encode_value(value) for value in values], data)
+            chunks.append(
+                [
+                    signal_id,
+                    self._file.tell(),
+                    len(times),
+                    times_length,
+                    len(data) - times_length,
+                    times[0],
+                    times[-1],
+                    _encode_value(values[-1]),
+                ]
+            )
+            self._file.write(data)
+            self._times[signal_id] = array("q")
+            self._values[signal_id] = []
+        block_start = min(chunk[5] for chunk in chunks)
+        block_end = max(chunk[6] for chunk in chunks)
+        self._blocks.append([block_start, block_end, chunks])
+        self._changes = 0
+
+    def reader(self) -> BinaryWavesReader:
+        """
+        Get a reader for the value changes written so far, without closing the file,
+        the reader must not be used at the same time as the writer
+        """
+        if self._file is None:
+            raise WavesFormatException("The waveform file is not initialized")
+        self._write_block()
+        self._file.flush()
+        index = self._index()
+        return BinaryWavesReader(
+            self._filename, index={"signals": index["signals"], "blocks": list(index["blocks"])}
+        )
+
+    def _index(self) -> dict:
+        return {"signals": self._signals, "blocks": self._blocks}
+
+    def close(self):
+        """Write the remaining value changes and the index, and close the file"""
+        atexit.unregister(self.close)
+        if self._file is None:
+            return
+        self._write_block()
+        index_offset = self._file.tell()
+        index = self._index()
+        self._file.write(json.dumps(index, separators=(",", ":")).encode("utf-8"))
+        self._file.write(_TRAILER.pack(index_offset))
+        self._file.write(_MAGIC)
+        self._file.close()
+        self._file = None
+        self._port_signals = {}
+
+
+class BinaryWavesReader:
+    """
+    Class that reads DigSim waveform files, the file is memory mapped
+    and only the chunks for the requested signal are decoded.
+
+    Example:
+        with BinaryWavesReader("waves.dsw") as reader:
+            times, values = reader.changes("cpu.AB")
+            value = reader.value_at("cpu.AB", 12000)
+    """
+
+    CHUNK_CACHE_SIZE = 256
+
+    def __init__(self, filename: str, index: dict | None = None):
+        """
+        index: The index of a file that is being written, see BinaryWavesWriter.reader()
+        """
+        self._file = open(filename, mode="rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as exc:
+            self._file.close()
+            raise WavesFormatException(f"'{filename}' is not a waveform file") from exc
+        if index is None:
+            index = self._read_index(filename)
+        elif self._mmap[: len(_MAGIC)] != _MAGIC:
+            self.close()
+            raise WavesFormatException(f"'{filename}' is not a waveform file")
+        self._signals: list[dict] = index["signals"]
+        self._signal_ids: dict[str, int] = {
+            f"{signal['path']}.{signal['name']}": signal_id
+            for signal_id, signal in enumerate(self._signals)
+        }
+        self._blocks: list[list] = index["blocks"]
+        self._chunks: list[list[list[int]]] = [[] for _ in self._signals]
+        for _, _, chunks in self._blocks:
+            for chunk in chunks:
+                self._chunks[chunk[0]].append(chunk)
+        self._chunk_times: list[list[int]] = [
+            [chunk[5] for chunk in chunks] for chunks in self._chunks
+        ]
+        self._chunk_cache: collections.OrderedDict[int, tuple[array, list[VALUE_TYPE]]] = (
+            collections.OrderedDict()
+        )
+
+    def _read_index(self, filename: str) -> dict:
+        trailer_size = _TRAILER.size + len(_MAGIC)
+        if (
+            len(self._mmap) < len(_MAGIC) + trailer_size
+            or self._mmap[: len(_MAGIC)] != _MAGIC
+            or self._mmap[-len(_MAGIC) :] != _MAGIC
+        ):
+            self.close()
+            raise WavesFormatException(
+                f"'{filename}' is not a waveform file (or the file was not closed)"
+            )
+        (index_offset,) = _TRAILER.unpack_from(self._mmap, len(self._mmap) - trailer_size)
+        return json.loads(self._mmap[index_offset : len(self._mmap) - trailer_size])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
+    def close(self):
+        """Close the waveform file"""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    @property
+    def signals(self) -> list[str]:
+        """Get the signal names, '<component path>.<port name>'"""
+        return list(self._signal_ids)
+
+    @property
+    def time_range(self) -> tuple[int, int]:
+        """Get the time of the first and the last value change, (0, 0) if there are none"""
+        if not self._blocks:
+            return 0, 0
+        return self._blocks[0][0], max(block[1] for block in self._blocks)
+
+    def width(self, signal: str) -> int:
+        """Get the bit-width of a signal"""
+        return self._signals[self._signal_id(signal)]["width"]
+
+    def _signal_id(self, signal: str) -> int:
+        signal_id = self._signal_ids.get(signal)
+        if signal_id is None:
+            raise WavesFormatException(f"Signal '{signal}' not found")
+        return signal_id
+
+    def _decode_chunk(self, chunk: list[int]) -> tuple[array, list[VALUE_TYPE]]:
+        _, offset, _, times_length, values_length, first_time_ns, _, _ = chunk
+        data = self._mmap[offset : offset + times_length + values_length]
+        times = array("q")
+        time_ns = first_time_ns
+        for delta in _decode_varints(data[:times_length]):
+            time_ns += delta
+            times.append(time_ns)
+        values = [_decode_value(value) for value in _decode_varints(data[times_length:])]
+        return times, values
+
+    def _cached_chunk(self, chunk: list[int]) -> tuple[array, list[VALUE_TYPE]]:
+        """Decode a chunk, the last decoded chunks are cached"""
+        offset = chunk[1]
+        decoded_chunk = self._chunk_cache.get(offset)
+        if decoded_chunk is not None:
+            self._chunk_cache.move_to_end(offset)
+            return decoded_chunk
+        decoded_chunk = self._decode_chunk(chunk)
+        self._chunk_cache[offset] = decoded_chunk
+        if len(self._chunk_cache) > self.CHUNK_CACHE_SIZE:
+            self._chunk_cache.popitem(last=False)
+        return decoded_chunk
+
+    def changes(self, signal: str) -> tuple[array, list[VALUE_TYPE]]:
+        """Get the change times (ns) and the values for a signal"""
+        times = array("q")
+        values = []
+        for chunk in self._chunks[self._signal_id(signal)]:
+            chunk_times, chunk_values = self._decode_chunk(chunk)
+            times.extend(chunk_times)
+            values.extend(chunk_values)
+        return times, values
+
+    def value_at(self, signal: str, time_ns: int) -> VALUE_TYPE:
+        """Get the value of a signal at a time, only one chunk is decoded"""
+        signal_id = self._signal_id(signal)
+        chunk_id = bisect.bisect_right(self._chunk_times[signal_id], time_ns) - 1
+        if chunk_id < 0:
+            return "X"
+        chunk = self._chunks[signal_id][chunk_id]
+        if time_ns >= chunk[6]:
+            return _decode_value(chunk[7])
+        times, values = self._cached_chunk(chunk)
+        return values[bisect.bisect_right(times, time_ns) - 1]
+
+    def sample(self, signal: str, times: list[int]) -> list[VALUE_TYPE]:
+        """Get the values of a signal at a (sorted or unsorted) list of times"""
+        return [self.value_at(signal, time_ns) for time_ns in times]
+
+    def decimate(
+        self, signal: str, start_ns: int, stop_ns: int, buckets: int
+    ) -> list[tuple[int, VALUE_TYPE, int]]:
+        """
+        Get the value changes of a signal in a time window, decimated to at most one change
+        per bucket (e.g. per pixel column), for waveform viewers.
+        Return a list of (time_ns, value, changes), the first item is the value at start_ns,
+        the other items are the first change time, the last value and the number of changes
+        in a bucket, more than one change should be drawn as a busy bucket.
+        Only the chunks in the window that are not within one bucket are decoded.
+        """
+        signal_id = self._signal_id(signal)
+        span_ns = max(stop_ns - start_ns, 1)
+        decimated = [(start_ns, self.value_at(signal, start_ns), 0)]
+        last_bucket = -1
+
+        def add_bucket(bucket, time_ns, value, changes):
+            nonlocal last_bucket
+            if bucket == last_bucket:
+                first_time_ns, _, bucket_changes = decimated[-1]
+                decimated[-1] = (first_time_ns, value, bucket_changes + changes)
+            else:
+                decimated.append((time_ns, value, changes))
+                last_bucket = bucket
+
+        chunks = self._chunks[signal_id]
+        first_chunk_id = max(bisect.bisect_right(self._chunk_times[signal_id], start_ns) - 1, 0)
+        for chunk in chunks[first_chunk_id:]:
+            first_time_ns, last_time_ns = chunk[5], chunk[6]
+            if first_time_ns > stop_ns:
+                break
+            if last_time_ns <= start_ns:
+                continue
+            first_bucket = (first_time_ns - start_ns) * buckets // span_ns
+            if (
+                first_time_ns > start_ns
+                and last_time_ns <= stop_ns
+                and first_bucket == (last_time_ns - start_ns) * buckets // span_ns
+            ):
+                # The chunk is within one bucket, use the chunk summary
+                add_bucket(first_bucket, first_time_ns, _decode_value(chunk[7]), chunk[2])
+                continue
+            times, values = self._cached_chunk(chunk)
+            index = bisect.bisect_right(times, start_ns)
+            stop_index = bisect.bisect_right(times, stop_ns)
+            while index < stop_index:
+                bucket = (times[index] - start_ns) * buckets // span_ns
+                # The first time in the next bucket
+                next_bucket_ns = start_ns - (-(bucket + 1) * span_ns // buckets)
+                end_index = bisect.bisect_left(times, next_bucket_ns, index, stop_index)
+                add_bucket(bucket, times[index], values[end_index - 1], end_index - index)
+                index = end_index
+        return decimated
+
+    def iter_changes(self) -> Iterator[tuple[int, str, VALUE_TYPE]]:
+        """Iterate over all value changes (time_ns, signal, value) in time order"""
+        names = list(self._signal_ids)
+        # The blocks are in time order, the chunks within a block are merged
+        for _, _, chunks in self._blocks:
+            chunk_changes = []
+            for chunk in chunks:
+                times, values = self._decode_chunk(chunk)
+                name = names[chunk[0]]
+                chunk_changes.append(
+                    [(time_ns, name, value) for time_ns, value in zip(times, values)]
+                )
+            yield from heapq.merge(*chunk_changes, key=lambda change: change[0])
+
+
+def binary_waves_to_vcd(filename: str, vcd_filename: str):
+    """Convert a DigSim waveform file to a vcd file (for GTKWave)"""
+    with (
+        BinaryWavesReader(filename) as reader,
+        open(vcd_filename, mode="w", encoding="utf-8") as vcd_file,
+    ):
+        vcd_writer = VCDWriter(vcd_file, timescale="1 ns", date="today")
+        variables = {}
+        for signal in reader.signals:
+            path, name = signal.rsplit(".", 1)
+            variables[signal] = vcd_writer.register_var(
+                path, name, "wire", size=reader.width(signal)
+            )
+        for time_ns, signal, value in reader.iter_changes():
+            vcd_writer.change(variables[signal], timestamp=time_ns, value=value)
+        vcd_writer.close()
+
+
+def is_binary_waves_file(filename: str) -> bool:
+    """Return True if the filename has the DigSim waveform file suffix"""
+    return pathlib.Path(filename).suffix == BINARY_WAVES_SUFFIX
@@ -0,0 +1,174 @@
+# Copyright (c) Fredrik Andersson, 2023-2025
+# All rights reserved
+
+"""
+Module with the trigger that gates the wave collection to a window of interest
+
+Before the start trigger the value changes are only kept in a bounded
+in-memory ring buffer (the pre-trigger window), nothing is written to the waves file.
+"""
+
+from __future__ import annotations
+
+import collections
+from typing import Any
+
+from .components.atoms import VALUE_TYPE, DigsimException, Port
+
+
+class WavesTriggerException(DigsimException):
+    """Exception for waves trigger errors"""
+
+
+class WavesTrigger:
+    """
+    Trigger for Circuit.vcd(), waves are only written between the start and stop trigger.
+
+    start_port/start_value: Start when the port has the value
+    start_ns: Start when the simulation time has reached start_ns
+    The recording starts when all start conditions are met, at init if there are none.
+    stop_port/stop_value: Stop when the port has the value
+    stop_ns: Stop after the simulation time stop_ns
+    The recording stops when any stop condition is met.
+    pre_trigger_ns: Also write the value changes this long before the start trigger
+    pre_trigger_changes: The max number of value changes in the pre-trigger ring buffer
+
+    Example:
+        trigger = WavesTrigger(start_port=cpu.AB, start_value=0xFFFE, pre_trigger_ns=50000)
+        circuit.vcd("irq.vcd", trigger=trigger)
+    """
+
+    WAITING = "waiting"
+    RECORDING = "recording"
+    STOPPED = "stopped"
+
+    def __init__(
+        self,
+        start_port: Port | None = None,
+        start_value: VALUE_TYPE | None = None,
+        start_ns: int | None = None,
+        stop_port: Port | None = None,
+        stop_value: VALUE_TYPE | None = None,
+        stop_ns: int | None = None,
+        pre_trigger_ns: int = 0,
+        pre_trigger_changes: int = 65536,
+    ):
+        if (start_port is None) != (start_value is None):
+            raise WavesTriggerException("Both start_port and start_value must be set")
+        if (stop_port is None) != (stop_value is None):
+            raise WavesTriggerException("Both stop_port and stop_value must be set")
+        self._start_port: Port | None = start_port
+        self._start_value: VALUE_TYPE | None = start_value
+        self._start_ns: int | None = start_ns
+        self._stop_port: Port | None = stop_port
+        self._stop_value: VALUE_TYPE | None = stop_value
+        self._stop_ns: int | None = stop_ns
+        self._pre_trigger_ns: int = pre_trigger_ns
+        self._ring: collections.deque[tuple[int, Port, VALUE_TYPE, VALUE_TYPE]] = (
+            collections.deque(maxlen=pre_trigger_changes)
+        )
+        self._ring_overflow: bool = False
+        self._last_values: dict[Port, VALUE_TYPE] = {}
+        self._writer: Any = None
+        self._ports: list[Port] = []
+        self._port_wired_ports: dict[Port, list[Port]] = {}
+        self._state: str = self.WAITING
+        self._start_time_ns: int | None = None
+        self._stop_time_ns: int | None = None
+
+    @property
+    def state(self) -> str:
+        """Get the trigger state, WAITING, RECORDING or STOPPED"""
+        return self._state
+
+    @property
+    def start_time_ns(self) -> int | None:
+        """Get the start trigger time, None if the recording has not started"""
+        return self._start_time_ns
+
+    @property
+    def stop_time_ns(self) -> int | None:
+        """Get the stop trigger time, None if the recording has not stopped"""
+        return self._stop_time_ns
+
+    def init(self, writer, ports: list[Port], time_ns: int):
+        """Arm the trigger for an initialized waves writer, done by the circuit"""
+        self._writer = writer
+        self._ports = [port for port in ports if writer.has_port(port)]
+        self._port_wired_ports = {}
+        self._last_values = {port: port.value for port in self._ports}
+        self._ring.clear()
+        self._ring_overflow = False
+        self._state = self.WAITING
+        self._start_time_ns = None
+        self._stop_time_ns = None
+        if self._start_port is None and self._start_ns is None:
+            self._start(time_ns)
+
+    def _wired_ports(self, port: Port) -> list[Port]:
+        """Get the registered ports that change with the port"""
+        wired_ports = self._port_wired_ports.get(port)
+        if wired_ports is None:
+            wired_ports = [
+                wired_port
+                for wired_port in port.get_wired_ports_recursive()
+                if self._writer.has_port(wired_port)
+            ]
+            self._port_wired_ports[port] = wired_ports
+        return wired_ports
+
+    def _start_condition(self, time_ns: int) -> bool:
+        if self._start_ns is not None and time_ns < self._start_ns:
+            return False
+        return self._start_port is None or self._start_port.value == self._start_value
+
+    def write(self, port: Port, time_ns: int):
+        """Write port value to the waves writer if the trigger is recording, the trace callback"""
+        if self._state == self.RECORDING:
+            if self._stop_ns is not None and time_ns > self._stop_ns:
+                self._stop(self._stop_ns)
+                return
+            self._writer.write(port, time_ns)
+            if self._stop_port is not None and self._stop_port.value == self._stop_value:
+                self._stop(time_ns)
+        elif self._state == self.WAITING:
+            if self._pre_trigger_ns > 0:
+                self._record(port, time_ns)
+            if self._start_condition(time_ns):
+                self._start(time_ns)
+
+    def _stop(self, time_ns: int):
+        self._state = self.STOPPED
+        self._stop_time_ns = time_ns
+
+    def _record(self, port: Port, time_ns: int):
+        """Record the value changes in the pre-trigger ring buffer"""
+        ring = self._ring
+        last_values = self._last_values
+        for wired_port in self._wired_ports(port):
+            value = wired_port.value
+            if len(ring) == ring.maxlen:
+                self._ring_overflow = True
+            ring.append((time_ns, wired_port, last_values[wired_port], value))
+            last_values[wired_port] = value
+
+    def _start(self, time_ns: int):
+        """Write the pre-trigger window and start the recording"""
+        self._state = self.RECORDING
+        self._start_time_ns = time_ns
+        window_start_ns = max(time_ns - self._pre_trigger_ns, 0)
+        changes = [change for change in self._ring if change[0] >= window_start_ns]
+        if self._ring_overflow and changes:
+            window_start_ns = changes[0][0]
+        if not changes:
+            window_start_ns = time_ns
+        # The port values at the start of the window
+        window_values = {port: port.value for port in self._ports}
+        for _, port, old_value, _ in reversed(changes):
+            window_values[port] = old_value
+        for port, value in window_values.items():
+            self._writer.write_value(port, window_start_ns, value)
+        for change_time_ns, port, _, value in changes:
+            self._writer.write_value(port, change_time_ns, value)
+        self._ring.clear()
+        self._last_values = {}
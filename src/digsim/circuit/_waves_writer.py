@@ -3,54 +3,211 @@
 
 """
 Module that handles the creation of vcd files
+
+The value changes are buffered in memory and written to the vcd file
+in blocks by a writer thread.
 """
 
+import atexit
+import collections
 import io
-from typing import Any, Tuple
+import re
+import threading
+from typing import Any
 
 from vcd import VCDWriter
 
 from .components.atoms import Port
 
 
+def _path_glob_regex(pattern: str) -> re.Pattern:
+    """
+    Convert a port path glob to a regular expression,
+    '*' and '?' match within one path level and '**' matches any number of levels
+    """
+    regex = ""
+    index = 0
+    while index < len(pattern):
+        if pattern.startswith("**", index):
+            regex += ".*"
+            index += 2
+        elif pattern[index] == "*":
+            regex += "[^.]*"
+            index += 1
+        elif pattern[index] == "?":
+            regex += "[^.]"
+            index += 1
+        else:
+            regex += re.escape(pattern[index])
+            index += 1
+    return re.compile(regex)
+
+
+class PortFilter:
+    """
+    Port filter for the waves writers
+    include: Only select ports matching these globs, e.g. "cpu.*" or "cpu.**"
+    exclude: Do not select ports matching these globs
+    max_depth: Only select ports of components at this depth or above, 1 is toplevel
+    The globs match '<component path>.<port name>'.
+    """
+
+    def __init__(
+        self,
+        include: list[str] | None = None,
+        exclude: list[str] | None = None,
+        max_depth: int | None = None,
+    ):
+        self._include = [_path_glob_regex(pattern) for pattern in include or []]
+        self._exclude = [_path_glob_regex(pattern) for pattern in exclude or []]
+        self._include_all: bool = include is None
+        self._max_depth: int | None = max_depth
+
+    def is_selected(self, port: Port) -> bool:
+        """Return True if the port passes the include/exclude/max_depth filter"""
+        path = port.path()
+        if self._max_depth is not None and path.count(".") >= self._max_depth:
+            return False
+        port_path = f"{path}.{port.name()}"
+        if not self._include_all and not any(
+            regex.fullmatch(port_path) for regex in self._include
+        ):
+            return False
+        return not any(regex.fullmatch(port_path) for regex in self._exclude)
+
+
 class WavesWriter:
     """Class that handles the creation of vcd files"""
 
-    def __init__(self, filename: str):
+    def __init__(
+        self,
+        filename: str,
+        flush_interval: float = 0.5,
+        block_size: int = 65536,
+        include: list[str] | None = None,
+        exclude: list[str] | None = None,
+        max_depth: int | None = None,
+    ):
+        """
+        flush_interval: The buffered value changes are written (at least) this often (seconds)
+        block_size: The buffered value changes are written when the buffer reaches this size
+        include/exclude/max_depth: The port filter, see PortFilter
+        """
         self._vcd_name: str = filename
+        self._port_filter = PortFilter(include, exclude, max_depth)
+        self._flush_interval: float = flush_interval
+        self._block_size: int = block_size
         self._vcd_file: io.TextIOWrapper | None = None
         self._vcd_writer: VCDWriter | None = None
-        self._vcd_dict: dict[str, Any] = {}
+        self._vcd_dict: dict[Port, Any] = {}
+        self._port_vars: dict[Port, list[tuple[Port, Any]]] = {}
+        self._changes: collections.deque[tuple[int, Any, Any]] = collections.deque()
+        self._wakeup = threading.Event()
+        self._stop: bool = False
+        self._thread: threading.Thread | None = None
+        self._error: Exception | None = None
 
-    def init(self, port_info: list[Tuple[str, str, int]]):
-        """Initialize vcd writer"""
+    def init(self, ports: list[Port]):
+        """
+        Initialize vcd writer with the ports to register,
+        ports that are filtered out are not registered
+        """
         if self._vcd_file is not None or self._vcd_writer is not None:
             self.close()
         self._vcd_file = open(self._vcd_name, mode="w", encoding="utf-8")
         if self._vcd_file is None:
             raise RuntimeError("VCD file is None")
         self._vcd_writer = VCDWriter(self._vcd_file, timescale="1 ns", date="today")
-        for port_path, port_name, port_width in port_info:
-            var = self._vcd_writer.register_var(port_path, port_name, "wire", size=port_width)
-            self._vcd_dict[f"{port_path}.{port_name}"] = var
+        for port in ports:
+            if not self._port_filter.is_selected(port):
+                continue
+            var = self._vcd_writer.register_var(port.path(), port.name(), "wire", size=port.width)
+            self._vcd_dict[port] = var
         self._vcd_file.flush()
+        self._port_vars = {port: self._wired_port_vars(port) for port in ports}
+        self._error = None
+        self._stop = False
+        self._thread = threading.Thread(target=self._writer_thread, daemon=True)
+        self._thread.start()
+        # The buffered value changes are written at exit if the file is not closed
+        atexit.register(self.close)
+
+    def _wired_port_vars(self, port: Port) -> list[tuple[Port, Any]]:
+        """Get the registered ports (and vcd variables) that change with the port"""
+        return [
+            (wired_port, self._vcd_dict[wired_port])
+            for wired_port in port.get_wired_ports_recursive()
+            if wired_port in self._vcd_dict
+        ]
 
     def write(self, port: Port, time_ns: int):
-        """Write port value to vcd file"""
-        if self._vcd_file is None:
-            raise RuntimeError("VCD file is None")
+        """Write port value to vcd file (buffered)"""
         if self._vcd_writer is None:
             raise RuntimeError("VCD Writer is None")
-        for wired_port in port.get_wired_ports_recursive():
-            var = self._vcd_dict.get(f"{wired_port.path()}.{wired_port.name()}")
-            if var is None:
-                continue
-            self._vcd_writer.change(var, timestamp=time_ns, value=wired_port.value)
-        self._vcd_file.flush()
+        if self._error is not None:
+            raise self._error
+        port_vars = self._port_vars.get(port)
+        if port_vars is None:
+            port_vars = self._wired_port_vars(port)
+            self._port_vars[port] = port_vars
+        if not port_vars:
+            # No registered ports, for example filtered out ports
+            return
+        changes = self._changes
+        for wired_port, var in port_vars:
+            changes.append((time_ns, var, wired_port.value))
+        if len(changes) >= self._block_size:
+            self._wakeup.set()
+
+    def has_port(self, port: Port) -> bool:
+        """Return True if the port is registered in the vcd file"""
+        return port in self._vcd_dict
+
+    def write_value(self, port: Port, time_ns: int, value):
+        """Write a value of a registered port to vcd file (buffered), e.g. a recorded value"""
+        if self._vcd_writer is None:
+            raise RuntimeError("VCD Writer is None")
+        if self._error is not None:
+            raise self._error
+        var = self._vcd_dict.get(port)
+        if var is None:
+            return
+        self._changes.append((time_ns, var, value))
+        if len(self._changes) >= self._block_size:
+            self._wakeup.set()
+
+    def _write_changes(self):
+        """Write the buffered value changes to the vcd file"""
+        changes = self._changes
+        try:
+            while changes:
+                time_ns, var, value = changes.popleft()
+                self._vcd_writer.change(var, timestamp=time_ns, value=value)
+            self._vcd_file.flush()
+        except Exception as exc:
+            self._error = exc
+            changes.clear()
+
+    def _writer_thread(self):
+        while not self._stop:
+            self._wakeup.wait(self._flush_interval)
+            self._wakeup.clear()
+            self._write_changes()
+
+    def _stop_writer_thread(self):
+        if self._thread is not None:
+            self._stop = True
+            self._wakeup.set()
+            self._thread.join()
+            self._thread = None
 
     def close(self):
-        """Close vcd file"""
+        """Close vcd file, all buffered value changes are written before the file is closed"""
+        atexit.unregister(self.close)
+        self._stop_writer_thread()
+
         if self._vcd_writer is not None:
+            self._write_changes()
             self._vcd_writer.close()
             self._vcd_writer = None
 
@@ -59,3 +216,8 @@ class WavesWriter:
             self._vcd_file = None
 
         self._vcd_dict = {}
+        self._port_vars = {}
+        if self._error is not None:
+            error = self._error
+            self._error = None
+            raise error
@@ -22,5 +22,6 @@ from ._on_off_switch import OnOffSwitch  # noqa: F401
 from ._seven_segment import SevenSegment  # noqa: F401
 from ._static_level import GND, VDD  # noqa: F401
 from ._static_value import StaticValue  # noqa: F401
+from ._yosys_bitparallel import BitParallelException, BitParallelNetlist  # noqa: F401
 from ._yosys_component import YosysComponent, YosysComponentException  # noqa: F401
 from .atoms import PortConnectionError  # noqa: F401
@@ -1,54 +1,285 @@
 # Copyright (c) Fredrik Andersson, 2023-2025
 # All rights reserved
 
-"""Module with Logic Analyzer component"""
+"""
+Module with Logic Analyzer component
 
-from .atoms import CallbackComponent, PortOutDelta, PortWire
+The samples of each channel are stored in a preallocated circular buffer (bytearray).
+Every sample is written twice, at index and index + depth, so the last 'depth' samples
+are always a contiguous slice of the buffer and can be read without copying.
+
+In "event" mode the analyzer does not sample, the channel ports record the time of
+each level change (no simulation events) and the samples are created on demand.
+"""
+
+import bisect
+from array import array
+
+from .atoms import CallbackComponent, PortOutDelta, PortWireObserver
 
 
 class LogicAnalyzer(CallbackComponent):
-    """Logic Analyzer component class"""
+    """
+    Logic Analyzer component class
+
+    mode: "sample", the channels are sampled with sample_rate (a simulation event per sample)
+          "event", the level changes are recorded and resampled on demand,
+          the trigger is not used in event mode
+    trigger: "none" (free running), "rising"/"falling" edge on trigger_channel or
+             "pattern", the channels (A is bit 0) masked with trigger_mask equals trigger_pattern
+    pre_trigger: Part of the samples (percent) before the trigger sample,
+                 the capture stops when the post-trigger samples are collected (re-arm with arm())
+    """
 
     PORTLIST = ["A", "B", "C", "D", "E", "F", "G", "H"]
 
-    def __init__(self, circuit, name=None, sample_rate=100):
+    MODES = ["sample", "event"]
+    _LEVEL_BYTES = {0: b"\x00", 1: b"\x01"}
+    TRIGGERS = ["none", "rising", "falling", "pattern"]
+    FREE_RUNNING = "free running"
+    ARMED = "armed"
+    TRIGGERED = "triggered"
+    DONE = "done"
+
+    def __init__(
+        self,
+        circuit,
+        name=None,
+        sample_rate=100,
+        depth=100,
+        trigger="none",
+        trigger_channel="A",
+        trigger_pattern=0,
+        trigger_mask=0,
+        pre_trigger=10,
+        mode="sample",
+    ):
         super().__init__(circuit, name)
-        self.data_dict = {}
+        observer = self._record_level_change if mode == "event" else None
         for portname in self.PORTLIST:
-            self.add_port(PortWire(self, portname))
-            self.data_dict[portname] = [0] * 100
+            self.add_port(PortWireObserver(self, portname, observer=observer))
         self._feedback = PortOutDelta(self, "feedback")
         self._feedback.update_parent(True)
+        self._depth = 0
+        self._buffers: dict[str, bytearray] = {}
+        self._index = 0
+        self._state = self.FREE_RUNNING
+        self._post_trigger_samples = 0
+        self._last_pattern = 0
+        self._levels: dict[str, int] = {}
+        self._level_changes: dict[str, array] = {}
+        self._trim_lengths: dict[str, int] = {}
+        self.parameter_set("mode", mode)
         self.parameter_set("sample_rate", sample_rate)
+        self.parameter_set("depth", depth)
+        self.parameter_set("trigger", trigger)
+        self.parameter_set("trigger_channel", trigger_channel)
+        self.parameter_set("trigger_pattern", trigger_pattern)
+        self.parameter_set("trigger_mask", trigger_mask)
+        self.parameter_set("pre_trigger", pre_trigger)
         self.reconfigure()
 
+    def init(self):
+        super().init()
+        self.arm()
+
     def default_state(self):
-        self._feedback.value = 1
+        if self.parameter_get("mode") == "sample":
+            self._feedback.value = 1
+
+    def checkpoint_state(self):
+        return (
+            {portname: bytes(buffer) for portname, buffer in self._buffers.items()},
+            self._index,
+            self._state,
+            self._post_trigger_samples,
+            self._last_pattern,
+            dict(self._levels),
+            {portname: array("q", times) for portname, times in self._level_changes.items()},
+        )
+
+    def restore_state(self, state):
+        (
+            buffers,
+            self._index,
+            self._state,
+            self._post_trigger_samples,
+            self._last_pattern,
+            levels,
+            level_changes,
+        ) = state
+        self._buffers = {portname: bytearray(buffer) for portname, buffer in buffers.items()}
+        self._depth = len(next(iter(self._buffers.values()))) // 2
+        self._levels = dict(levels)
+        self._level_changes = {
+            portname: array("q", times) for portname, times in level_changes.items()
+        }
+        self._trim_lengths = {
+            portname: 2 * max(len(times), self._depth)
+            for portname, times in self._level_changes.items()
+        }
+
+    @property
+    def state(self) -> str:
+        """Get the capture state, FREE_RUNNING, ARMED, TRIGGERED or DONE"""
+        return self._state
+
+    @property
+    def depth(self) -> int:
+        """Get the number of samples per channel"""
+        return self._depth
+
+    def arm(self):
+        """Arm the trigger (or start free running), the sample buffers are cleared"""
+        self._index = 0
+        for buffer in self._buffers.values():
+            buffer[:] = bytes(len(buffer))
+        self._last_pattern = 0
+        self._post_trigger_samples = 0
+        self._levels = dict.fromkeys(self.PORTLIST, 0)
+        self._level_changes = {portname: array("q") for portname in self.PORTLIST}
+        self._trim_lengths = dict.fromkeys(self.PORTLIST, 2 * self._depth)
+        if self.parameter_get("trigger") == "none" or self.parameter_get("mode") == "event":
+            self._state = self.FREE_RUNNING
+        else:
+            self._state = self.ARMED
+
+    def _is_triggered(self, pattern: int) -> bool:
+        trigger = self.parameter_get("trigger")
+        if trigger == "pattern":
+            mask = self.parameter_get("trigger_mask")
+            return pattern & mask == self.parameter_get("trigger_pattern") & mask
+        channel_mask = 1 << self.PORTLIST.index(self.parameter_get("trigger_channel"))
+        if trigger == "rising":
+            return bool(pattern & channel_mask and not self._last_pattern & channel_mask)
+        return bool(not pattern & channel_mask and self._last_pattern & channel_mask)
+
+    def _sample(self):
+        """Write one sample of all channels to the circular buffers"""
+        index = self._index
+        depth = self._depth
+        pattern = 0
+        for bit, portname in enumerate(self.PORTLIST):
+            value = 1 if self.port(portname).value == 1 else 0
+            buffer = self._buffers[portname]
+            buffer[index] = value
+            buffer[index + depth] = value
+            pattern |= value << bit
+        self._index = index + 1 if index + 1 < depth else 0
+
+        if self._state == self.ARMED:
+            if self._is_triggered(pattern):
+                self._state = self.TRIGGERED
+                pre_trigger_samples = depth * self.parameter_get("pre_trigger") // 100
+                self._post_trigger_samples = max(depth - pre_trigger_samples - 1, 0)
+                if self._post_trigger_samples == 0:
+                    self._state = self.DONE
+        elif self._state == self.TRIGGERED:
+            self._post_trigger_samples -= 1
+            if self._post_trigger_samples == 0:
+                self._state = self.DONE
+        self._last_pattern = pattern
+
+    def _record_level_change(self, port):
+        """Record the time of a level change, the channel port observer (event mode)"""
+        portname = port.name()
+        level = 1 if port.value == 1 else 0
+        if level == self._levels[portname]:
+            return
+        self._levels[portname] = level
+        times = self._level_changes[portname]
+        time_ns = self._circuit.time_ns
+        if times and times[-1] == time_ns:
+            # Zero delay glitch, the level changes cancel
+            times.pop()
+        else:
+            times.append(time_ns)
+            if len(times) > self._trim_lengths[portname]:
+                # Remove the level changes before the last 'depth' samples,
+                # the next trim is done when the number of level changes has doubled
+                period_ns = int(1000000000 / self.parameter_get("sample_rate"))
+                del times[: bisect.bisect_left(times, time_ns - self._depth * period_ns)]
+                self._trim_lengths[portname] = 2 * max(len(times), self._depth)
+        super().update()
+
+    def level_changes(self, portname: str) -> tuple[int, array]:
+        """
+        Get the level before the first recorded level change and the times (ns)
+        of the recorded level changes of a channel (event mode)
+        """
+        times = self._level_changes[portname]
+        return self._levels[portname] ^ (len(times) & 1), times
+
+    def resample(self, portname: str, start_ns: int, period_ns: int, buffer):
+        """
+        Fill the buffer (bytearray/memoryview) with samples of a channel,
+        taken every period_ns from start_ns
+        """
+        first_level, times = self.level_changes(portname)
+        samples = len(buffer)
+        sample = 0
+        while sample < samples:
+            index = bisect.bisect_right(times, start_ns + sample * period_ns)
+            level = first_level ^ (index & 1)
+            if index < len(times):
+                # The first sample at or after the next level change
+                next_sample = min(-((start_ns - times[index]) // period_ns), samples)
+            else:
+                next_sample = samples
+            buffer[sample:next_sample] = self._LEVEL_BYTES[level] * (next_sample - sample)
+            sample = next_sample
 
     def update(self):
+        if self.parameter_get("mode") == "event":
+            return
         if self._feedback.value == 1:
             self._feedback.value = 0
         else:
             self._feedback.value = 1
 
-        for portname in self.PORTLIST:
-            self.data_dict[portname].pop(0)
-            value = 1 if self.port(portname).value == 1 else 0
-            self.data_dict[portname].append(value)
+        if self._state != self.DONE:
+            self._sample()
         super().update()
 
     def reconfigure(self):
         sample_rate = self.parameter_get("sample_rate")
         period_ns = int(1000000000 / sample_rate)
         self._feedback.set_delay_ns(period_ns)
+        depth = self.parameter_get("depth")
+        if depth != self._depth:
+            self._depth = depth
+            self._buffers = {portname: bytearray(2 * depth) for portname in self.PORTLIST}
+        self.arm()
 
-    def signal_data(self):
-        """Get the logic analyzer signal data"""
-        return self.data_dict
+    def signal_window(self) -> tuple[dict[str, bytearray], int, int]:
+        """
+        Get the sample buffers and the slice (start, stop) with the last 'depth' samples,
+        oldest sample first, without copying.
+        The buffers are updated by the simulation, in event mode the samples are
+        created from the recorded level changes when this function is called.
+        """
+        if self.parameter_get("mode") == "event":
+            period_ns = int(1000000000 / self.parameter_get("sample_rate"))
+            start_ns = self._circuit.time_ns - (self._depth - 1) * period_ns
+            for portname, buffer in self._buffers.items():
+                self.resample(portname, start_ns, period_ns, memoryview(buffer)[: self._depth])
+            return self._buffers, 0, self._depth
+        return self._buffers, self._index, self._index + self._depth
+
+    def signal_data(self) -> dict[str, memoryview]:
+        """Get the logic analyzer signal data, a view of the last 'depth' samples per channel"""
+        buffers, start, stop = self.signal_window()
+        return {portname: memoryview(buffer)[start:stop] for portname, buffer in buffers.items()}
 
     @classmethod
     def get_parameters(cls):
         return {
+            "mode": {
+                "type": "list",
+                "items": cls.MODES,
+                "default": "sample",
+                "description": "Sample or record level changes (event)",
+            },
             "sample_rate": {
                 "type": "int",
                 "min": 10,
@@ -57,4 +288,50 @@ class LogicAnalyzer(CallbackComponent):
                 "description": "Sample rate in Hz",
                 "reconfigurable": True,
             },
+            "depth": {
+                "type": "int",
+                "min": 10,
+                "max": 1000000,
+                "default": 100,
+                "description": "Number of samples",
+                "reconfigurable": True,
+            },
+            "trigger": {
+                "type": "list",
+                "items": cls.TRIGGERS,
+                "default": "none",
+                "description": "Trigger",
+                "reconfigurable": True,
+            },
+            "trigger_channel": {
+                "type": "list",
+                "items": cls.PORTLIST,
+                "default": "A",
+                "description": "Edge trigger channel",
+                "reconfigurable": True,
+            },
+            "trigger_pattern": {
+                "type": "int",
+                "min": 0,
+                "max": 255,
+                "default": 0,
+                "description": "Pattern trigger value (A is bit 0)",
+                "reconfigurable": True,
+            },
+            "trigger_mask": {
+                "type": "int",
+                "min": 0,
+                "max": 255,
+                "default": 0,
+                "description": "Pattern trigger mask (A is bit 0)",
+                "reconfigurable": True,
+            },
+            "pre_trigger": {
+                "type": "int",
+                "min": 0,
+                "max": 100,
+                "default": 10,
+                "description": "Pre-trigger samples (percent)",
+                "reconfigurable": True,
+            },
         }
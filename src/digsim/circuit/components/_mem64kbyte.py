@@ -28,6 +28,12 @@ class Mem64kByte(Component):
                 for idx, byte in enumerate(romdata):
                     self._mem_array[rom_address + idx] = byte
 
+    def checkpoint_state(self):
+        return list(self._mem_array)
+
+    def restore_state(self, state):
+        self._mem_array = list(state)
+
     def update(self):
         rising_edge = self.clk.is_rising_edge()
         if not rising_edge or self.Address.value == "X":
@@ -22,6 +22,12 @@ class MemStdOut(Component):
         self.add_port(PortWire(self, "WE"))
         self._str = ""
 
+    def checkpoint_state(self):
+        return self._str
+
+    def restore_state(self, state):
+        self._str = state
+
     def update(self):
         rising_edge = self.clk.is_rising_edge()
         if self.WE.value == 0 or self.Address.value != self._address:
@@ -29,6 +29,12 @@ class OnOffSwitch(CallbackComponent):
 
         self.turn_off()
 
+    def checkpoint_state(self):
+        return self._on
+
+    def restore_state(self, state):
+        self._on = state
+
     def turn_on(self):
         """Turn on the switch"""
         self.O.value = 1
@@ -36,6 +36,13 @@ class ClassNameParameterComponent(Component):
             return 1
         raise ValueError(f"Unknown value ä{level}'")
 
+    def checkpoint_state(self):
+        # The clocked cells store the previous clock level for edge detection
+        return getattr(self, "_old_C_level", None)
+
+    def restore_state(self, state):
+        self._old_C_level = state
+
 
 class _BUF_(Component):
     """module _BUF_ (A, Y)"""
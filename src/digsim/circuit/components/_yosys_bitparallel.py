@@ -0,0 +1,186 @@
+# Copyright (c) Fredrik Andersson, 2023-2025
+# All rights reserved
+
+"""
+Module with a bit-parallel evaluator for combinational yosys netlists
+
+Each net is a Python int where bit k is the net value for input vector k,
+so every yosys cell is evaluated for all input vectors with a few bitwise operations.
+The cells are evaluated in level order by a generated straight-line function.
+"""
+
+from __future__ import annotations
+
+from digsim.utils import YosysModule, YosysNetlist
+
+from ._yosys_levelized import COMBINATIONAL_CELLS, LevelizedNetlist
+from .atoms import DigsimException
+
+
+class BitParallelException(DigsimException):
+    """Exception for bit-parallel evaluation errors"""
+
+
+# Cell type => bit-parallel expression, "m" is the mask with one bit per input vector
+_EXPRESSIONS: dict[str, str] = {
+    "$_BUF_": "{A}",
+    "$_NOT_": "{A} ^ m",
+    "$_AND_": "{A} & {B}",
+    "$_NAND_": "{A} & {B} ^ m",
+    "$_OR_": "{A} | {B}",
+    "$_NOR_": "({A} | {B}) ^ m",
+    "$_XOR_": "{A} ^ {B}",
+    "$_XNOR_": "{A} ^ {B} ^ m",
+    "$_ANDNOT_": "{A} & ({B} ^ m)",
+    "$_ORNOT_": "{A} | ({B} ^ m)",
+    "$_MUX_": "{A} ^ (({A} ^ {B}) & {S})",
+    "$_NMUX_": "{A} ^ (({A} ^ {B}) & {S}) ^ m",
+    "$_AOI3_": "({A} & {B} | {C}) ^ m",
+    "$_OAI3_": "(({A} | {B}) & {C}) ^ m",
+    "$_AOI4_": "({A} & {B} | {C} & {D}) ^ m",
+    "$_OAI4_": "(({A} | {B}) & ({C} | {D})) ^ m",
+}
+
+
+def _net(net: int) -> str:
+    return f"n{net}"
+
+
+def _mux_tree(data: list[str], select: list[str]) -> str:
+    """Bit-parallel expression for _MUX4_/_MUX8_/_MUX16_, one 2:1 mux per select bit"""
+    while len(data) > 1:
+        select_name = select[0]
+        data = [
+            f"({low} ^ (({low} ^ {high}) & {select_name}))"
+            for low, high in zip(data[0::2], data[1::2])
+        ]
+        select = select[1:]
+    return data[0]
+
+
+def _cell_expression(cell_type: str, input_nets: list[int]) -> str:
+    names = [_net(net) for net in input_nets]
+    expression = _EXPRESSIONS.get(cell_type)
+    if expression is None:
+        select_bits = {6: 2, 11: 3, 20: 4}[len(names)]
+        return _mux_tree(names[: 1 << select_bits], names[1 << select_bits :])
+    port_names = COMBINATIONAL_CELLS[cell_type][0]
+    return expression.format(**dict(zip(port_names, names)))
+
+
+class BitParallelNetlist:
+    """
+    Bit-parallel evaluator for a combinational yosys netlist,
+    used to evaluate a netlist for a batch of input vectors at once.
+
+    Example:
+        netlist = BitParallelNetlist(YosysNetlist(**netlist_dict))
+        outputs = netlist.evaluate({"A": [1, 2, 3], "B": [4, 5, 6]})
+        outputs["O"]  # => [output value for vector 0, vector 1, vector 2]
+
+    "X" values are not supported, constant "X" nets are evaluated as 0.
+    YosysLevelizeException is raised if the netlist cannot be levelized.
+    """
+
+    def __init__(self, netlist: YosysNetlist | YosysModule):
+        if isinstance(netlist, YosysNetlist):
+            netlist = list(netlist.get_modules().values())[0]
+        levelized_netlist = LevelizedNetlist(netlist)
+        if levelized_netlist.sequential_cells:
+            raise BitParallelException(
+                "Bit-parallel evaluation is only supported for combinational netlists"
+            )
+        self._input_widths: dict[str, int] = {
+            portname: len(nets) for portname, nets in levelized_netlist.input_nets.items()
+        }
+        self._output_widths: dict[str, int] = {
+            portname: len(nets) for portname, nets in levelized_netlist.output_nets.items()
+        }
+        namespace = {}
+        exec(
+            compile(self._generate_source(levelized_netlist), "<bit-parallel>", "exec"), namespace
+        )
+        self._evaluate = namespace["evaluate"]
+
+    @staticmethod
+    def _generate_source(netlist: LevelizedNetlist) -> str:
+        input_args = [f"i{index}" for index in range(len(netlist.input_nets))]
+        body = []
+        defined = set()
+        for net, value in netlist.constants:
+            body.append(f"{_net(net)} = {'m' if value == 1 else '0'}")
+            defined.add(net)
+        for arg, nets in zip(input_args, netlist.input_nets.values()):
+            body.append(f"{''.join(f'{_net(net)}, ' for net in nets)}= {arg}")
+            defined.update(nets)
+        used = {net for nets in netlist.output_nets.values() for net in nets}
+        for cell_type, input_nets, out_net in netlist.combinational_cells:
+            body.append(f"{_net(out_net)} = {_cell_expression(cell_type, input_nets)}")
+            used.update(input_nets)
+            defined.add(out_net)
+        undriven = sorted(used - defined)
+        if undriven:
+            body.insert(0, f"{' = '.join(_net(net) for net in undriven)} = 0")
+        outputs = [
+            f"({''.join(f'{_net(net)}, ' for net in nets)})"
+            for nets in netlist.output_nets.values()
+        ]
+        body.append(f"return ({''.join(f'{output}, ' for output in outputs)})")
+        lines = [f"def evaluate({', '.join(['m', *input_args])}):"]
+        lines.extend(f"    {line}" for line in body)
+        return "\n".join(lines) + "\n"
+
+    @property
+    def inputs(self) -> dict[str, int]:
+        """Get the input port names and widths"""
+        return self._input_widths
+
+    @property
+    def outputs(self) -> dict[str, int]:
+        """Get the output port names and widths"""
+        return self._output_widths
+
+    @staticmethod
+    def _to_bit_words(values: list[int], width: int) -> list[int]:
+        """Transpose a list of port values to one int per port bit"""
+        words = []
+        for bit in range(width):
+            bits = "".join("1" if (value >> bit) & 1 else "0" for value in reversed(values))
+            words.append(int(bits, 2) if bits else 0)
+        return words
+
+    @staticmethod
+    def _from_bit_words(words: list[int], vectors: int) -> list[int]:
+        """Transpose one int per port bit to a list of port values"""
+        bit_strings = [format(word, f"0{vectors}b")[::-1] for word in reversed(words)]
+        return [int("".join(bits), 2) for bits in zip(*bit_strings)]
+
+    def evaluate(self, input_vectors: dict[str, list[int]]) -> dict[str, list[int]]:
+        """
+        Evaluate the netlist for a batch of input vectors
+        input_vectors is a dict with one list of values per input port,
+        all lists must have the same length.
+        Return a dict with one list of values per output port.
+        """
+        if set(input_vectors) != set(self._input_widths):
+            raise BitParallelException(
+                f"Input vectors for {sorted(self._input_widths)} expected, "
+                f"got {sorted(input_vectors)}"
+            )
+        vectors = {len(values) for values in input_vectors.values()}
+        if len(vectors) > 1:
+            raise BitParallelException("All input vector lists must have the same length")
+        vectors = vectors.pop() if vectors else 0
+        if vectors == 0:
+            return {portname: [] for portname in self._output_widths}
+
+        mask = (1 << vectors) - 1
+        input_words = [
+            self._to_bit_words(input_vectors[portname], width)
+            for portname, width in self._input_widths.items()
+        ]
+        output_words = self._evaluate(mask, *input_words)
+        return {
+            portname: self._from_bit_words(list(words), vectors)
+            for portname, words in zip(self._output_widths, output_words)
+        }
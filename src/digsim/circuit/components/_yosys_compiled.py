@@ -0,0 +1,329 @@
+# Copyright (c) Fredrik Andersson, 2023-2025
+# All rights reserved
+
+"""
+Module with a compiled simulation engine for yosys netlists
+
+The levelized netlist is converted to Python source code with one straight-line
+function that updates the flip-flops and evaluates the combinational logic
+over local variables, one variable per net.
+The generated source is cached on disk, the file name is the hash of the netlist.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Callable
+
+from digsim.utils import YosysModule, digsim_cache_dir
+
+from ._yosys_levelized import COMBINATIONAL_CELLS, LevelizedNetlist, SequentialCell
+from .atoms import Component, PortIn, PortOutDelta
+
+
+# Increase when the generated code changes, to invalidate the disk cache
+CODEGEN_VERSION = 1
+
+# Cell type => expression, all combinational cells have output "Y"
+_EXPRESSIONS: dict[str, str] = {
+    "$_BUF_": "{A}",
+    "$_NOT_": "0 if {A} == 1 else 1",
+    "$_AND_": "1 if {A} == 1 and {B} == 1 else 0",
+    "$_NAND_": "0 if {A} == 1 and {B} == 1 else 1",
+    "$_OR_": "1 if {A} == 1 or {B} == 1 else 0",
+    "$_NOR_": "0 if {A} == 1 or {B} == 1 else 1",
+    "$_XOR_": "{A} ^ {B} if {A} != 'X' and {B} != 'X' else 0",
+    "$_XNOR_": "1 ^ {A} ^ {B} if {A} != 'X' and {B} != 'X' else 1",
+    "$_ANDNOT_": "1 if {A} == 1 and {B} == 0 else 0",
+    "$_ORNOT_": "1 if {A} == 1 or {B} == 0 else 0",
+    "$_MUX_": "{A} if {S} == 0 else {B}",
+    "$_NMUX_": "(1 if {A} == 0 else 0) if {S} == 0 else (1 if {B} == 0 else 0)",
+    "$_AOI3_": "0 if ({A} == 1 and {B} == 1) or {C} == 1 else 1",
+    "$_OAI3_": "0 if ({A} == 1 or {B} == 1) and {C} == 1 else 1",
+    "$_AOI4_": "0 if ({A} == 1 and {B} == 1) or ({C} == 1 and {D} == 1) else 1",
+    "$_OAI4_": "0 if ({A} == 1 or {B} == 1) and ({C} == 1 or {D} == 1) else 1",
+}
+
+# Compiled step functions, shared by all components with the same netlist
+_STEP_FUNCTIONS: dict[str, dict] = {}
+
+
+def _net(net: int) -> str:
+    return f"n{net}"
+
+
+def _muxn_expression(input_nets: list[int]) -> str:
+    """Expression for _MUX4_/_MUX8_/_MUX16_, an "X" select will select the last input"""
+    select_bits = {6: 2, 11: 3, 20: 4}[len(input_nets)]
+    data = [_net(net) for net in input_nets[: 1 << select_bits]]
+    select = [_net(net) for net in input_nets[1 << select_bits :]]
+    index = " | ".join(f"{name} << {bit}" if bit else name for bit, name in enumerate(select))
+    select_valid = " and ".join(f"{name} != 'X'" for name in select)
+    return f"({', '.join(data)})[{index}] if {select_valid} else {data[-1]}"
+
+
+def _cell_expression(cell_type: str, input_nets: list[int]) -> str:
+    expression = _EXPRESSIONS.get(cell_type)
+    if expression is None:
+        return _muxn_expression(input_nets)
+    port_names = COMBINATIONAL_CELLS[cell_type][0]
+    return expression.format(**{port: _net(net) for port, net in zip(port_names, input_nets)})
+
+
+def _sample_expression(sequential_cell: SequentialCell, q_name: str) -> str:
+    """Expression for the flip-flop value at the next clock edge"""
+    expression = _net(sequential_cell.d_net)
+    if sequential_cell.enable_net is not None and not sequential_cell.enable_first:
+        enable = f"{_net(sequential_cell.enable_net)} == {sequential_cell.enable_level}"
+        expression = f"{expression} if {enable} else {q_name}"
+    if sequential_cell.sync_reset:
+        reset = f"{_net(sequential_cell.reset_net)} == {sequential_cell.reset_level}"
+        expression = f"{sequential_cell.reset_value} if {reset} else ({expression})"
+    if sequential_cell.enable_first:
+        enable = f"{_net(sequential_cell.enable_net)} == {sequential_cell.enable_level}"
+        expression = f"({expression}) if {enable} else {q_name}"
+    return expression
+
+
+def _pack_expression(nets: list[int]) -> str:
+    """Expression for a multi bit port value"""
+    names = [_net(net) for net in nets]
+    if len(names) == 1:
+        return names[0]
+    packed = " | ".join(f"{name} << {bit}" if bit else name for bit, name in enumerate(names))
+    return f"'X' if 'X' in ({', '.join(names)}) else {packed}"
+
+
+def generate_source(netlist: LevelizedNetlist) -> str:
+    """
+    Generate Python source for a levelized netlist
+
+    The generated function step(q, d, c, *inputs) returns a tuple with the output values:
+    * q: The flip-flop values
+    * d: The flip-flop values at the next clock edge, from the previous step
+    * c: The clock values from the previous step
+    * inputs: The input port values
+    """
+    input_args = [f"i{index}" for index in range(len(netlist.input_nets))]
+    constant_nets = {net for net, _ in netlist.constants}
+    clocks: dict[tuple[int, int], list[int]] = {}
+    for ff_id, sequential_cell in enumerate(netlist.sequential_cells):
+        if sequential_cell.clock_net in constant_nets:
+            # A constant clock will never have an edge
+            continue
+        clock = (sequential_cell.clock_net, sequential_cell.clock_edge)
+        clocks.setdefault(clock, []).append(ff_id)
+    clock_nets = list(dict.fromkeys(clock_net for clock_net, _ in clocks))
+
+    lines = [
+        "# Generated by digsim from a yosys netlist, do not edit",
+        "",
+        f"INPUTS = {tuple(netlist.input_nets)!r}",
+        f"OUTPUTS = {tuple(netlist.output_nets)!r}",
+        f"FLIP_FLOPS = {len(netlist.sequential_cells)}",
+        f"CLOCKS = {len(clock_nets)}",
+    ]
+    body = []
+    defined = set()
+
+    body.append("# Constants")
+    for net, value in netlist.constants:
+        body.append(f"{_net(net)} = {value!r}")
+        defined.add(net)
+
+    body.append("# Inputs")
+    for arg, nets in zip(input_args, netlist.input_nets.values()):
+        names = [_net(net) for net in nets]
+        body.append(f"if {arg} == 'X':")
+        body.append(f"    {' = '.join(names)} = 'X'")
+        body.append("else:")
+        for bit, name in enumerate(names):
+            body.append(f"    {name} = {arg} >> {bit} & 1" if bit else f"    {name} = {arg} & 1")
+        defined.update(nets)
+
+    body.append("# Flip-flops")
+    for (clock_net, clock_edge), ff_ids in clocks.items():
+        clock_id = clock_nets.index(clock_net)
+        body.append(f"if {_net(clock_net)} == {clock_edge} and c[{clock_id}] != {clock_edge}:")
+        for ff_id in ff_ids:
+            body.append(f"    q[{ff_id}] = d[{ff_id}]")
+    for clock_id, clock_net in enumerate(clock_nets):
+        body.append(f"c[{clock_id}] = {_net(clock_net)}")
+    for ff_id, sequential_cell in enumerate(netlist.sequential_cells):
+        keyword = "if"
+        if sequential_cell.reset_net is not None and not sequential_cell.sync_reset:
+            reset = f"{_net(sequential_cell.reset_net)} == {sequential_cell.reset_level}"
+            body.append(f"if {reset}:")
+            body.append(f"    q[{ff_id}] = {sequential_cell.reset_value}")
+            keyword = "elif"
+        if sequential_cell.set_net is not None:
+            body.append(
+                f"{keyword} {_net(sequential_cell.set_net)} == {sequential_cell.set_level}:"
+            )
+            body.append(f"    q[{ff_id}] = 1")
+    for ff_id, sequential_cell in enumerate(netlist.sequential_cells):
+        body.append(f"{_net(sequential_cell.q_net)} = q[{ff_id}]")
+        defined.add(sequential_cell.q_net)
+
+    body.append("# Combinational logic")
+    for cell_type, input_nets, out_net in netlist.combinational_cells:
+        body.append(f"{_net(out_net)} = {_cell_expression(cell_type, input_nets)}")
+        defined.add(out_net)
+
+    body.append("# Flip-flop values at the next clock edge")
+    for ff_id, sequential_cell in enumerate(netlist.sequential_cells):
+        body.append(f"d[{ff_id}] = {_sample_expression(sequential_cell, f'q[{ff_id}]')}")
+
+    outputs = [_pack_expression(nets) for nets in netlist.output_nets.values()]
+    body.append(f"return ({''.join(f'{output}, ' for output in outputs)})")
+
+    # Nets without driver are "X"
+    used = {net for nets in netlist.output_nets.values() for net in nets}
+    for _, input_nets, _ in netlist.combinational_cells:
+        used.update(input_nets)
+    for sequential_cell in netlist.sequential_cells:
+        used.update(
+            net
+            for net in [
+                sequential_cell.d_net,
+                sequential_cell.enable_net,
+                sequential_cell.reset_net,
+                *sequential_cell.control_nets(),
+            ]
+            if net is not None
+        )
+    undriven = sorted(used - defined)
+    if undriven:
+        body.insert(0, f"{' = '.join(_net(net) for net in undriven)} = 'X'")
+
+    lines.append("")
+    lines.append("")
+    lines.append(f"def step({', '.join(['q', 'd', 'c', *input_args])}):")
+    lines.extend(f"    {line}" for line in body)
+    lines.append("")
+    return "\n".join(lines)
+
+
+def netlist_hash(module: YosysModule) -> str:
+    """Get a hash of the module ports and cells, cell names and attributes are not included"""
+    netlist_data = {
+        "version": CODEGEN_VERSION,
+        "ports": {name: [port.direction, port.bits] for name, port in module.ports.items()},
+        "cells": [[cell.type, cell.connections] for cell in module.cells.values()],
+    }
+    return hashlib.sha256(json.dumps(netlist_data, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def compiled_cache_path() -> Path:
+    """
+    Get the folder for the generated source files,
+    the environment variable DIGSIM_CACHE_DIR can be used to select the cache folder.
+    """
+    return digsim_cache_dir() / "compiled"
+
+
+def _write_source(source_path: Path, source: str):
+    """Write the generated source to the cache, the cache is optional and errors are ignored"""
+    try:
+        source_path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first so that a reader never sees a partial file
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=source_path.parent, suffix=".tmp", delete=False
+        ) as tmp_file:
+            tmp_file.write(source)
+        os.replace(tmp_file.name, source_path)
+    except OSError:
+        # The cache is optional, e.g. a read-only home folder
+        pass
+
+
+def _exec_cached_source(source: str, source_path: Path) -> dict | None:
+    """Execute the cached source, return None if the file is broken (e.g. partially written)"""
+    namespace = {}
+    try:
+        code = compile(source, str(source_path), "exec")
+    except (SyntaxError, ValueError):
+        return None
+    exec(code, namespace)
+    if "step" not in namespace:
+        return None
+    return namespace
+
+
+def load_compiled_netlist(module: YosysModule) -> dict:
+    """
+    Get the namespace of the compiled netlist (INPUTS, OUTPUTS, FLIP_FLOPS, CLOCKS, step)
+    The source is generated if it is not found in the cache (or if the cached file is broken),
+    YosysLevelizeException is raised if the netlist cannot be levelized.
+    """
+    digest = netlist_hash(module)
+    namespace = _STEP_FUNCTIONS.get(digest)
+    if namespace is not None:
+        return namespace
+
+    source_path = compiled_cache_path() / f"{digest}.py"
+    try:
+        namespace = _exec_cached_source(source_path.read_text(encoding="utf-8"), source_path)
+    except (OSError, UnicodeDecodeError):
+        namespace = None
+    if namespace is None:
+        source = generate_source(LevelizedNetlist(module))
+        _write_source(source_path, source)
+        namespace = {}
+        exec(compile(source, str(source_path), "exec"), namespace)
+
+    _STEP_FUNCTIONS[digest] = namespace
+    return namespace
+
+
+class YosysCompiledCore(Component):
+    """
+    Component that simulates a yosys module with the compiled engine,
+    the component has one port per module port.
+    """
+
+    def __init__(self, circuit, module: YosysModule, name: str = "compiled"):
+        # Compile before the component is added to the circuit
+        namespace = load_compiled_netlist(module)
+        super().__init__(circuit, name)
+        self._step: Callable = namespace["step"]
+        self._flip_flops: int = namespace["FLIP_FLOPS"]
+        self._clocks: int = namespace["CLOCKS"]
+        self._q: list = [0] * self._flip_flops
+        self._d: list = [0] * self._flip_flops
+        self._c: list = ["X"] * self._clocks
+        for portname, port in module.ports.items():
+            if port.is_output:
+                self.add_port(PortOutDelta(self, portname, width=len(port.bits)))
+            else:
+                self.add_port(PortIn(self, portname, width=len(port.bits)))
+        self._inports = [self.port(portname) for portname in namespace["INPUTS"]]
+        self._outports = [self.port(portname) for portname in namespace["OUTPUTS"]]
+
+    def _evaluate(self, input_values):
+        output_values = self._step(self._q, self._d, self._c, *input_values)
+        for port, value in zip(self._outports, output_values):
+            port.value = value
+
+    def default_state(self):
+        input_values = [port.value for port in self._inports]
+        self._c = ["X"] * self._clocks
+        self._d = [0] * self._flip_flops
+        # The first step sets the clock values, the flip-flops are reset after any clock edge
+        self._q = [0] * self._flip_flops
+        self._step(self._q, self._d, self._c, *input_values)
+        self._q = [0] * self._flip_flops
+        self._evaluate(input_values)
+
+    def checkpoint_state(self):
+        return list(self._q), list(self._d), list(self._c)
+
+    def restore_state(self, state):
+        self._q, self._d, self._c = (list(values) for values in state)
+
+    def update(self):
+        self._evaluate([port.value for port in self._inports])
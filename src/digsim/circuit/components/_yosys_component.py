@@ -9,10 +9,14 @@ from a yosys json netlist.
 import json
 
 import digsim.circuit.components._yosys_atoms
-from digsim.synth import Synthesis
+import digsim.circuit.components._yosys_word_atoms
+from digsim.synth import SYNTHESIS_PROFILES, Synthesis
 from digsim.utils import YosysCell, YosysModule, YosysNetlist
 
 from ._static_level import GND, VDD
+from ._yosys_compiled import YosysCompiledCore
+from ._yosys_levelized import YosysLevelizedCore, YosysLevelizeException
+from ._yosys_numpy import YosysNumpyCore, numpy_available
 from .atoms import Component, DigsimException, MultiComponent, PortMultiBitWire
 
 
@@ -21,16 +25,41 @@ class YosysComponentException(DigsimException):
 
 
 class YosysComponent(MultiComponent):
-    """Class to create a yosys component from a yosys json netlist"""
-
-    def __init__(self, circuit, path=None, name=None, nets=True):
+    """
+    Class to create a yosys component from a yosys json netlist
+
+    The simulation engine is selected by the circuit 'yosys_engine':
+    * "event": One component per yosys cell, simulated with delta cycle events.
+    * "levelized": One component that evaluates the cells in level order,
+      the "event" engine is used if the netlist cannot be levelized
+      (latches, combinational loops, clocks or asynchronous set/reset
+      not driven by module inputs).
+    * "compiled": As "levelized", but the netlist is converted to a generated Python
+      function that is cached on disk.
+    * "numpy": As "levelized", but all cells of the same type in a level are evaluated
+      with one vectorized NumPy operation, for large netlists (requires numpy).
+
+    A verilog file is synthesized with the synthesis 'profile', see SYNTHESIS_PROFILES.
+    The word-level cells ("word-level" profile) are simulated by the "event" engine.
+    """
+
+    ENGINES = ["event", "levelized", "compiled", "numpy"]
+    CORE_ENGINES = {
+        "levelized": YosysLevelizedCore,
+        "compiled": YosysCompiledCore,
+        "numpy": YosysNumpyCore,
+    }
+
+    def __init__(self, circuit, path=None, name=None, nets=True, profile="faithful"):
         super().__init__(circuit, name)
         self._circuit = circuit
         self._path = str(path)
+        self._profile = profile
         self._gates_comp = None
         self._net_comp = None
         self._netlist_module = None
         self._netlist_nets = None
+        self._engine = None
         self._setup_base()
 
         if nets:
@@ -92,10 +121,20 @@ class YosysComponent(MultiComponent):
         for cellname, cell in self._netlist_module.cells.items():
             if cell.type == "$scopeinfo":
                 continue
-            component_class = getattr(
-                digsim.circuit.components._yosys_atoms, cell.component_type()
-            )
-            component = component_class(self._circuit, name=cell.component_name(cellname))
+            if cell.is_word_level:
+                component_class = getattr(
+                    digsim.circuit.components._yosys_word_atoms, cell.component_type(), None
+                )
+                if component_class is None:
+                    raise YosysComponentException(f"Unsupported yosys cell type '{cell.type}'")
+                component = component_class(
+                    self._circuit, cell, name=cell.component_name(cellname)
+                )
+            else:
+                component_class = getattr(
+                    digsim.circuit.components._yosys_atoms, cell.component_type()
+                )
+                component = component_class(self._circuit, name=cell.component_name(cellname))
             self._gates_comp.add(component)
             components_dict[cellname] = component
 
@@ -108,20 +147,49 @@ class YosysComponent(MultiComponent):
 
         return components_dict
 
-    def _connect_sinks(self, components_dict, src_comp_port, sinks):
-        """Connect a source port to multiple sinks"""
+    @staticmethod
+    def _cell_port(component, net_port):
+        """Get the cell component port (or port bit, for word-level cells) for a net"""
+        port = component.port(net_port.name)
+        if port.width > 1:
+            return port.get_bit(net_port.bit_index)
+        return port
+
+    def _connect_words(self, components_dict):
+        """
+        Connect the word-level cell outputs to the cell inputs with the same bits (nets),
+        the value is then propagated as one word instead of bit by bit.
+        Return the connected cell inputs as (cell name, port name)
+        """
+        output_words = {}
+        for cellname, cell in self._netlist_module.cells.items():
+            for portname, bits in cell.connections.items():
+                if len(bits) > 1 and cell.port_directions[portname] == "output":
+                    output_words[tuple(bits)] = components_dict[cellname].port(portname)
+        word_inputs = set()
+        for cellname, cell in self._netlist_module.cells.items():
+            for portname, bits in cell.connections.items():
+                src_port = output_words.get(tuple(bits))
+                if src_port is not None and cell.port_directions[portname] == "input":
+                    src_port.wire = components_dict[cellname].port(portname)
+                    word_inputs.add((cellname, portname))
+        return word_inputs
+
+    def _connect_sinks(self, components_dict, src_comp_port, sinks, word_inputs=frozenset()):
+        """Connect a source port to multiple sinks, except the cell inputs connected as words"""
         for sink_port in sinks:
             if isinstance(sink_port.parent, YosysModule):
                 # Connect cell output to module top
                 dst_port = self.port(sink_port.name).get_bit(sink_port.bit_index)
                 src_comp_port.wire = dst_port
-            else:
+            elif (sink_port.parent_name, sink_port.name) not in word_inputs:
                 # Connect cell output to cell input
                 dst_comp = components_dict[sink_port.parent_name]
-                src_comp_port.wire = dst_comp.port(sink_port.name)
+                src_comp_port.wire = self._cell_port(dst_comp, sink_port)
 
     def _connect_cells(self, components_dict):
         """Connect all cells"""
+        word_inputs = self._connect_words(components_dict)
         for net, source in self._netlist_nets.source.items():
             if isinstance(source.parent, YosysModule):
                 # Only connect cells here
@@ -129,7 +197,10 @@ class YosysComponent(MultiComponent):
             if isinstance(source.parent, YosysCell):
                 src_comp = components_dict[source.parent_name]
                 self._connect_sinks(
-                    components_dict, src_comp.port(source.name), self._netlist_nets.sinks[net]
+                    components_dict,
+                    self._cell_port(src_comp, source),
+                    self._netlist_nets.sinks.get(net, []),
+                    word_inputs,
                 )
 
         gnd_sinks = self._netlist_nets.sinks.get("0", [])
@@ -140,7 +211,7 @@ class YosysComponent(MultiComponent):
     def _connect_external_input_port(self, components_dict, portname, port_dict):
         """Connect external input port"""
         for bit_idx, net in enumerate(port_dict.bits):
-            for sink_port in self._netlist_nets.sinks[net]:
+            for sink_port in self._netlist_nets.sinks.get(net, []):
                 if isinstance(sink_port.parent, YosysModule):
                     # Connect module input to module output
                     dst_port = self.port(sink_port.name).get_bit(sink_port.bit_index)
@@ -158,8 +229,37 @@ class YosysComponent(MultiComponent):
                 continue
             self._connect_external_input_port(components_dict, portname, port_dict)
 
+    @property
+    def engine(self) -> str | None:
+        """Get the simulation engine used for this component"""
+        return self._engine
+
+    def _create_core_component(self, core_class) -> bool:
+        """Create levelized/compiled/numpy component, return False if it cannot be levelized"""
+        try:
+            core = core_class(self._circuit, self._netlist_module)
+        except YosysLevelizeException:
+            return False
+        self._gates_comp.add(core)
+        for portname, port_dict in self._netlist_module.ports.items():
+            if port_dict.is_output:
+                core.port(portname).wire = self.port(portname)
+            else:
+                self.port(portname).wire = core.port(portname)
+        return True
+
     def _create_component(self):
         """Create yosys component"""
+        engine = self._circuit.yosys_engine
+        if engine not in self.ENGINES:
+            raise YosysComponentException(f"Unknown yosys engine '{engine}'")
+        if engine == "numpy" and not numpy_available():
+            raise YosysComponentException("The 'numpy' yosys engine requires numpy")
+        core_class = self.CORE_ENGINES.get(engine)
+        if core_class is not None and self._create_core_component(core_class):
+            self._engine = engine
+            return
+        self._engine = "event"
         # Create cells
         components_dict = self._create_cells()
         # Connect cells
@@ -175,7 +275,7 @@ class YosysComponent(MultiComponent):
         else:
             raise YosysComponentException("Current only one module per verilog file is supported")
 
-        synthesis = Synthesis(self._path, toplevel)
+        synthesis = Synthesis(self._path, toplevel, profile=self._profile)
         return synthesis.synth_to_dict(silent=True)
 
     def _load_netlist_dict(self):
@@ -209,17 +309,19 @@ class YosysComponent(MultiComponent):
     def _disconnect_external_ports(self):
         """Disconnect external ports before reload"""
         for port in self.inports():
+            port.remove_wires()
             for bit_id in range(port.width):
                 bit_port = port.get_bit(bit_id)
                 bit_port.remove_wires()
         for port in self.outports():
+            port.set_driver(None)
             for bit_id in range(port.width):
                 bit_port = port.get_bit(bit_id)
                 bit_port.set_driver(None)
 
     def settings_to_dict(self):
         path = self.circuit.store_path(self._path)
-        return {"path": path}
+        return {"path": path, "profile": self._profile}
 
     @classmethod
     def get_parameters(cls):
@@ -228,5 +330,11 @@ class YosysComponent(MultiComponent):
                 "type": "path",
                 "fileinfo": "Yosys JSON Netlist (*.json);;Verilog File (*.v)",
                 "description": "Select verilog file or Yosys json netlist",
-            }
+            },
+            "profile": {
+                "type": "list",
+                "items": list(SYNTHESIS_PROFILES),
+                "default": "faithful",
+                "description": "Synthesis profile (verilog file)",
+            },
         }
@@ -0,0 +1,537 @@
+# Copyright (c) Fredrik Andersson, 2023-2025
+# All rights reserved
+
+"""
+Module with a levelized (cycle based) simulation engine for yosys netlists
+
+The combinational cells are sorted in level order once and are evaluated
+in that order when their inputs change. All flip-flops are updated at once
+on a clock edge, so no delta cycle events are needed inside the netlist.
+
+The cell functions are implemented from the yosys atom components,
+(and the specification in https://github.com/YosysHQ/yosys/blob/master/techlibs/common/simcells.v)
+including the handling of "X" values.
+"""
+
+from __future__ import annotations
+
+import heapq
+from typing import Callable
+
+from digsim.utils import YosysModule
+
+from .atoms import VALUE_TYPE, Component, DigsimException, PortIn, PortOutDelta
+
+
+class YosysLevelizeException(DigsimException):
+    """Exception for netlists that cannot be simulated by the levelized engine"""
+
+
+def _buf(a):
+    return lambda v: v[a]
+
+
+def _not(a):
+    return lambda v: 0 if v[a] == 1 else 1
+
+
+def _and(a, b):
+    return lambda v: 1 if v[a] == 1 and v[b] == 1 else 0
+
+
+def _nand(a, b):
+    return lambda v: 0 if v[a] == 1 and v[b] == 1 else 1
+
+
+def _or(a, b):
+    return lambda v: 1 if v[a] == 1 or v[b] == 1 else 0
+
+
+def _nor(a, b):
+    return lambda v: 0 if v[a] == 1 or v[b] == 1 else 1
+
+
+def _xor(a, b):
+    return lambda v: 1 if (v[a] == 1 and v[b] == 0) or (v[a] == 0 and v[b] == 1) else 0
+
+
+def _xnor(a, b):
+    return lambda v: 0 if (v[a] == 1 and v[b] == 0) or (v[a] == 0 and v[b] == 1) else 1
+
+
+def _andnot(a, b):
+    return lambda v: 1 if v[a] == 1 and v[b] == 0 else 0
+
+
+def _ornot(a, b):
+    return lambda v: 1 if v[a] == 1 or v[b] == 0 else 0
+
+
+def _mux(a, b, s):
+    return lambda v: v[a] if v[s] == 0 else v[b]
+
+
+def _nmux(a, b, s):
+    return lambda v: (1 if v[a] == 0 else 0) if v[s] == 0 else (1 if v[b] == 0 else 0)
+
+
+def _aoi3(a, b, c):
+    return lambda v: 0 if (v[a] == 1 and v[b] == 1) or v[c] == 1 else 1
+
+
+def _oai3(a, b, c):
+    return lambda v: 0 if (v[a] == 1 or v[b] == 1) and v[c] == 1 else 1
+
+
+def _aoi4(a, b, c, d):
+    return lambda v: 0 if (v[a] == 1 and v[b] == 1) or (v[c] == 1 and v[d] == 1) else 1
+
+
+def _oai4(a, b, c, d):
+    return lambda v: 0 if (v[a] == 1 or v[b] == 1) and (v[c] == 1 or v[d] == 1) else 1
+
+
+def _muxn(select_bits):
+    """Create a _MUX4_/_MUX8_/_MUX16_ function, an "X" select will select the last input"""
+
+    def create(*nets):
+        data = nets[: 1 << select_bits]
+        select = nets[1 << select_bits :]
+
+        def evaluate(v):
+            select_index = 0
+            for bit, net in enumerate(select):
+                level = v[net]
+                if level == 1:
+                    select_index |= 1 << bit
+                elif level != 0:
+                    return v[data[-1]]
+            return v[data[select_index]]
+
+        return evaluate
+
+    return create
+
+
+# Cell type => (input port names, function factory), all combinational cells have output "Y"
+COMBINATIONAL_CELLS: dict[str, tuple[tuple[str, ...], Callable]] = {
+    "$_BUF_": (("A",), _buf),
+    "$_NOT_": (("A",), _not),
+    "$_AND_": (("A", "B"), _and),
+    "$_NAND_": (("A", "B"), _nand),
+    "$_OR_": (("A", "B"), _or),
+    "$_NOR_": (("A", "B"), _nor),
+    "$_XOR_": (("A", "B"), _xor),
+    "$_XNOR_": (("A", "B"), _xnor),
+    "$_ANDNOT_": (("A", "B"), _andnot),
+    "$_ORNOT_": (("A", "B"), _ornot),
+    "$_MUX_": (("A", "B", "S"), _mux),
+    "$_NMUX_": (("A", "B", "S"), _nmux),
+    "$_MUX4_": (tuple("ABCDST"), _muxn(2)),
+    "$_MUX8_": (tuple("ABCDEFGHSTU"), _muxn(3)),
+    "$_MUX16_": (tuple("ABCDEFGHIJKLMNOPSTUV"), _muxn(4)),
+    "$_AOI3_": (("A", "B", "C"), _aoi3),
+    "$_OAI3_": (("A", "B", "C"), _oai3),
+    "$_AOI4_": (("A", "B", "C", "D"), _aoi4),
+    "$_OAI4_": (("A", "B", "C", "D"), _oai4),
+}
+
+
+def _level(char: str) -> int:
+    """Convert a level character in a yosys cell name to a logic level"""
+    if char in ["N", "0"]:
+        return 0
+    if char in ["P", "1"]:
+        return 1
+    raise ValueError(f"Unknown value '{char}'")
+
+
+class SequentialCell:
+    """
+    A flip-flop in the levelized netlist.
+    The parameters (clock edge, reset level...) are decoded from the yosys cell type,
+    for example '$_SDFFE_PN0P_' or '$_DFF_PP1_'.
+    """
+
+    # Cell kind => (parameter names, synchronous reset)
+    KINDS = {
+        ("DFF", 1): ("C", False),
+        ("DFF", 3): ("CRV", False),
+        ("DFFE", 2): ("CE", False),
+        ("DFFE", 4): ("CRVE", False),
+        ("SDFF", 3): ("CRV", True),
+        ("SDFFE", 4): ("CRVE", True),
+        ("SDFFCE", 4): ("CRVE", True),
+        ("DFFSR", 3): ("CSR", False),
+        ("DFFSRE", 4): ("CSRE", False),
+    }
+
+    def __init__(self, cell_type: str, connections: dict[str, int]):
+        _, kind, levels, _ = cell_type.split("_")
+        parameter_info = self.KINDS.get((kind, len(levels)))
+        if parameter_info is None:
+            raise YosysLevelizeException(f"Cell type '{cell_type}' is not supported")
+        parameter_names, sync_reset = parameter_info
+        parameters = {name: _level(char) for name, char in zip(parameter_names, levels)}
+
+        self.clock_net: int = connections["C"]
+        self.clock_edge: int = parameters["C"]
+        self.d_net: int = connections["D"]
+        self.q_net: int = connections["Q"]
+        self.enable_net: int | None = connections.get("E")
+        self.enable_level: int | None = parameters.get("E")
+        self.enable_first: bool = kind == "SDFFCE"
+        self.reset_net: int | None = connections.get("R")
+        self.reset_level: int | None = parameters.get("R")
+        self.reset_value: int = parameters.get("V", 0)
+        self.sync_reset: bool = sync_reset
+        self.set_net: int | None = connections.get("S")
+        self.set_level: int | None = parameters.get("S")
+
+    def control_nets(self) -> list[int]:
+        """Get the nets that can change the flip-flop state (clock and async set/reset)"""
+        nets = [self.clock_net]
+        if self.reset_net is not None and not self.sync_reset:
+            nets.append(self.reset_net)
+        if self.set_net is not None:
+            nets.append(self.set_net)
+        return nets
+
+    def sample(self, values: list[VALUE_TYPE]) -> VALUE_TYPE | None:
+        """
+        Get the flip-flop value for a clock edge, sampled from the current net values
+        Return None if the flip-flop should keep its value
+        """
+        if self.enable_first and values[self.enable_net] != self.enable_level:
+            return None
+        if self.sync_reset and values[self.reset_net] == self.reset_level:
+            return self.reset_value
+        if (
+            not self.enable_first
+            and self.enable_net is not None
+            and values[self.enable_net] != self.enable_level
+        ):
+            return None
+        return values[self.d_net]
+
+    def async_state(self, values: list[VALUE_TYPE]) -> VALUE_TYPE | None:
+        """
+        Get the flip-flop value from the asynchronous reset/set
+        Return None if no asynchronous reset/set is active
+        """
+        if (
+            self.reset_net is not None
+            and not self.sync_reset
+            and values[self.reset_net] == self.reset_level
+        ):
+            return self.reset_value
+        if self.set_net is not None and values[self.set_net] == self.set_level:
+            return 1
+        return None
+
+
+class LevelizedNetlist:
+    """
+    A yosys module prepared for levelized simulation.
+    The flip-flop clocks and asynchronous set/reset nets must be driven by module inputs
+    and the combinational logic must not have any loops.
+    """
+
+    def __init__(self, module: YosysModule):
+        self._net_index: dict[int, int] = {}
+        self._net_count: int = 0
+        self._constants: list[tuple[int, VALUE_TYPE]] = []
+        self._input_nets: dict[str, list[int]] = {}
+        self._output_nets: dict[str, list[int]] = {}
+        for portname, port in module.ports.items():
+            nets = [self._net(bit) for bit in port.bits]
+            if port.is_output:
+                self._output_nets[portname] = nets
+            else:
+                self._input_nets[portname] = nets
+        input_nets = {net for nets in self._input_nets.values() for net in nets}
+        constant_nets = {net for net, _ in self._constants}
+
+        combinational = []
+        self._sequential_cells: list[SequentialCell] = []
+        for cellname, cell in module.cells.items():
+            if cell.type == "$scopeinfo":
+                continue
+            if cell.is_word_level:
+                raise YosysLevelizeException(
+                    f"Word-level cell type '{cell.type}' is not supported"
+                )
+            connections = {port: self._net(bits[0]) for port, bits in cell.connections.items()}
+            if cell.type in COMBINATIONAL_CELLS:
+                combinational.append((cell.type, connections))
+                continue
+            try:
+                sequential_cell = SequentialCell(cell.type, connections)
+            except ValueError as exc:
+                raise YosysLevelizeException(f"Cell type '{cell.type}' is not supported") from exc
+            for net in sequential_cell.control_nets():
+                if net not in input_nets and net not in constant_nets:
+                    raise YosysLevelizeException(
+                        f"Cell '{cellname}' clock/set/reset is not driven by a module input"
+                    )
+            self._sequential_cells.append(sequential_cell)
+
+        self._values: list[VALUE_TYPE] = ["X"] * self._net_count
+        self._sensitivity: list[list[SequentialCell]] = [[] for _ in self._values]
+        for sequential_cell in self._sequential_cells:
+            for net in sequential_cell.control_nets():
+                self._sensitivity[net].append(sequential_cell)
+        self._levelize(combinational)
+
+    def _net(self, bit: int | str) -> int:
+        """Get the net index for a yosys net (bit), each constant bit gets its own index"""
+        if isinstance(bit, str):
+            index = self._net_count
+            self._net_count += 1
+            self._constants.append((index, "X" if bit in ["x", "X"] else int(bit)))
+            return index
+        index = self._net_index.get(bit)
+        if index is None:
+            index = self._net_count
+            self._net_count += 1
+            self._net_index[bit] = index
+        return index
+
+    def _levelize(self, combinational):
+        """Sort the combinational cells in level order"""
+        drivers: dict[int, int] = {}
+        for cell_id, (_, connections) in enumerate(combinational):
+            drivers[connections["Y"]] = cell_id
+
+        levels: list[int | None] = [None] * len(combinational)
+        for cell_id in range(len(combinational)):
+            # Iterative depth first search, a cell level is 1 + max(level of driving cells)
+            stack = [(cell_id, False)]
+            visiting = set()
+            while stack:
+                current_id, inputs_done = stack.pop()
+                if levels[current_id] is not None:
+                    continue
+                cell_type, connections = combinational[current_id]
+                input_cells = [
+                    drivers[connections[port]]
+                    for port in COMBINATIONAL_CELLS[cell_type][0]
+                    if connections[port] in drivers
+                ]
+                if inputs_done:
+                    visiting.discard(current_id)
+                    levels[current_id] = 1 + max(
+                        (levels[input_id] for input_id in input_cells), default=-1
+                    )
+                    continue
+                if current_id in visiting:
+                    raise YosysLevelizeException("Combinational loop in netlist")
+                visiting.add(current_id)
+                stack.append((current_id, True))
+                for input_id in input_cells:
+                    if levels[input_id] is None:
+                        if input_id in visiting:
+                            raise YosysLevelizeException("Combinational loop in netlist")
+                        stack.append((input_id, False))
+
+        order = sorted(range(len(combinational)), key=lambda cell_id: levels[cell_id])
+        self._levels: list[int] = [levels[cell_id] for cell_id in order]
+        self._cells: list[tuple[Callable, int]] = []
+        self._combinational_cells: list[tuple[str, list[int], int]] = []
+        self._fanout: list[list[int]] = [[] for _ in self._values]
+        for position, cell_id in enumerate(order):
+            cell_type, connections = combinational[cell_id]
+            input_ports, factory = COMBINATIONAL_CELLS[cell_type]
+            input_nets = [connections[port] for port in input_ports]
+            self._cells.append((factory(*input_nets), connections["Y"]))
+            self._combinational_cells.append((cell_type, input_nets, connections["Y"]))
+            for net in set(input_nets):
+                self._fanout[net].append(position)
+
+    @property
+    def levels(self) -> int:
+        """Get the number of combinational levels"""
+        return max(self._levels, default=-1) + 1
+
+    @property
+    def net_count(self) -> int:
+        """Get the number of nets"""
+        return self._net_count
+
+    @property
+    def constants(self) -> list[tuple[int, VALUE_TYPE]]:
+        """Get the constant nets as (net, value)"""
+        return self._constants
+
+    @property
+    def input_nets(self) -> dict[str, list[int]]:
+        """Get the nets for each module input port"""
+        return self._input_nets
+
+    @property
+    def output_nets(self) -> dict[str, list[int]]:
+        """Get the nets for each module output port"""
+        return self._output_nets
+
+    @property
+    def combinational_cells(self) -> list[tuple[str, list[int], int]]:
+        """Get the combinational cells in level order as (cell type, input nets, output net)"""
+        return self._combinational_cells
+
+    @property
+    def cell_levels(self) -> list[int]:
+        """Get the level of each combinational cell, in the combinational_cells order"""
+        return self._levels
+
+    @property
+    def sequential_cells(self) -> list[SequentialCell]:
+        """Get the flip-flops"""
+        return self._sequential_cells
+
+    def _propagate(self, changed_nets):
+        """Evaluate the combinational cells affected by the changed nets, in level order"""
+        values = self._values
+        cells = self._cells
+        fanout = self._fanout
+        queued = set()
+        queue = []
+        for net in changed_nets:
+            for position in fanout[net]:
+                if position not in queued:
+                    queued.add(position)
+                    queue.append(position)
+        heapq.heapify(queue)
+        while queue:
+            position = heapq.heappop(queue)
+            evaluate, out_net = cells[position]
+            value = evaluate(values)
+            if value == values[out_net]:
+                continue
+            values[out_net] = value
+            for fanout_position in fanout[out_net]:
+                if fanout_position not in queued:
+                    queued.add(fanout_position)
+                    heapq.heappush(queue, fanout_position)
+
+    def reset(self, input_values: dict[str, VALUE_TYPE] | None = None):
+        """
+        Set the default state, all flip-flops are 0 and all other nets are "X"
+        The optional input values are set without any clock edges
+        """
+        values = ["X"] * len(self._values)
+        self._values = values
+        changed_nets = []
+        for net, value in self._constants:
+            values[net] = value
+            changed_nets.append(net)
+        for portname, port_value in (input_values or {}).items():
+            for bit_id, net in enumerate(self._input_nets[portname]):
+                values[net] = "X" if port_value == "X" else (port_value >> bit_id) & 1
+                changed_nets.append(net)
+        for sequential_cell in self._sequential_cells:
+            value = sequential_cell.async_state(values)
+            values[sequential_cell.q_net] = 0 if value is None else value
+            changed_nets.append(sequential_cell.q_net)
+        self._propagate(changed_nets)
+
+    def set_inputs(self, input_values: dict[str, VALUE_TYPE]):
+        """
+        Set module input values and evaluate the netlist
+        The flip-flops sample their data inputs from the values before the input change
+        """
+        values = self._values
+        changed: dict[int, VALUE_TYPE] = {}
+        for portname, port_value in input_values.items():
+            for bit_id, net in enumerate(self._input_nets[portname]):
+                value = "X" if port_value == "X" else (port_value >> bit_id) & 1
+                if values[net] != value:
+                    changed[net] = value
+        if not changed:
+            return
+
+        triggered = []
+        for net, value in changed.items():
+            for sequential_cell in self._sensitivity[net]:
+                edge = net == sequential_cell.clock_net and value == sequential_cell.clock_edge
+                triggered.append(
+                    (sequential_cell, sequential_cell.sample(values) if edge else None)
+                )
+
+        for net, value in changed.items():
+            values[net] = value
+
+        changed_nets = list(changed.keys())
+        for sequential_cell, sampled_value in triggered:
+            value = sequential_cell.async_state(values)
+            if value is None:
+                value = sampled_value
+            if value is not None and value != values[sequential_cell.q_net]:
+                values[sequential_cell.q_net] = value
+                changed_nets.append(sequential_cell.q_net)
+        self._propagate(changed_nets)
+
+    def checkpoint_state(self) -> list[VALUE_TYPE]:
+        """Get a copy of the net values"""
+        return list(self._values)
+
+    def restore_state(self, state: list[VALUE_TYPE]):
+        """Restore the net values from checkpoint_state()"""
+        self._values = list(state)
+
+    def output_values(self) -> dict[str, VALUE_TYPE]:
+        """Get module output values"""
+        output_values = {}
+        for portname, nets in self._output_nets.items():
+            port_value = 0
+            for bit_id, net in enumerate(nets):
+                value = self._values[net]
+                if value == "X":
+                    port_value = "X"
+                    break
+                port_value |= value << bit_id
+            output_values[portname] = port_value
+        return output_values
+
+
+class YosysLevelizedCore(Component):
+    """
+    Component that simulates a yosys module with the levelized engine,
+    the component has one port per module port.
+    """
+
+    def __init__(self, circuit, module: YosysModule, name: str = "levelized"):
+        # Levelize before the component is added to the circuit
+        netlist = LevelizedNetlist(module)
+        super().__init__(circuit, name)
+        self._netlist = netlist
+        for portname, port in module.ports.items():
+            if port.is_output:
+                self.add_port(PortOutDelta(self, portname, width=len(port.bits)))
+            else:
+                self.add_port(PortIn(self, portname, width=len(port.bits)))
+
+    @property
+    def netlist(self) -> LevelizedNetlist:
+        """Get the levelized netlist"""
+        return self._netlist
+
+    def _update_outputs(self):
+        for portname, value in self._netlist.output_values().items():
+            self.port(portname).value = value
+
+    def _input_values(self) -> dict[str, VALUE_TYPE]:
+        return {port.name(): port.value for port in self.inports()}
+
+    def default_state(self):
+        self._netlist.reset(self._input_values())
+        self._update_outputs()
+
+    def checkpoint_state(self):
+        return self._netlist.checkpoint_state()
+
+    def restore_state(self, state):
+        self._netlist.restore_state(state)
+
+    def update(self):
+        self._netlist.set_inputs(self._input_values())
+        self._update_outputs()
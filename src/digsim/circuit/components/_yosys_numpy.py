@@ -0,0 +1,335 @@
+# Copyright (c) Fredrik Andersson, 2023-2025
+# All rights reserved
+
+"""
+Module with a NumPy simulation engine for large yosys netlists
+
+The levelized netlist is lowered to NumPy arrays (cell type, input nets, output net, level)
+and all cells of the same type in a level are evaluated with one vectorized operation.
+The net values are stored in an uint8 array where "X" is stored as 2.
+
+NumPy is an optional dependency, numpy_available() returns False if it is not installed.
+"""
+
+from __future__ import annotations
+
+from typing import Callable
+
+from digsim.utils import YosysModule
+
+from ._yosys_levelized import COMBINATIONAL_CELLS, LevelizedNetlist
+from .atoms import VALUE_TYPE, Component, PortIn, PortOutDelta
+
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+
+X_LEVEL = 2
+
+
+def numpy_available() -> bool:
+    """Return True if NumPy is installed"""
+    return np is not None
+
+
+def _muxn(inputs):
+    """_MUX4_/_MUX8_/_MUX16_, an "X" select will select the last input"""
+    select_bits = {6: 2, 11: 3, 20: 4}[len(inputs)]
+    data = np.stack(inputs[: 1 << select_bits])
+    select = inputs[1 << select_bits :]
+    index = np.zeros(data.shape[1], dtype=np.intp)
+    valid = np.ones(data.shape[1], dtype=bool)
+    for bit, select_values in enumerate(select):
+        index |= (select_values == 1).astype(np.intp) << bit
+        valid &= select_values != X_LEVEL
+    index = np.where(valid, index, data.shape[0] - 1)
+    return data[index, np.arange(data.shape[1])]
+
+
+# Cell type => vectorized function, the functions take a list of input value arrays
+_FUNCTIONS: dict[str, Callable] = {
+    "$_BUF_": lambda i: i[0],
+    "$_NOT_": lambda i: i[0] != 1,
+    "$_AND_": lambda i: (i[0] == 1) & (i[1] == 1),
+    "$_NAND_": lambda i: ~((i[0] == 1) & (i[1] == 1)),
+    "$_OR_": lambda i: (i[0] == 1) | (i[1] == 1),
+    "$_NOR_": lambda i: ~((i[0] == 1) | (i[1] == 1)),
+    "$_XOR_": lambda i: ((i[0] == 1) & (i[1] == 0)) | ((i[0] == 0) & (i[1] == 1)),
+    "$_XNOR_": lambda i: ~(((i[0] == 1) & (i[1] == 0)) | ((i[0] == 0) & (i[1] == 1))),
+    "$_ANDNOT_": lambda i: (i[0] == 1) & (i[1] == 0),
+    "$_ORNOT_": lambda i: (i[0] == 1) | (i[1] == 0),
+    "$_MUX_": lambda i: np.where(i[2] == 0, i[0], i[1]),
+    "$_NMUX_": lambda i: np.where(i[2] == 0, i[0] == 0, i[1] == 0),
+    "$_MUX4_": _muxn,
+    "$_MUX8_": _muxn,
+    "$_MUX16_": _muxn,
+    "$_AOI3_": lambda i: ~(((i[0] == 1) & (i[1] == 1)) | (i[2] == 1)),
+    "$_OAI3_": lambda i: ~(((i[0] == 1) | (i[1] == 1)) & (i[2] == 1)),
+    "$_AOI4_": lambda i: ~(((i[0] == 1) & (i[1] == 1)) | ((i[2] == 1) & (i[3] == 1))),
+    "$_OAI4_": lambda i: ~(((i[0] == 1) | (i[1] == 1)) & ((i[2] == 1) | (i[3] == 1))),
+}
+
+CELL_TYPE_CODES: dict[str, int] = {
+    cell_type: code for code, cell_type in enumerate(COMBINATIONAL_CELLS)
+}
+
+
+class NumpyNetlist:
+    """
+    A levelized netlist lowered to NumPy arrays.
+    Two extra nets with the constant values 0 and 1 are added after the netlist nets,
+    they are used for flip-flops without enable or set/reset.
+    """
+
+    def __init__(self, module: YosysModule):
+        netlist = LevelizedNetlist(module)
+        self._const0 = netlist.net_count
+        self._const1 = netlist.net_count + 1
+        self._net_count = netlist.net_count + 2
+        self._constants = netlist.constants + [(self._const0, 0), (self._const1, 1)]
+        self._input_nets = netlist.input_nets
+        self._output_nets = netlist.output_nets
+        self._input_index = np.array(
+            [net for nets in netlist.input_nets.values() for net in nets], dtype=np.intp
+        )
+        self._output_index = np.array(
+            [net for nets in netlist.output_nets.values() for net in nets], dtype=np.intp
+        )
+
+        # Combinational cells
+        cells = netlist.combinational_cells
+        max_inputs = max((len(input_nets) for _, input_nets, _ in cells), default=0)
+        self.cell_types = np.array(
+            [CELL_TYPE_CODES[cell_type] for cell_type, _, _ in cells], dtype=np.int8
+        )
+        self.cell_inputs = np.full((len(cells), max_inputs), self._const0, dtype=np.intp)
+        for cell_id, (_, input_nets, _) in enumerate(cells):
+            self.cell_inputs[cell_id, : len(input_nets)] = input_nets
+        self.cell_outputs = np.array([out_net for _, _, out_net in cells], dtype=np.intp)
+        self.cell_levels = np.array(netlist.cell_levels, dtype=np.intp)
+        self._plan = self._create_plan()
+
+        # Flip-flops
+        self._setup_flip_flops(netlist)
+        self._values = np.full(self._net_count, X_LEVEL, dtype=np.uint8)
+        self._q = np.zeros(len(self._q_net), dtype=np.uint8)
+        self._next_q = np.zeros(len(self._q_net), dtype=np.uint8)
+        self._clock_prev = np.full(len(self._q_net), X_LEVEL, dtype=np.uint8)
+
+    def _create_plan(self) -> list[tuple[Callable, np.ndarray, list[np.ndarray]]]:
+        """Create the evaluation plan, one step per (level, cell type)"""
+        plan = []
+        cell_type_names = list(COMBINATIONAL_CELLS)
+        for level in np.unique(self.cell_levels):
+            level_cells = self.cell_levels == level
+            for code in np.unique(self.cell_types[level_cells]):
+                cell_ids = np.flatnonzero(level_cells & (self.cell_types == code))
+                cell_type = cell_type_names[code]
+                input_count = len(COMBINATIONAL_CELLS[cell_type][0])
+                plan.append(
+                    (
+                        _FUNCTIONS[cell_type],
+                        self.cell_outputs[cell_ids],
+                        [self.cell_inputs[cell_ids, port] for port in range(input_count)],
+                    )
+                )
+        return plan
+
+    def _setup_flip_flops(self, netlist: LevelizedNetlist):
+        constant_nets = {net for net, _ in netlist.constants}
+        const0, const1 = self._const0, self._const1
+        fields = {
+            name: []
+            for name in [
+                "clock_net",
+                "clock_edge",
+                "d_net",
+                "q_net",
+                "enable_net",
+                "enable_level",
+                "enable_first",
+                "sync_reset_net",
+                "sync_reset_level",
+                "reset_value",
+                "async_reset_net",
+                "async_reset_level",
+                "set_net",
+                "set_level",
+            ]
+        }
+        for sequential_cell in netlist.sequential_cells:
+            if sequential_cell.clock_net in constant_nets:
+                # A constant clock will never have an edge
+                fields["clock_net"].append(const0)
+                fields["clock_edge"].append(1)
+            else:
+                fields["clock_net"].append(sequential_cell.clock_net)
+                fields["clock_edge"].append(sequential_cell.clock_edge)
+            fields["d_net"].append(sequential_cell.d_net)
+            fields["q_net"].append(sequential_cell.q_net)
+            if sequential_cell.enable_net is None:
+                fields["enable_net"].append(const1)
+                fields["enable_level"].append(1)
+            else:
+                fields["enable_net"].append(sequential_cell.enable_net)
+                fields["enable_level"].append(sequential_cell.enable_level)
+            fields["enable_first"].append(sequential_cell.enable_first)
+            fields["reset_value"].append(sequential_cell.reset_value)
+            has_reset = sequential_cell.reset_net is not None
+            sync_reset = has_reset and sequential_cell.sync_reset
+            async_reset = has_reset and not sequential_cell.sync_reset
+            fields["sync_reset_net"].append(sequential_cell.reset_net if sync_reset else const0)
+            fields["sync_reset_level"].append(sequential_cell.reset_level if sync_reset else 1)
+            fields["async_reset_net"].append(sequential_cell.reset_net if async_reset else const0)
+            fields["async_reset_level"].append(sequential_cell.reset_level if async_reset else 1)
+            has_set = sequential_cell.set_net is not None
+            fields["set_net"].append(sequential_cell.set_net if has_set else const0)
+            fields["set_level"].append(sequential_cell.set_level if has_set else 1)
+
+        for name, values in fields.items():
+            dtype = (
+                bool if name == "enable_first" else (np.uint8 if "net" not in name else np.intp)
+            )
+            setattr(self, f"_{name}", np.array(values, dtype=dtype))
+
+    @property
+    def levels(self) -> int:
+        """Get the number of combinational levels"""
+        return len(np.unique(self.cell_levels))
+
+    def _input_bits(self, input_values: dict[str, VALUE_TYPE]) -> list[int]:
+        bits = []
+        for portname, nets in self._input_nets.items():
+            port_value = input_values[portname]
+            if port_value == "X":
+                bits.extend([X_LEVEL] * len(nets))
+            else:
+                bits.extend((port_value >> bit_id) & 1 for bit_id in range(len(nets)))
+        return bits
+
+    def _evaluate(self):
+        values = self._values
+        for function, out_nets, in_nets in self._plan:
+            values[out_nets] = function([values[nets] for nets in in_nets])
+
+    def step(self, input_values: dict[str, VALUE_TYPE]):
+        """
+        Set module input values and evaluate the netlist
+        The flip-flops take the values sampled in the previous step on a clock edge
+        """
+        values = self._values
+        values[self._input_index] = self._input_bits(input_values)
+
+        # Clock edges
+        clock = values[self._clock_net]
+        edge = (clock == self._clock_edge) & (self._clock_prev != self._clock_edge)
+        self._clock_prev = clock
+        q = np.where(edge, self._next_q, self._q)
+        # Asynchronous reset/set
+        q = np.where(
+            values[self._async_reset_net] == self._async_reset_level,
+            self._reset_value,
+            np.where(values[self._set_net] == self._set_level, 1, q),
+        ).astype(np.uint8)
+        self._q = q
+        values[self._q_net] = q
+
+        self._evaluate()
+
+        # Flip-flop values at the next clock edge
+        enable = values[self._enable_net] == self._enable_level
+        sync_reset = values[self._sync_reset_net] == self._sync_reset_level
+        self._next_q = np.where(
+            self._enable_first & ~enable,
+            q,
+            np.where(sync_reset, self._reset_value, np.where(enable, values[self._d_net], q)),
+        ).astype(np.uint8)
+
+    def reset(self, input_values: dict[str, VALUE_TYPE]):
+        """
+        Set the default state, all flip-flops are 0 and all other nets are "X"
+        The input values are set without any clock edges
+        """
+        self._values = np.full(self._net_count, X_LEVEL, dtype=np.uint8)
+        for net, value in self._constants:
+            self._values[net] = X_LEVEL if value == "X" else value
+        self._clock_prev = np.full(len(self._q_net), X_LEVEL, dtype=np.uint8)
+        self._next_q = np.zeros(len(self._q_net), dtype=np.uint8)
+        # The first step sets the clock values, the flip-flops are reset after any clock edge
+        self._q = np.zeros(len(self._q_net), dtype=np.uint8)
+        self.step(input_values)
+        self._q = np.zeros(len(self._q_net), dtype=np.uint8)
+        self.step(input_values)
+
+    def checkpoint_state(self) -> tuple[np.ndarray, ...]:
+        """Get a copy of the net values and the flip-flop state"""
+        return tuple(
+            array.copy() for array in (self._values, self._q, self._next_q, self._clock_prev)
+        )
+
+    def restore_state(self, state: tuple[np.ndarray, ...]):
+        """Restore the net values and the flip-flop state from checkpoint_state()"""
+        self._values, self._q, self._next_q, self._clock_prev = (array.copy() for array in state)
+
+    def output_values(self) -> dict[str, VALUE_TYPE]:
+        """Get module output values"""
+        bits = self._values[self._output_index].tolist()
+        output_values = {}
+        offset = 0
+        for portname, nets in self._output_nets.items():
+            port_bits = bits[offset : offset + len(nets)]
+            offset += len(nets)
+            if X_LEVEL in port_bits:
+                output_values[portname] = "X"
+            else:
+                output_values[portname] = sum(
+                    bit << bit_id for bit_id, bit in enumerate(port_bits)
+                )
+        return output_values
+
+
+class YosysNumpyCore(Component):
+    """
+    Component that simulates a yosys module with the NumPy engine,
+    the component has one port per module port.
+    """
+
+    def __init__(self, circuit, module: YosysModule, name: str = "numpy"):
+        # Lower the netlist before the component is added to the circuit
+        netlist = NumpyNetlist(module)
+        super().__init__(circuit, name)
+        self._netlist = netlist
+        for portname, port in module.ports.items():
+            if port.is_output:
+                self.add_port(PortOutDelta(self, portname, width=len(port.bits)))
+            else:
+                self.add_port(PortIn(self, portname, width=len(port.bits)))
+
+    @property
+    def netlist(self) -> NumpyNetlist:
+        """Get the NumPy netlist"""
+        return self._netlist
+
+    def _input_values(self) -> dict[str, VALUE_TYPE]:
+        return {port.name(): port.value for port in self.inports()}
+
+    def _update_outputs(self):
+        for portname, value in self._netlist.output_values().items():
+            self.port(portname).value = value
+
+    def default_state(self):
+        self._netlist.reset(self._input_values())
+        self._update_outputs()
+
+    def checkpoint_state(self):
+        return self._netlist.checkpoint_state()
+
+    def restore_state(self, state):
+        self._netlist.restore_state(state)
+
+    def update(self):
+        self._netlist.step(self._input_values())
+        self._update_outputs()
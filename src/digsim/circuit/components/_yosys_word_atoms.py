@@ -0,0 +1,539 @@
+# Copyright (c) Fredrik Andersson, 2023-2025
+# All rights reserved
+
+"""
+Module with word-level yosys atom component classes
+
+The word-level (coarse-grain) cells operate on multi-bit ports, one integer operation
+replaces the gate-level netlist of the cell. An "X" input (bit) is read as 0,
+as in the gate-level atoms where an "X" input gives a 0/1 output.
+
+All components are implemented from the specification in:
+https://github.com/YosysHQ/yosys/blob/master/techlibs/common/simlib.v
+"""
+
+import abc
+
+from digsim.utils import YosysCell
+
+from .atoms import Component, PortIn, PortMultiBitIn, PortMultiBitOutDelta, PortOutDelta, PortWire
+
+
+def cell_parameter(cell: YosysCell, name: str, default: int = 0) -> int:
+    """Get an integer cell parameter, the yosys json parameters are binary strings"""
+    value = cell.parameters.get(name, default)
+    if isinstance(value, str):
+        # Undefined ("x") bits are 0
+        return int(value.replace("x", "0").replace("X", "0") or "0", 2)
+    return int(value)
+
+
+def to_signed(value: int, width: int) -> int:
+    """Convert an unsigned word to a signed integer"""
+    if value >> (width - 1) & 1:
+        return value - (1 << width)
+    return value
+
+
+class WordCellComponent(Component):
+    """
+    Base class for the word-level cells,
+    the port widths are the widths of the cell connections
+    """
+
+    def __init__(self, circuit, cell: YosysCell, name=None):
+        super().__init__(circuit, name)
+        self._cell = cell
+
+    def port_width(self, port_name: str) -> int:
+        """Get the width of a cell port"""
+        return len(self._cell.connections[port_name])
+
+    def add_input(self, port_name: str, update_parent: bool = True):
+        """Add an input port, the component is updated on change if update_parent is True"""
+        width = self.port_width(port_name)
+        if width > 1:
+            self.add_port(PortMultiBitIn(self, port_name, width, update_parent))
+        elif update_parent:
+            self.add_port(PortIn(self, port_name))
+        else:
+            self.add_port(PortWire(self, port_name))
+
+    @staticmethod
+    def input_value(port) -> int:
+        """Get the value of an input port, "X" is read as 0"""
+        value = port.value
+        return 0 if value == "X" else value
+
+    def add_output(self, port_name: str):
+        """Add an output port"""
+        width = self.port_width(port_name)
+        if width > 1:
+            self.add_port(PortMultiBitOutDelta(self, port_name, width))
+        else:
+            self.add_port(PortOutDelta(self, port_name))
+
+
+class UnaryCellComponent(WordCellComponent):
+    """Word-level cell with one operand, module (A, Y)"""
+
+    def __init__(self, circuit, cell: YosysCell, name=None):
+        super().__init__(circuit, cell, name)
+        self.add_input("A")
+        self.add_output("Y")
+        self._a_width = self.port_width("A")
+        self._a_mask = (1 << self._a_width) - 1
+        self._a_signed = cell_parameter(cell, "A_SIGNED") == 1
+        self._y_mask = (1 << self.port_width("Y")) - 1
+
+    @abc.abstractmethod
+    def operation(self, a: int) -> int:
+        """The cell operation, 'a' is a signed integer if A_SIGNED"""
+
+    def update(self):
+        a = self.input_value(self.A)
+        if self._a_signed:
+            a = to_signed(a, self._a_width)
+        self.Y.value = self.operation(a) & self._y_mask
+
+
+class BinaryCellComponent(WordCellComponent):
+    """Word-level cell with two operands, module (A, B, Y)"""
+
+    def __init__(self, circuit, cell: YosysCell, name=None):
+        super().__init__(circuit, cell, name)
+        self.add_input("A")
+        self.add_input("B")
+        self.add_output("Y")
+        self._a_width = self.port_width("A")
+        self._b_width = self.port_width("B")
+        self._a_signed = cell_parameter(cell, "A_SIGNED") == 1
+        self._b_signed = cell_parameter(cell, "B_SIGNED") == 1
+        self._y_width = self.port_width("Y")
+        self._y_mask = (1 << self._y_width) - 1
+        self._shift_limit = max(self._a_width, self._y_width)
+
+    def operands(self, a: int, b: int) -> tuple[int, int]:
+        """Get the operands, signed integers if both A_SIGNED and B_SIGNED"""
+        if self._a_signed and self._b_signed:
+            return to_signed(a, self._a_width), to_signed(b, self._b_width)
+        return a, b
+
+    def shift_operand(self, a: int) -> int:
+        """Get the shifted operand, extended (by A_SIGNED) to the max of the A and Y width"""
+        if not self._a_signed:
+            return a
+        width = max(self._a_width, self._y_width)
+        return to_signed(a, self._a_width) & ((1 << width) - 1)
+
+    def shift_amount(self, b: int) -> int:
+        """
+        Get the shift amount, limited to the max of the A and Y width,
+        all bits are shifted out at the limit (a huge shift would allocate a huge integer)
+        """
+        return min(b, self._shift_limit)
+
+    @abc.abstractmethod
+    def operation(self, a: int, b: int) -> int:
+        """The cell operation, 'a' and 'b' are the unsigned port values"""
+
+    def update(self):
+        y = self.operation(self.input_value(self.A), self.input_value(self.B))
+        self.Y.value = y & self._y_mask
+
+
+class _not(UnaryCellComponent):
+    r"""module \$not (A, Y)"""
+
+    def operation(self, a):
+        return ~a
+
+
+class _pos(UnaryCellComponent):
+    r"""module \$pos (A, Y)"""
+
+    def operation(self, a):
+        return a
+
+
+class _neg(UnaryCellComponent):
+    r"""module \$neg (A, Y)"""
+
+    def operation(self, a):
+        return -a
+
+
+class _reduce_and(UnaryCellComponent):
+    r"""module \$reduce_and (A, Y)"""
+
+    def operation(self, a):
+        return 1 if a & self._a_mask == self._a_mask else 0
+
+
+class _reduce_or(UnaryCellComponent):
+    r"""module \$reduce_or (A, Y)"""
+
+    def operation(self, a):
+        return 1 if a & self._a_mask else 0
+
+
+class _reduce_xor(UnaryCellComponent):
+    r"""module \$reduce_xor (A, Y)"""
+
+    def operation(self, a):
+        return (a & self._a_mask).bit_count() & 1
+
+
+class _reduce_xnor(UnaryCellComponent):
+    r"""module \$reduce_xnor (A, Y)"""
+
+    def operation(self, a):
+        return 1 - ((a & self._a_mask).bit_count() & 1)
+
+
+class _reduce_bool(_reduce_or):
+    r"""module \$reduce_bool (A, Y)"""
+
+
+class _logic_not(UnaryCellComponent):
+    r"""module \$logic_not (A, Y)"""
+
+    def operation(self, a):
+        return 0 if a & self._a_mask else 1
+
+
+class _and(BinaryCellComponent):
+    r"""module \$and (A, B, Y)"""
+
+    def operation(self, a, b):
+        a, b = self.operands(a, b)
+        return a & b
+
+
+class _or(BinaryCellComponent):
+    r"""module \$or (A, B, Y)"""
+
+    def operation(self, a, b):
+        a, b = self.operands(a, b)
+        return a | b
+
+
+class _xor(BinaryCellComponent):
+    r"""module \$xor (A, B, Y)"""
+
+    def operation(self, a, b):
+        a, b = self.operands(a, b)
+        return a ^ b
+
+
+class _xnor(BinaryCellComponent):
+    r"""module \$xnor (A, B, Y)"""
+
+    def operation(self, a, b):
+        a, b = self.operands(a, b)
+        return ~(a ^ b)
+
+
+class _logic_and(BinaryCellComponent):
+    r"""module \$logic_and (A, B, Y)"""
+
+    def operation(self, a, b):
+        return 1 if a and b else 0
+
+
+class _logic_or(BinaryCellComponent):
+    r"""module \$logic_or (A, B, Y)"""
+
+    def operation(self, a, b):
+        return 1 if a or b else 0
+
+
+class _shl(BinaryCellComponent):
+    r"""module \$shl (A, B, Y)"""
+
+    def operation(self, a, b):
+        return self.shift_operand(a) << self.shift_amount(b)
+
+
+class _sshl(_shl):
+    r"""module \$sshl (A, B, Y)"""
+
+
+class _shr(BinaryCellComponent):
+    r"""module \$shr (A, B, Y)"""
+
+    def operation(self, a, b):
+        return self.shift_operand(a) >> self.shift_amount(b)
+
+
+class _sshr(BinaryCellComponent):
+    r"""module \$sshr (A, B, Y)"""
+
+    def operation(self, a, b):
+        if self._a_signed:
+            return to_signed(a, self._a_width) >> self.shift_amount(b)
+        return a >> self.shift_amount(b)
+
+
+class _shift(BinaryCellComponent):
+    r"""module \$shift (A, B, Y)"""
+
+    def operation(self, a, b):
+        a = self.shift_operand(a)
+        if self._b_signed:
+            b = to_signed(b, self._b_width)
+        if b < 0:
+            return a << self.shift_amount(-b)
+        return a >> self.shift_amount(b)
+
+
+class _shiftx(BinaryCellComponent):
+    r"""module \$shiftx (A, B, Y), the ("X") bits outside of A are read as 0"""
+
+    def operation(self, a, b):
+        if self._b_signed:
+            b = to_signed(b, self._b_width)
+        if b < 0:
+            return a << self.shift_amount(-b)
+        return a >> self.shift_amount(b)
+
+
+class _lt(BinaryCellComponent):
+    r"""module \$lt (A, B, Y)"""
+
+    def operation(self, a, b):
+        a, b = self.operands(a, b)
+        return 1 if a < b else 0
+
+
+class _le(BinaryCellComponent):
+    r"""module \$le (A, B, Y)"""
+
+    def operation(self, a, b):
+        a, b = self.operands(a, b)
+        return 1 if a <= b else 0
+
+
+class _eq(BinaryCellComponent):
+    r"""module \$eq (A, B, Y)"""
+
+    def operation(self, a, b):
+        a, b = self.operands(a, b)
+        return 1 if a == b else 0
+
+
+class _ne(BinaryCellComponent):
+    r"""module \$ne (A, B, Y)"""
+
+    def operation(self, a, b):
+        a, b = self.operands(a, b)
+        return 1 if a != b else 0
+
+
+class _ge(BinaryCellComponent):
+    r"""module \$ge (A, B, Y)"""
+
+    def operation(self, a, b):
+        a, b = self.operands(a, b)
+        return 1 if a >= b else 0
+
+
+class _gt(BinaryCellComponent):
+    r"""module \$gt (A, B, Y)"""
+
+    def operation(self, a, b):
+        a, b = self.operands(a, b)
+        return 1 if a > b else 0
+
+
+class _add(BinaryCellComponent):
+    r"""module \$add (A, B, Y)"""
+
+    def operation(self, a, b):
+        a, b = self.operands(a, b)
+        return a + b
+
+
+class _sub(BinaryCellComponent):
+    r"""module \$sub (A, B, Y)"""
+
+    def operation(self, a, b):
+        a, b = self.operands(a, b)
+        return a - b
+
+
+class _mul(BinaryCellComponent):
+    r"""module \$mul (A, B, Y)"""
+
+    def operation(self, a, b):
+        a, b = self.operands(a, b)
+        return a * b
+
+
+class _mux(WordCellComponent):
+    r"""module \$mux (A, B, S, Y)"""
+
+    def __init__(self, circuit, cell: YosysCell, name=None):
+        super().__init__(circuit, cell, name)
+        self.add_input("A")
+        self.add_input("B")
+        self.add_input("S")
+        self.add_output("Y")
+
+    def update(self):
+        if self.input_value(self.S) == 0:
+            self.Y.value = self.A.value
+        else:
+            self.Y.value = self.B.value
+
+
+class _pmux(WordCellComponent):
+    r"""
+    module \$pmux (A, B, S, Y),
+    the selected B words are or:ed if more than one S bit is set (as the yosys techmap)
+    """
+
+    def __init__(self, circuit, cell: YosysCell, name=None):
+        super().__init__(circuit, cell, name)
+        self.add_input("A")
+        self.add_input("B")
+        self.add_input("S")
+        self.add_output("Y")
+        self._width = self.port_width("A")
+        self._mask = (1 << self._width) - 1
+
+    def update(self):
+        select = self.input_value(self.S)
+        if select == 0:
+            self.Y.value = self.A.value
+            return
+        b = self.input_value(self.B)
+        y = 0
+        while select:
+            select_bit = select & -select
+            y |= b >> ((select_bit.bit_length() - 1) * self._width)
+            select ^= select_bit
+        self.Y.value = y & self._mask
+
+
+class FlipFlopCellComponent(WordCellComponent):
+    """
+    Word-level D-type flip-flop, module (CLK, [ARST], [SRST], [EN], D, Q),
+    the optional ports are selected by the class variables
+    """
+
+    ASYNC_RESET = False
+    SYNC_RESET = False
+    ENABLE = False
+    ENABLE_FIRST = False  # The enable has priority over the synchronous reset
+
+    def __init__(self, circuit, cell: YosysCell, name=None):
+        super().__init__(circuit, cell, name)
+        self._clock_edge = cell_parameter(cell, "CLK_POLARITY")
+        self.add_input("CLK")
+        if self.ASYNC_RESET:
+            self._arst_level = cell_parameter(cell, "ARST_POLARITY")
+            self._arst_value = cell_parameter(cell, "ARST_VALUE")
+            self.add_input("ARST")
+        if self.SYNC_RESET:
+            self._srst_level = cell_parameter(cell, "SRST_POLARITY")
+            self._srst_value = cell_parameter(cell, "SRST_VALUE")
+            self.add_input("SRST", update_parent=False)
+        if self.ENABLE:
+            self._enable_level = cell_parameter(cell, "EN_POLARITY")
+            self.add_input("EN", update_parent=False)
+        self.add_input("D", update_parent=False)
+        self.add_output("Q")
+        self._old_clk_level = self.CLK.value
+
+    def checkpoint_state(self):
+        # Store the previous clock level for edge detection
+        return self._old_clk_level
+
+    def restore_state(self, state):
+        self._old_clk_level = state
+
+    def default_state(self):
+        self.Q.value = 0
+
+    def _clock_edge_value(self):
+        """Get the value for a clock edge, None if the flip-flop should keep its value"""
+        enabled = not self.ENABLE or self.EN.value == self._enable_level
+        if self.ENABLE_FIRST and not enabled:
+            return None
+        if self.SYNC_RESET and self.SRST.value == self._srst_level:
+            return self._srst_value
+        if not enabled:
+            return None
+        return self.D.value
+
+    def update(self):
+        if self.ASYNC_RESET and self.ARST.value == self._arst_level:
+            self.Q.value = self._arst_value
+        elif self.CLK.value != self._old_clk_level and self.CLK.value == self._clock_edge:
+            value = self._clock_edge_value()
+            if value is not None:
+                self.Q.value = value
+        self._old_clk_level = self.CLK.value
+
+
+class _dff(FlipFlopCellComponent):
+    r"""module \$dff (CLK, D, Q)"""
+
+
+class _dffe(FlipFlopCellComponent):
+    r"""module \$dffe (CLK, EN, D, Q)"""
+
+    ENABLE = True
+
+
+class _adff(FlipFlopCellComponent):
+    r"""module \$adff (CLK, ARST, D, Q)"""
+
+    ASYNC_RESET = True
+
+
+class _adffe(FlipFlopCellComponent):
+    r"""module \$adffe (CLK, ARST, EN, D, Q)"""
+
+    ASYNC_RESET = True
+    ENABLE = True
+
+
+class _sdff(FlipFlopCellComponent):
+    r"""module \$sdff (CLK, SRST, D, Q)"""
+
+    SYNC_RESET = True
+
+
+class _sdffe(FlipFlopCellComponent):
+    r"""module \$sdffe (CLK, SRST, EN, D, Q)"""
+
+    SYNC_RESET = True
+    ENABLE = True
+
+
+class _sdffce(FlipFlopCellComponent):
+    r"""module \$sdffce (CLK, SRST, EN, D, Q)"""
+
+    SYNC_RESET = True
+    ENABLE = True
+    ENABLE_FIRST = True
+
+
+class _dlatch(WordCellComponent):
+    r"""module \$dlatch (EN, D, Q)"""
+
+    def __init__(self, circuit, cell: YosysCell, name=None):
+        super().__init__(circuit, cell, name)
+        self._enable_level = cell_parameter(cell, "EN_POLARITY")
+        self.add_input("EN")
+        self.add_input("D")
+        self.add_output("Q")
+
+    def default_state(self):
+        self.Q.value = 0
+
+    def update(self):
+        if self.EN.value == self._enable_level:
+            self.Q.value = self.D.value
@@ -15,9 +15,12 @@ from ._port import (  # noqa: F401
     Port,
     PortConnectionError,
     PortIn,
+    PortMultiBitIn,
+    PortMultiBitOutDelta,
     PortMultiBitWire,
     PortOutDelta,
     PortOutImmediate,
     PortWire,
     PortWireBit,
+    PortWireObserver,
 )
@@ -40,6 +40,16 @@ class Component(abc.ABC):
     def clear(self):
         """Remove static state within the component class"""
 
+    def checkpoint_state(self):
+        """
+        Get the internal state (not the port values) for a circuit checkpoint,
+        return None if the component has no internal state
+        """
+        return None
+
+    def restore_state(self, state):
+        """Restore the internal state from a circuit checkpoint"""
+
     def parameter_set(self, parameter: str, value: int | str | bool):
         """Set component parameter"""
         self._parameters[parameter] = value
@@ -156,6 +166,10 @@ class Component(abc.ABC):
     def update(self):
         """This function is called if a port change and that port should update its parent"""
 
+    def request_update(self):
+        """Request a component update, the circuit decides when 'update' is called"""
+        self._circuit.request_update(self)
+
     def remove_connections(self):
         """Remove component connections"""
         for src_port in self.outports():
@@ -170,6 +184,14 @@ class Component(abc.ABC):
         """Add delta cycle event"""
         self.circuit.add_event(port, value, delay_ns)
 
+    def has_pending_event(self, port: Port) -> bool:
+        """Return True if there is a pending delta cycle event for the port"""
+        return self.circuit.has_pending_event(port)
+
+    def trace_value(self, port: Port):
+        """Notify the circuit trace callbacks (for example waves) about a port value change"""
+        self.circuit.trace_value(port)
+
     def __str__(self):
         comp_str = f"{self.display_name()}"
         for port in self.inports():
@@ -6,7 +6,7 @@
 from __future__ import annotations
 
 import abc
-from typing import Literal, Optional, Union
+from typing import Callable, Literal, Optional, Union
 
 from ._digsim_exception import DigsimException
 
@@ -21,12 +21,17 @@ class PortConnectionError(DigsimException):
 class Port(abc.ABC):
     """The abstract base class for all ports"""
 
+    # A pass-through port only forwards its value to the wired ports
+    _pass_through: bool = False
+
     def __init__(self, parent, name: str, width: int = 1, output: bool = False):
         self._parent = parent  # The parent component
         self._name: str = name  # The name of this port
         self._width: int = width  # The bit-width of this port
         self._output: bool = output  # Is this port an output port
         self._wired_ports: list[Port] = []  # The ports that this port drives
+        self._net_ports: list[Port] | None = None  # Flattened pass-through ports (elaborated)
+        self._net_sinks: list[Port] | None = None  # Flattened sink ports (elaborated)
         self._value: VALUE_TYPE = "X"  # The value of this port
         self._edge_detect_value: VALUE_TYPE = "X"  # Last edge detect value
         self.init()  # Initialize the port
@@ -82,6 +87,7 @@ class Port(abc.ABC):
             raise PortConnectionError("Cannot connect ports with different widths")
         port.set_driver(self)
         self._wired_ports.append(port)
+        self.invalidate_net()
         port.value = self._value  # Update wires when port is connected
 
     def remove_wires(self):
@@ -89,6 +95,7 @@ class Port(abc.ABC):
         for port in self._wired_ports:
             port.set_driver(None)
         self._wired_ports = []
+        self.invalidate_net()
 
     def name(self) -> str:
         """Get port name"""
@@ -102,13 +109,49 @@ class Port(abc.ABC):
         """Get parent component"""
         return self._parent
 
+    def elaborate(self):
+        """
+        Resolve the wired ports to a flat list of pass-through ports (that only
+        observe the value) and a flat list of sink ports, in wire traversal order.
+        """
+        net_ports = []
+        net_sinks = []
+        processed_ports = {self}
+        ports_to_process = self._wired_ports[::-1]
+        while ports_to_process:
+            port = ports_to_process.pop()
+            if port in processed_ports:
+                continue
+            processed_ports.add(port)
+            if port._pass_through:
+                net_ports.append(port)
+                ports_to_process.extend(port.wired_ports[::-1])
+            else:
+                net_sinks.append(port)
+        self._net_ports = net_ports
+        self._net_sinks = net_sinks
+
+    def invalidate_net(self):
+        """Clear the elaborated net of this port and its drivers, called when wires change"""
+        port = self
+        processed_ports = set()
+        while port is not None and port not in processed_ports:
+            processed_ports.add(port)
+            port._net_ports = None
+            port._net_sinks = None
+            port = port.get_driver()
+
     def update_wires(self, value: VALUE_TYPE):
         """Update connected wires (and self._value) with value"""
         if self._value == value:
             return
         self._value = value
-        for port in self._wired_ports:
-            port.value = self._value
+        if self._net_sinks is None:
+            self.elaborate()
+        for port in self._net_ports:
+            port._value = value
+        for port in self._net_sinks:
+            port.set_value(value)
 
     def get_wired_ports_recursive(self, processed_ports: Optional[set] = None) -> list[Port]:
         """Get all connected ports (iterative), avoiding duplicates."""
@@ -157,6 +200,14 @@ class Port(abc.ABC):
         self._edge_detect_value = self.value
         return falling_edge
 
+    def checkpoint_state(self) -> tuple:
+        """Get the port value and the edge detect value for a circuit checkpoint"""
+        return self._value, self._edge_detect_value
+
+    def restore_state(self, state: tuple):
+        """Restore the port value and the edge detect value, the value is not propagated"""
+        self._value, self._edge_detect_value = state
+
     @abc.abstractmethod
     def set_value(self, value: VALUE_TYPE):
         """Set value on port"""
@@ -186,6 +237,7 @@ class Port(abc.ABC):
             index = self._wired_ports.index(port)
             del self._wired_ports[index]
         port.set_driver(None)
+        self.invalidate_net()
 
     def strval(self) -> str:
         """Return value as string"""
@@ -205,6 +257,8 @@ class PortWire(Port):
     * The port wire will instantaneously update the driven wires upon change.
     """
 
+    _pass_through = True
+
     def __init__(self, parent, name: str, width: int = 1, output: bool = False):
         super().__init__(parent, name, width, output)
         self._port_driver: Port | None = None  # The port that drives this port
@@ -232,12 +286,45 @@ class PortIn(PortWire):
     * The port will update the parent component upon change.
     """
 
+    _pass_through = False
+
     def __init__(self, parent, name: str, width: int = 1):
         super().__init__(parent, name, width, output=False)
 
     def set_value(self, value: VALUE_TYPE):
         super().set_value(value)
-        self.parent().update()
+        self.parent().request_update()
+
+
+class PortWireObserver(PortWire):
+    """
+    The PortWireObserver class:
+    * The port wire will instantaneously update the driven wires upon change.
+    * The port will call the observer function upon change, without simulation events,
+      for example to record the value changes.
+    """
+
+    _pass_through = False
+
+    def __init__(
+        self,
+        parent,
+        name: str,
+        width: int = 1,
+        observer: Callable[[Port], None] | None = None,
+    ):
+        self._observer: Callable[[Port], None] | None = observer
+        super().__init__(parent, name, width, output=False)
+
+    def set_observer(self, observer: Callable[[Port], None] | None):
+        """Set the observer function, observer(port) is called when the value changes"""
+        self._observer = observer
+
+    def set_value(self, value: VALUE_TYPE):
+        if value != self.value:
+            self.update_wires(value)
+            if self._observer is not None:
+                self._observer(self)
 
 
 class PortOutDelta(Port):
@@ -261,13 +348,20 @@ class PortOutDelta(Port):
         self._delay_ns = delay_ns
 
     def set_value(self, value: VALUE_TYPE):
+        if (
+            value == self._value
+            and not self._update_parent
+            and not self.parent().has_pending_event(self)
+        ):
+            # The port already has this value, an event would not change anything
+            return
         self.parent().add_event(self, value, self._delay_ns)
 
     def update_port(self, value: VALUE_TYPE):
         """Update the port output and the connected wires"""
         self.update_wires(value)
         if self._update_parent:
-            self.parent().update()
+            self.parent().request_update()
 
     def delta_cycle(self, value: VALUE_TYPE):
         """Handle the delta cycle event from the circuit"""
@@ -291,19 +385,15 @@ class PortOutImmediate(PortOutDelta):
     * A special version of the PortOutDelta used for direct components (button/switch/value)
     * The port driver will update the driven wires immediately
     * The port will update the parent component if the _update_parent variable is set to true.
+    * The value change is passed directly to the circuit trace callbacks, no event is added.
     """
 
     def __init__(self, parent, name: str, width: int = 1):
         super().__init__(parent, name, width)
 
     def set_value(self, value: VALUE_TYPE):
-        self.parent().add_event(self, value, 0)
         super().update_port(value)
-
-    def delta_cycle(self, value: VALUE_TYPE):
-        """
-        Do nothing here, the event is just used to updates waves in Circuit class
-        """
+        self.parent().trace_value(self)
 
 
 class PortWireBit(PortWire):
@@ -313,13 +403,19 @@ class PortWireBit(PortWire):
     The PortWireBit will update its parent (a PortMultiBitWire) upon change.
     """
 
-    def __init__(self, parent, name: str, parent_port: PortMultiBitWire, output: bool):
+    _pass_through = False
+
+    def __init__(
+        self, parent, name: str, parent_port: PortMultiBitWire, output: bool, bit_id: int = 0
+    ):
         super().__init__(parent, name, 1, output)
         self._parent_port = parent_port
+        self._bit_id = bit_id
 
     def set_value(self, value: VALUE_TYPE):
-        super().set_value(value)
-        self._parent_port.update_value_from_bits()
+        if value != self._value:
+            self.update_wires(value)
+            self._parent_port.update_bit(self._bit_id, value)
 
     def get_parent_port(self) -> PortMultiBitWire:
         """Get the parent PortMultiBitWire for this port"""
@@ -331,28 +427,45 @@ class PortMultiBitWire(Port):
     The PortMultiWireBit class is used when several bits should be collected into
     a multi bit bus port.
     The PortWireMultiBit will add events to the circuit upon change to update vcd output.
+    A word update (set_value) updates the bus value once, when all bits are set.
+    Bit updates are collected and the bus value is updated in a zero delay delta cycle,
+    so there is at most one pending event per bus.
     """
 
     def __init__(self, parent, name: str, width: int, output: bool = False):
         self._port_driver: Port | None = None  # The port that drives this port
         self._bits = []
+        self._x_bits: int = 0  # Mask of the bits with value "X"
+        self._bits_value: int = 0  # The value of the bits that are not "X"
+        self._word_update: bool = False  # Is a word update (set_value) in progress
         super().__init__(parent, name, width, output)
         for bit_id in range(self.width):
             self._bits.append(
-                PortWireBit(parent, f"{self.name()}_{bit_id}", self, output=not output)
+                PortWireBit(parent, f"{self.name()}_{bit_id}", self, not output, bit_id)
             )
 
     def init(self):
         super().init()
+        self._x_bits = (1 << self.width) - 1
+        self._bits_value = 0
         for bit in self._bits:
             bit.init()
 
+    def checkpoint_state(self) -> tuple:
+        return (*super().checkpoint_state(), self._x_bits, self._bits_value)
+
+    def restore_state(self, state: tuple):
+        value, edge_detect_value, self._x_bits, self._bits_value = state
+        super().restore_state((value, edge_detect_value))
+
     def set_value(self, value: VALUE_TYPE):
         if isinstance(value, str):
             return
+        self._word_update = True
         for bit_id, bit in enumerate(self._bits):
-            bit_val = (value >> bit_id) & 1
-            bit.value = bit_val
+            bit.value = (value >> bit_id) & 1
+        self._word_update = False
+        self.update_value_from_bits()
 
     def get_wired_ports_recursive(self, processed_ports: Optional[set] = None) -> list[Port]:
         if processed_ports is None:
@@ -379,20 +492,109 @@ class PortMultiBitWire(Port):
         """Get bit port"""
         return self._bits[bit_id]
 
+    def _bits_word(self) -> VALUE_TYPE:
+        return "X" if self._x_bits else self._bits_value
+
+    def update_bit(self, bit_id: int, value: VALUE_TYPE):
+        """Update the bus with a changed bit value"""
+        mask = 1 << bit_id
+        if value == "X":
+            self._x_bits |= mask
+        else:
+            self._x_bits &= ~mask
+            if value:
+                self._bits_value |= mask
+            else:
+                self._bits_value &= ~mask
+        if not self._word_update and not self.parent().has_pending_event(self):
+            # Collect the bit changes, the bus is updated in the delta cycle
+            self.parent().add_event(self, self._value, 0)
+
     def update_value_from_bits(self):
         """Update the port with the value of the bits"""
-        value = 0
-        for bit_id, bit in enumerate(self._bits):
-            if bit.value == "X":
-                self.update_wires("X")
-                return
-            value = value | (bit.value << bit_id)
+        value = self._bits_word()
+        if value == self._value:
+            return
         self.update_wires(value)
-        # Send event just to update waves
-        self.parent().add_event(self, value, 0)
+        if value != "X":
+            self.parent().trace_value(self)
 
     def delta_cycle(self, value: VALUE_TYPE):
         """
-        Do nothing here, the event passed in 'update_value_from_bits'
-        is just used to updates waves in Circuit class
+        Update the port with the collected bit changes,
+        the event is also used to update waves in Circuit class
         """
+        self.update_wires(self._bits_word())
+
+
+class PortMultiBitIn(PortMultiBitWire):
+    """
+    The PortMultiBitIn class is a multi bit input port where the bits are driven separately,
+    for example by the nets of a yosys netlist.
+    The bit changes are collected in a zero delay delta cycle (see PortMultiBitWire),
+    the parent component is updated once when the bus value changes.
+    The "X" bits are read as 0, the value is "X" until a bit is set.
+    """
+
+    def __init__(self, parent, name: str, width: int, update_parent: bool = True):
+        # The bits of an output PortMultiBitWire are driven separately
+        super().__init__(parent, name, width, output=True)
+        self._output = False
+        self._update_parent = update_parent  # Should this port update parent on change
+
+    def _bits_word(self) -> VALUE_TYPE:
+        return self._bits_value & ~self._x_bits
+
+    def set_value(self, value: VALUE_TYPE):
+        # The port is wired to a word port, the bits are not used
+        if value == self._value:
+            return
+        self.update_wires(value)
+        if self._update_parent:
+            self.parent().request_update()
+
+    def delta_cycle(self, value: VALUE_TYPE):
+        """Update the port with the collected bit changes"""
+        value = self._bits_word()
+        if value == self._value:
+            return
+        self.update_wires(value)
+        if self._update_parent:
+            self.parent().request_update()
+
+
+class PortMultiBitOutDelta(PortOutDelta):
+    """
+    The PortMultiBitOutDelta class is a PortOutDelta where the bits can be wired separately,
+    for example to the nets of a yosys netlist.
+    An "X" value sets all bits to "X".
+    """
+
+    def __init__(self, parent, name: str, width: int, delay_ns: int = 1):
+        self._bits = [PortWire(parent, f"{name}_{bit_id}", output=True) for bit_id in range(width)]
+        super().__init__(parent, name, width, delay_ns)
+
+    def init(self):
+        super().init()
+        for bit in self._bits:
+            bit.init()
+
+    def get_bit(self, bit_id: int) -> Port:
+        """Get bit port"""
+        return self._bits[bit_id]
+
+    def update_wires(self, value: VALUE_TYPE):
+        old_value = self._value
+        if old_value == value:
+            return
+        super().update_wires(value)
+        if value == "X" or old_value == "X":
+            for bit_id, bit in enumerate(self._bits):
+                bit.value = "X" if value == "X" else (value >> bit_id) & 1
+            return
+        # Only update the changed bits
+        changed_bits = old_value ^ value
+        while changed_bits:
+            bit_id = (changed_bits & -changed_bits).bit_length() - 1
+            self._bits[bit_id].value = (value >> bit_id) & 1
+            changed_bits &= changed_bits - 1
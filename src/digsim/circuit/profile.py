@@ -0,0 +1,69 @@
+# Copyright (c) Fredrik Andersson, 2023-2025
+# All rights reserved
+
+"""
+Profile the simulation of a circuit file, the hot spots are printed
+
+python -m digsim.circuit.profile file.circuit --until 10ms
+"""
+
+import argparse
+import pathlib
+import re
+import sys
+
+from ._circuit import Circuit, CircuitError
+
+
+_TIME_UNITS_NS = {"s": 1_000_000_000, "ms": 1_000_000, "us": 1_000, "ns": 1}
+
+
+def parse_time_ns(time_str: str) -> int:
+    """Parse a time string, for example '10ms', '5us' or '100' (ns), to ns"""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d*)?)\s*(s|ms|us|ns)?\s*", time_str)
+    if match is None:
+        raise argparse.ArgumentTypeError(f"Invalid time '{time_str}'")
+    return int(float(match.group(1)) * _TIME_UNITS_NS[match.group(2) or "ns"])
+
+
+def main(argv=None) -> int:
+    """Profile a circuit file, return the exit code"""
+    parser = argparse.ArgumentParser("DigSim simulation profiler")
+    parser.add_argument("circuit_file", type=str, help="The circuit file")
+    parser.add_argument(
+        "--until",
+        "-u",
+        type=parse_time_ns,
+        default=parse_time_ns("10ms"),
+        help="The simulation stop time, for example 10ms (default), 5us or 100ns",
+    )
+    parser.add_argument(
+        "--top", "-t", type=int, default=10, help="The number of hot spots to print"
+    )
+    parser.add_argument(
+        "--folder",
+        "-f",
+        type=str,
+        default=None,
+        help="The circuit load folder (default is the circuit file folder)",
+    )
+    args = parser.parse_args(argv)
+    folder = args.folder
+    if folder is None:
+        folder = str(pathlib.Path(args.circuit_file).parent)
+
+    circuit = Circuit()
+    try:
+        circuit.from_json_file(args.circuit_file, folder=folder)
+        circuit.init()
+        with circuit.profile() as profiler:
+            circuit.run_until(ns=args.until)
+    except (CircuitError, OSError) as exc:
+        print(f"ERROR: {str(exc)}")
+        return -1
+    print(profiler.report(top=args.top))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,4 +3,13 @@
 
 """All classes within digsim.synth namespace"""
 
-from ._synthesis import Synthesis, SynthesisException  # noqa: F401
+from ._batch import SynthesisResult, SynthesisTarget, load_manifest, synth_many  # noqa: F401
+from ._cache import SynthesisCache  # noqa: F401
+from ._synthesis import (  # noqa: F401
+    SYNTHESIS_PROFILES,
+    WORD_LEVEL_CELLS,
+    Synthesis,
+    SynthesisException,
+    SynthesisProfile,
+)
+from ._yosys_worker import YosysWorkerException, YosysWorkerPool  # noqa: F401
@@ -7,7 +7,15 @@ import argparse
 import sys
 import time
 
-from . import Synthesis, SynthesisException
+from . import (
+    SYNTHESIS_PROFILES,
+    Synthesis,
+    SynthesisException,
+    SynthesisResult,
+    SynthesisTarget,
+    load_manifest,
+    synth_many,
+)
 
 
 def _synth_modules(args):
@@ -16,16 +24,27 @@ def _synth_modules(args):
         print(f" - Reading {infile}")
     print(f"Generating {args.output_file}...")
     start_time = time.monotonic()
-    synthesis = Synthesis(args.input_files, args.top)
     try:
+        synthesis = Synthesis(args.input_files, args.top, profile=args.profile)
         synthesis.synth_to_json_file(args.output_file, silent=args.silent)
         print(f"Synthesis complete in {time.monotonic() - start_time:.2f}s")
+        _print_cell_counts(synthesis.cell_counts(), args.profile)
     except SynthesisException as exc:
         print(f"ERROR: {str(exc)}")
         return -1
     return 0
 
 
+def _print_cell_counts(cell_counts, profile, indent=""):
+    cells_before, cells_after = cell_counts
+    if cells_before is None or cells_after is None:
+        return
+    if cells_before == cells_after:
+        print(f"{indent}Cells: {cells_after} ({profile})")
+    else:
+        print(f"{indent}Cells: {cells_before} -> {cells_after} ({profile})")
+
+
 def _list_modules(args):
     try:
         modules = Synthesis.list_modules(args.input_files)
@@ -40,6 +59,49 @@ def _list_modules(args):
     return 0
 
 
+def _synth_batch(args):
+    try:
+        targets = load_manifest(args.manifest) if args.manifest is not None else []
+    except SynthesisException as exc:
+        print(f"ERROR: {str(exc)}")
+        return -1
+    for target in args.target or []:
+        if len(target) < 3:
+            print("ERROR: A target is TOP OUTPUT_FILE INPUT_FILE [INPUT_FILE ...]")
+            return -1
+        targets.append(
+            SynthesisTarget(
+                input_files=target[2:],
+                top=target[0],
+                output_file=target[1],
+                profile=args.profile,
+            )
+        )
+    if len(targets) == 0:
+        print("ERROR: No synthesis targets")
+        return -1
+
+    print(f"Batch synthesis of {len(targets)} targets started...")
+    start_time = time.monotonic()
+    results = synth_many(targets, jobs=args.jobs, force=args.force)
+    for result in results:
+        print(
+            f" - {result.target.top} -> {result.target.output_file}: "
+            f"{result.status} ({result.time_s:.2f}s)"
+        )
+        if not result.ok:
+            print(f"   ERROR: {result.error}")
+        _print_cell_counts(result.cell_counts, result.target.profile, indent="   ")
+    statuses = [result.status for result in results]
+    print(
+        f"Batch synthesis complete in {time.monotonic() - start_time:.2f}s "
+        f"({statuses.count(SynthesisResult.SYNTHESIZED)} synthesized, "
+        f"{statuses.count(SynthesisResult.UP_TO_DATE)} up to date, "
+        f"{statuses.count(SynthesisResult.FAILED)} failed)"
+    )
+    return 0 if all(result.ok for result in results) else -1
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser("Yosys synthesizer helper")
     subparser = parser.add_subparsers(required=True)
@@ -56,12 +118,48 @@ if __name__ == "__main__":
     synth_parser.add_argument(
         "--silent", "-s", action="store_true", help="Silent the yosys output"
     )
+    synth_parser.add_argument(
+        "--profile",
+        "-p",
+        type=str,
+        choices=list(SYNTHESIS_PROFILES),
+        default="faithful",
+        help="The synthesis profile",
+    )
     synth_parser.set_defaults(func=_synth_modules)
     list_parser = subparser.add_parser("list")
     list_parser.add_argument(
         "--input-files", "-i", type=str, nargs="+", required=True, help="The verilog input files"
     )
     list_parser.set_defaults(func=_list_modules)
+    batch_parser = subparser.add_parser("batch")
+    batch_parser.add_argument(
+        "--manifest", "-m", type=str, help="The json manifest with the synthesis targets"
+    )
+    batch_parser.add_argument(
+        "--target",
+        "-T",
+        type=str,
+        nargs="+",
+        action="append",
+        metavar="ARG",
+        help="A synthesis target: TOP OUTPUT_FILE INPUT_FILE [INPUT_FILE ...]",
+    )
+    batch_parser.add_argument(
+        "--jobs", "-j", type=int, default=None, help="The number of yosys processes"
+    )
+    batch_parser.add_argument(
+        "--force", "-f", action="store_true", help="Synthesize the up to date targets"
+    )
+    batch_parser.add_argument(
+        "--profile",
+        "-p",
+        type=str,
+        choices=list(SYNTHESIS_PROFILES),
+        default="faithful",
+        help="The synthesis profile of the --target targets",
+    )
+    batch_parser.set_defaults(func=_synth_batch)
     arguments = parser.parse_args()
     returncode = arguments.func(arguments)
     sys.exit(returncode)
@@ -0,0 +1,108 @@
+# Copyright (c) Fredrik Andersson, 2023-2025
+# All rights reserved
+
+"""
+Module with a batch runner for synthesis targets
+
+The targets are synthesized concurrently by the workers of a YosysWorkerPool,
+a target is skipped if its output file is the synthesis result of the current sources.
+"""
+
+from __future__ import annotations
+
+import json
+import pathlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from ._synthesis import Synthesis, SynthesisException
+from ._yosys_worker import YosysWorkerPool
+
+
+@dataclass
+class SynthesisTarget:
+    """A synthesis target, the verilog files and top module synthesized to a json file"""
+
+    input_files: list[str]
+    top: str
+    output_file: str
+    profile: str = "faithful"
+
+
+@dataclass
+class SynthesisResult:
+    """The result of one synthesis target"""
+
+    SYNTHESIZED = "synthesized"
+    UP_TO_DATE = "up to date"
+    FAILED = "failed"
+
+    target: SynthesisTarget
+    status: str = FAILED
+    time_s: float = 0.0
+    error: str | None = None
+    log: list[str] = field(default_factory=list)
+    cell_counts: tuple[int | None, int | None] = (None, None)
+
+    @property
+    def ok(self) -> bool:
+        """Return True if the target was synthesized or up to date"""
+        return self.status != self.FAILED
+
+
+def load_manifest(filename: str | pathlib.Path) -> list[SynthesisTarget]:
+    """
+    Load synthesis targets from a json manifest, the paths are relative to the manifest folder:
+    {"targets": [{"input_files": ["a.v", "b.v"], "top": "top", "output_file": "top.json"}]}
+    A target can select a synthesis profile, "profile": "fast-sim" (default is "faithful")
+    """
+    manifest_path = pathlib.Path(filename)
+    try:
+        with open(manifest_path, encoding="utf-8") as manifest_file:
+            manifest = json.load(manifest_file)
+        return [
+            SynthesisTarget(
+                input_files=[str(manifest_path.parent / path) for path in target["input_files"]],
+                top=target["top"],
+                output_file=str(manifest_path.parent / target["output_file"]),
+                profile=target.get("profile", "faithful"),
+            )
+            for target in manifest["targets"]
+        ]
+    except (OSError, json.JSONDecodeError, KeyError, TypeError) as exc:
+        raise SynthesisException(f"Malformed synthesis manifest '{filename}': {exc}") from exc
+
+
+def _synth_target(target, pool, force) -> SynthesisResult:
+    result = SynthesisResult(target=target)
+    start_time = time.monotonic()
+    try:
+        synthesis = Synthesis(target.input_files, target.top, pool=pool, profile=target.profile)
+        if not force and synthesis.is_up_to_date(target.output_file):
+            result.status = SynthesisResult.UP_TO_DATE
+        else:
+            synthesis.synth_to_json_file(target.output_file, silent=True, stamp=True)
+            result.status = SynthesisResult.SYNTHESIZED
+        result.cell_counts = synthesis.cell_counts()
+        result.log = synthesis.get_log()
+    except (SynthesisException, OSError) as exc:
+        result.error = str(exc)
+    result.time_s = time.monotonic() - start_time
+    return result
+
+
+def synth_many(
+    targets: list[SynthesisTarget], jobs: int | None = None, force: bool = False
+) -> list[SynthesisResult]:
+    """
+    Synthesize the targets with 'jobs' yosys processes (the default worker pool size if None),
+    the results are returned in target order.
+    force: Synthesize the targets that are up to date
+    """
+    pool = YosysWorkerPool(size=jobs)
+    try:
+        with ThreadPoolExecutor(max_workers=pool.size) as executor:
+            return list(executor.map(lambda target: _synth_target(target, pool, force), targets))
+    finally:
+        pool.close()
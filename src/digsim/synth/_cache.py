@@ -0,0 +1,119 @@
+# Copyright (c) Fredrik Andersson, 2023-2025
+# All rights reserved
+
+"""
+Module with the content-addressed synthesis cache
+
+The yosys output is stored in the cache folder with a hash of the verilog sources,
+the synthesis script and the yosys version as filename.
+Files included by the verilog sources (`include) are not part of the hash.
+"""
+
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+from digsim.utils import digsim_cache_dir
+
+
+class SynthesisCache:
+    """
+    The synthesis cache, the least recently used entries are removed
+    when the cache is larger than max_size (bytes).
+    The environment variable DIGSIM_SYNTH_CACHE can be set to '0' to disable the cache.
+    """
+
+    CACHE_VERSION = 1
+    DEFAULT_MAX_SIZE = 100 * 1024 * 1024
+
+    def __init__(self, cache_dir: str | Path | None = None, max_size: int | None = None):
+        if cache_dir is None:
+            cache_dir = digsim_cache_dir() / "synth"
+        self._cache_dir = Path(cache_dir)
+        self._max_size = max_size if max_size is not None else self.DEFAULT_MAX_SIZE
+
+    @staticmethod
+    def enabled() -> bool:
+        """Return False if the cache is disabled with DIGSIM_SYNTH_CACHE=0"""
+        return os.environ.get("DIGSIM_SYNTH_CACHE", "1") != "0"
+
+    @property
+    def cache_dir(self) -> Path:
+        """Get the cache folder"""
+        return self._cache_dir
+
+    @property
+    def max_size(self) -> int:
+        """Get the max cache size (bytes)"""
+        return self._max_size
+
+    @classmethod
+    def key(cls, verilog_files: list[str], script: str, yosys_version: str) -> str:
+        """Get the cache key, OSError is raised if a verilog file cannot be read"""
+        digest = hashlib.sha256()
+        digest.update(f"{cls.CACHE_VERSION}\0{yosys_version}\0{script}\0".encode("utf-8"))
+        for verilog_file in verilog_files:
+            digest.update(Path(verilog_file).read_bytes())
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self._cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> str | None:
+        """Get the cached yosys output, None if the key is not in the cache"""
+        entry_path = self._entry_path(key)
+        try:
+            data = entry_path.read_text(encoding="utf-8")
+            # The modification time is the last use, for the eviction
+            os.utime(entry_path)
+        except OSError:
+            return None
+        return data
+
+    def put(self, key: str, data: str):
+        """Store yosys output in the cache, the cache is optional and errors are ignored"""
+        try:
+            self._cache_dir.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file first so that a reader never sees a partial entry
+            with tempfile.NamedTemporaryFile(
+                "w", encoding="utf-8", dir=self._cache_dir, suffix=".tmp", delete=False
+            ) as tmp_file:
+                tmp_file.write(data)
+            os.replace(tmp_file.name, self._entry_path(key))
+        except OSError:
+            return
+        self.evict()
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries = []
+        for entry_path in self._cache_dir.glob("*.json"):
+            try:
+                stat = entry_path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry_path))
+        return entries
+
+    def size(self) -> int:
+        """Get the cache size (bytes)"""
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """Remove the least recently used entries until the cache is not larger than max_size"""
+        entries = sorted(self._entries(), key=lambda entry: entry[0])
+        cache_size = sum(size for _, size, _ in entries)
+        for _, size, entry_path in entries:
+            if cache_size <= self._max_size:
+                break
+            entry_path.unlink(missing_ok=True)
+            cache_size -= size
+
+    def invalidate(self, key: str | None = None):
+        """Remove an entry from the cache, or all entries if key is None"""
+        if key is not None:
+            self._entry_path(key).unlink(missing_ok=True)
+            return
+        for _, _, entry_path in self._entries():
+            entry_path.unlink(missing_ok=True)
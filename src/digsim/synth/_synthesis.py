@@ -3,94 +3,165 @@
 
 """Helper module for yosys synthesis"""
 
+import contextlib
+import hashlib
+import importlib.metadata
 import json
+import os
 import pathlib
-import shutil
-import site
-import sys
-
-import pexpect
-import pexpect.popen_spawn
+import re
+import subprocess
+from dataclasses import dataclass
 
 from digsim.circuit.components.atoms import DigsimException
 
+from ._cache import SynthesisCache
+from ._yosys_worker import YosysWorkerException, YosysWorkerPool, find_yosys_executable
+
 
 class SynthesisException(DigsimException):
     """Exception class for yosys synthesis"""
 
 
+@dataclass(frozen=True)
+class SynthesisProfile:
+    """
+    A synthesis profile, the yosys commands before techmap (coarse-grain cells)
+    and the gate-level optimization commands after synth.
+    A word-level profile keeps the coarse-grain 'word_cells', the other cells are mapped to gates.
+    """
+
+    description: str
+    coarse_script: str
+    optimize_script: str = ""
+    word_cells: tuple[str, ...] = ()
+
+
+# The word-level cells that are simulated by the word-level yosys atoms
+WORD_LEVEL_CELLS = (
+    *("$not", "$pos", "$neg", "$and", "$or", "$xor", "$xnor"),
+    *("$reduce_and", "$reduce_or", "$reduce_xor", "$reduce_xnor", "$reduce_bool"),
+    *("$logic_not", "$logic_and", "$logic_or"),
+    *("$shl", "$shr", "$sshl", "$sshr", "$shift", "$shiftx"),
+    *("$lt", "$le", "$eq", "$ne", "$ge", "$gt", "$add", "$sub", "$mul"),
+    *("$mux", "$pmux"),
+    *("$dff", "$dffe", "$adff", "$adffe", "$sdff", "$sdffe", "$sdffce", "$dlatch"),
+)
+
+
+SYNTHESIS_PROFILES = {
+    "faithful": SynthesisProfile(
+        description="The gates of the verilog source, no logic optimization",
+        coarse_script="opt; ",
+    ),
+    "fast-sim": SynthesisProfile(
+        description="Logic optimized for fewer gates in the simulation",
+        coarse_script="opt -full; share; opt -full; ",
+        optimize_script="opt -full; freduce; opt_merge -share_all; opt -full; opt_clean -purge; ",
+    ),
+    "word-level": SynthesisProfile(
+        description="Word-level cells ($add, $mux, $dff...), one simulation atom per operation",
+        coarse_script="opt; wreduce; opt_clean; ",
+        word_cells=WORD_LEVEL_CELLS,
+    ),
+}
+
+
 class Synthesis:
-    """Helper class for yosys synthesis"""
+    """
+    Helper class for yosys synthesis,
+    the yosys output is stored in a SynthesisCache and yosys is not executed on a cache hit,
+    the yosys commands are executed by the warm yosys processes of a YosysWorkerPool
+    """
 
-    @classmethod
-    def _pexpect_wait_for_prompt(cls, pexp):
-        index = pexp.expect(["yosys>", pexpect.EOF])
-        before_lines = pexp.before.decode("utf8").replace("\r", "").split("\n")
-        if index == 0:
-            pass
-        elif index == 1:
-            # Unexpected EOF means ERROR
-            errorline = "ERROR"
-            for line in before_lines:
-                if "ERROR" in line:
-                    errorline = line
-                    break
-            raise SynthesisException(errorline)
-
-        # Remove escape sequence in output
-        out_lines = []
-        for line in before_lines:
-            if line.startswith("\x1b"):
-                continue
-            out_lines.append(line)
-        return out_lines
+    # The suffix of the stamp file written next to a json file, see is_up_to_date
+    STAMP_SUFFIX = ".sha256"
+
+    _yosys_versions: dict[str, str] = {}
 
     @staticmethod
-    def _find_win_yowasp_yosys_binary():
+    def _yosys_exe_version(yosys_exe):
+        """
+        Get a version string for the yosys executable without executing it,
+        the yowasp-yosys package version or the executable path, size and modification time
+        """
+        if pathlib.Path(yosys_exe).stem == "yowasp-yosys":
+            with contextlib.suppress(importlib.metadata.PackageNotFoundError):
+                return f"yowasp-yosys {importlib.metadata.version('yowasp-yosys')}"
         try:
-            # Use getusersitepackages if this is present, as it ensures that the
-            # value is initialised properly.
-            user_site = site.getusersitepackages()
-        except AttributeError:
-            user_site = site.USER_SITE
-        scripts_path = pathlib.Path(user_site).parent / "Scripts"
-        yowasp_yosys_path = scripts_path / "yowasp-yosys.exe"
-        if yowasp_yosys_path.is_file():
-            return str(yowasp_yosys_path)
-        return None
+            yosys_path = os.path.realpath(yosys_exe)
+            stat = os.stat(yosys_path)
+        except OSError:
+            return None
+        return f"{yosys_path} {stat.st_size} {stat.st_mtime_ns}"
 
     @classmethod
-    def _pexpect_spawn_yosys(cls):
-        # Find linux binary
-        yosys_exe = shutil.which("yosys") or shutil.which("yowasp-yosys")
-
-        # No binary found
-        if yosys_exe is None:
-            # Try to find windows binary
-            yosys_exe = cls._find_win_yowasp_yosys_binary()
+    def yosys_version(cls):
+        """
+        Get the yosys version string, used in the synthesis cache key,
+        yosys is only executed (yosys -V) if there is no version without executing it
+        """
+        try:
+            yosys_exe = find_yosys_executable()
+        except YosysWorkerException as exc:
+            raise SynthesisException(str(exc)) from exc
+        version = cls._yosys_versions.get(yosys_exe)
+        if version is None:
+            version = cls._yosys_exe_version(yosys_exe)
+        if version is None:
+            try:
+                result = subprocess.run(
+                    [yosys_exe, "-V"], capture_output=True, check=True, text=True
+                )
+            except (OSError, subprocess.CalledProcessError) as exc:
+                raise SynthesisException(f"Yosys version not found: {exc}") from exc
+            version = result.stdout.strip()
+        cls._yosys_versions[yosys_exe] = version
+        return version
 
-        if yosys_exe is None:
-            raise SynthesisException("Yosys executable not found")
+    @staticmethod
+    def _get_cache(cache):
+        if cache is None and SynthesisCache.enabled():
+            return SynthesisCache()
+        return cache
 
-        if sys.platform == "win32":
-            return pexpect.popen_spawn.PopenSpawn(yosys_exe)
+    @classmethod
+    def _cache_key(cls, cache, verilog_files, script):
+        if cache is None:
+            return None
+        try:
+            return cache.key(verilog_files, script, cls.yosys_version())
+        except OSError:
+            # Missing verilog file, let yosys report the error
+            return None
 
-        return pexpect.spawn(yosys_exe)
+    @staticmethod
+    @contextlib.contextmanager
+    def _yosys_worker(pool):
+        if pool is None:
+            pool = YosysWorkerPool.default()
+        try:
+            with pool.worker() as worker:
+                yield worker
+        except YosysWorkerException as exc:
+            raise SynthesisException(str(exc)) from exc
 
     @classmethod
-    def list_modules(cls, verilog_files):
+    def list_modules(cls, verilog_files, cache=None, pool=None):
         """List available modules in verilog files"""
         if isinstance(verilog_files, str):
             verilog_files = [verilog_files]
 
-        pexp = cls._pexpect_spawn_yosys()
-        cls._pexpect_wait_for_prompt(pexp)
-        pexp.sendline(f"read -sv {' '.join(verilog_files)}")
-        cls._pexpect_wait_for_prompt(pexp)
-        pexp.sendline("ls")
-        pexp.expect("\n")
-        ls_response = cls._pexpect_wait_for_prompt(pexp)
-        pexp.sendline("exit")
+        cache = cls._get_cache(cache)
+        cache_key = cls._cache_key(cache, verilog_files, "ls")
+        if cache_key is not None:
+            cached_modules = cache.get(cache_key)
+            if cached_modules is not None:
+                return cached_modules.split("\n") if cached_modules else []
+
+        with cls._yosys_worker(pool) as worker:
+            worker.command(f"read -sv {' '.join(verilog_files)}")
+            ls_response = worker.command("ls", expect="\n")
 
         modules = []
         for line in ls_response:
@@ -99,40 +170,146 @@ class Synthesis:
             if "modules:" in line:
                 continue
             modules.append(line.replace("$abstract\\", "").strip())
+        if cache_key is not None:
+            cache.put(cache_key, "\n".join(modules))
         return modules
 
-    def __init__(self, verilog_files, verilog_top_module):
+    def __init__(
+        self, verilog_files, verilog_top_module, cache=None, pool=None, profile="faithful"
+    ):
+        """
+        cache: The SynthesisCache, None selects the default cache
+               (disabled with the environment variable DIGSIM_SYNTH_CACHE=0)
+        pool: The YosysWorkerPool, None selects the default pool
+        profile: The synthesis profile, see SYNTHESIS_PROFILES
+        """
         if isinstance(verilog_files, str):
             self._verilog_files = [verilog_files]
         else:
             self._verilog_files = verilog_files
         self._verilog_top_module = verilog_top_module
+        if profile not in SYNTHESIS_PROFILES:
+            raise SynthesisException(f"Unknown synthesis profile '{profile}'")
+        self._profile = SYNTHESIS_PROFILES[profile]
+        self._cache = self._get_cache(cache)
+        self._pool = pool
         self._yosys_log = []
+        self._cell_counts = (None, None)
 
-    def synth_to_json(self, silent=False):
-        """Execute yosys with generated synthesis script"""
+    def _synth_script(self):
         script = f"read -sv {' '.join(self._verilog_files)}; "
         script += f"hierarchy -top {self._verilog_top_module}; "
         script += "proc; flatten; "
         script += "memory_dff; "
-        script += "proc; opt; techmap; opt; "
-        script += f"synth -noabc -top {self._verilog_top_module}; "
-
-        pexp = self._pexpect_spawn_yosys()
-        self._pexpect_wait_for_prompt(pexp)
-        pexp.sendline(script)
-        yosys_log = self._pexpect_wait_for_prompt(pexp)
-        for line in yosys_log:
-            self._yosys_log.append(line)
-            if silent:
-                continue
-            print("Yosys:", line)
-        pexp.sendline("write_json")
-        pexp.expect("Executing JSON backend.")
-        json_lines = self._pexpect_wait_for_prompt(pexp)
-        pexp.sendline("exit")
+        script += f"proc; {self._profile.coarse_script}"
+        if self._profile.word_cells:
+            # Map all cells, except the word-level cells, to gates
+            word_cells = " ".join(f"t:{cell_type}" for cell_type in self._profile.word_cells)
+            union = " %u" * (len(self._profile.word_cells) - 1)
+            script += f"memory; opt; techmap {word_cells}{union} %n; opt; opt_clean; "
+        else:
+            script += "techmap; opt; "
+            script += f"synth -noabc -top {self._verilog_top_module}; "
+        return script
+
+    def synth_script(self):
+        """Get the yosys synthesis script"""
+        return self._synth_script() + self._profile.optimize_script
+
+    def cache_key(self):
+        """Get the synthesis cache key, None if the cache is not used"""
+        return self._cache_key(self._cache, self._verilog_files, self.synth_script())
+
+    def invalidate_cache(self):
+        """Remove the synthesis result from the cache"""
+        cache_key = self.cache_key()
+        if cache_key is not None:
+            self._cache.invalidate(cache_key)
+            self._cache.invalidate(f"{cache_key}.cells")
 
-        return "\n".join(json_lines)
+    def cell_counts(self):
+        """
+        Get the number of cells before and after the gate-level optimization
+        of the synthesis profile, (None, None) before the synthesis
+        """
+        return self._cell_counts
+
+    @staticmethod
+    def _stat_cells(worker):
+        stat_lines = worker.command("stat -json")
+        # The design total (or the only module) is the last cell count
+        cell_counts = re.findall(r'"num_cells":\s*(\d+)', "\n".join(stat_lines))
+        return int(cell_counts[-1]) if cell_counts else None
+
+    def _source_key(self):
+        """Get the key of the verilog sources, the script and the yosys version"""
+        try:
+            return SynthesisCache.key(
+                self._verilog_files, self.synth_script(), self.yosys_version()
+            )
+        except OSError:
+            return None
+
+    @staticmethod
+    def _stamp(filename, source_key):
+        output_digest = hashlib.sha256(pathlib.Path(filename).read_bytes()).hexdigest()
+        return f"{source_key} {output_digest}\n"
+
+    def is_up_to_date(self, filename):
+        """
+        Return True if the json file is the synthesis result of the current sources,
+        the stamp file (filename + STAMP_SUFFIX) from synth_to_json_file is checked
+        """
+        source_key = self._source_key()
+        if source_key is None:
+            return False
+        try:
+            stamp = pathlib.Path(f"{filename}{self.STAMP_SUFFIX}").read_text(encoding="utf-8")
+            if stamp != self._stamp(filename, source_key):
+                return False
+        except OSError:
+            return False
+        if self._cache is not None:
+            cell_counts = self._cache.get(f"{source_key}.cells")
+            if cell_counts is not None:
+                self._cell_counts = tuple(json.loads(cell_counts))
+        return True
+
+    def synth_to_json(self, silent=False):
+        """Execute yosys with generated synthesis script, or get the result from the cache"""
+        script = self.synth_script()
+        cache_key = self._cache_key(self._cache, self._verilog_files, script)
+        if cache_key is not None:
+            yosys_json = self._cache.get(cache_key)
+            cell_counts = self._cache.get(f"{cache_key}.cells")
+            if yosys_json is not None and cell_counts is not None:
+                self._cell_counts = tuple(json.loads(cell_counts))
+                self._log(f"Synthesis result from cache ({cache_key})", silent)
+                return yosys_json
+
+        with self._yosys_worker(self._pool) as worker:
+            yosys_log = worker.command(self._synth_script())
+            cells_before = self._stat_cells(worker)
+            if self._profile.optimize_script:
+                yosys_log += worker.command(self._profile.optimize_script)
+                cells_after = self._stat_cells(worker)
+            else:
+                cells_after = cells_before
+            for line in yosys_log:
+                self._log(line, silent)
+            json_lines = worker.command("write_json", expect="Executing JSON backend.")
+
+        self._cell_counts = (cells_before, cells_after)
+        yosys_json = "\n".join(json_lines)
+        if cache_key is not None:
+            self._cache.put(cache_key, yosys_json)
+            self._cache.put(f"{cache_key}.cells", json.dumps(self._cell_counts))
+        return yosys_json
+
+    def _log(self, line, silent):
+        self._yosys_log.append(line)
+        if not silent:
+            print("Yosys:", line)
 
     def synth_to_dict(self, silent=False):
         """Execute yosys with generated synthesis script and return python dict"""
@@ -143,13 +320,24 @@ class Synthesis:
             raise SynthesisException(f"Malformed JSON output from Yosys: {exc}") from exc
         return netlist_dict
 
-    def synth_to_json_file(self, filename, silent=False):
-        """Execute yosys with generated synthesis script and write to file"""
+    def synth_to_json_file(self, filename, silent=False, stamp=False):
+        """
+        Execute yosys with generated synthesis script and write to file,
+        with stamp=True a stamp file is also written for is_up_to_date
+        """
         yosys_json = self.synth_to_json(silent)
         if yosys_json is None:
             raise SynthesisException("Yosys synthesis failed")
         with open(filename, mode="w", encoding="utf-8") as json_file:
             json_file.write(yosys_json)
+        if not stamp:
+            return
+        stamp_path = pathlib.Path(f"{filename}{self.STAMP_SUFFIX}")
+        source_key = self._source_key()
+        if source_key is None:
+            stamp_path.unlink(missing_ok=True)
+        else:
+            stamp_path.write_text(self._stamp(filename, source_key), encoding="utf-8")
 
     def get_log(self):
         """Get the yosys output"""
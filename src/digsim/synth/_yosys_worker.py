@@ -0,0 +1,288 @@
+# Copyright (c) Fredrik Andersson, 2023-2025
+# All rights reserved
+
+"""
+Module with the yosys worker pool
+
+The yosys processes are started once and kept running (warm), a worker executes
+one job at a time and the design is reset (design -reset) between the jobs.
+"""
+
+import atexit
+import contextlib
+import os
+import pathlib
+import shutil
+import signal
+import site
+import sys
+import threading
+import time
+
+import pexpect
+import pexpect.popen_spawn
+
+from digsim.circuit.components.atoms import DigsimException
+
+
+class YosysWorkerException(DigsimException):
+    """Exception class for the yosys workers"""
+
+
+def _find_win_yowasp_yosys_binary():
+    try:
+        # Use getusersitepackages if this is present, as it ensures that the
+        # value is initialised properly.
+        user_site = site.getusersitepackages()
+    except AttributeError:
+        user_site = site.USER_SITE
+    scripts_path = pathlib.Path(user_site).parent / "Scripts"
+    yowasp_yosys_path = scripts_path / "yowasp-yosys.exe"
+    if yowasp_yosys_path.is_file():
+        return str(yowasp_yosys_path)
+    return None
+
+
+def find_yosys_executable():
+    """Get the path to the yosys (or yowasp-yosys) executable"""
+    # Find linux binary
+    yosys_exe = shutil.which("yosys") or shutil.which("yowasp-yosys")
+
+    # No binary found
+    if yosys_exe is None:
+        # Try to find windows binary
+        yosys_exe = _find_win_yowasp_yosys_binary()
+
+    if yosys_exe is None:
+        raise YosysWorkerException("Yosys executable not found")
+    return yosys_exe
+
+
+class YosysWorker:
+    """A yosys process in interactive mode"""
+
+    def __init__(self, yosys_exe, timeout):
+        # The yosys paths are relative to the working folder of the process
+        self._cwd = os.getcwd()
+        if sys.platform == "win32":
+            self._pexp = pexpect.popen_spawn.PopenSpawn(yosys_exe)
+        else:
+            self._pexp = pexpect.spawn(yosys_exe)
+        self._alive = True
+        self._deadline = time.monotonic() + timeout
+        self.wait_for_prompt()
+
+    @property
+    def pid(self):
+        """Get the process id of the yosys process"""
+        return self._pexp.pid
+
+    @property
+    def is_alive(self):
+        """Return True if the yosys process is running"""
+        if not self._alive:
+            return False
+        if isinstance(self._pexp, pexpect.spawn):
+            return self._pexp.isalive()
+        return self._pexp.proc.poll() is None
+
+    @property
+    def is_usable(self):
+        """Return True if the worker can execute a job in the current working folder"""
+        return self.is_alive and self._cwd == os.getcwd()
+
+    def start_job(self, timeout):
+        """Start a job, all commands of the job must complete within timeout seconds"""
+        self._deadline = time.monotonic() + timeout
+
+    def _expect(self, pattern):
+        timeout = self._deadline - time.monotonic()
+        try:
+            if timeout <= 0:
+                raise pexpect.TIMEOUT("Job deadline passed")
+            return self._pexp.expect(pattern, timeout=timeout)
+        except pexpect.TIMEOUT as exc:
+            self.close()
+            raise YosysWorkerException("Yosys timeout") from exc
+        except pexpect.EOF as exc:
+            self._alive = False
+            raise YosysWorkerException("Yosys terminated unexpectedly") from exc
+
+    def wait_for_prompt(self):
+        """Wait for the yosys prompt and return the output lines"""
+        index = self._expect(["yosys>", pexpect.EOF])
+        before_lines = self._pexp.before.decode("utf8").replace("\r", "").split("\n")
+        if index == 1:
+            # Unexpected EOF means ERROR
+            self._alive = False
+            errorline = "ERROR"
+            for line in before_lines:
+                if "ERROR" in line:
+                    errorline = line
+                    break
+            raise YosysWorkerException(errorline)
+
+        # Remove escape sequence in output
+        out_lines = []
+        for line in before_lines:
+            if line.startswith("\x1b"):
+                continue
+            out_lines.append(line)
+        return out_lines
+
+    def command(self, line, expect=None):
+        """
+        Execute a yosys command and return the output lines,
+        the output before the 'expect' pattern is not returned
+        """
+        self._pexp.sendline(line)
+        if expect is not None:
+            self._expect(expect)
+        return self.wait_for_prompt()
+
+    def reset(self):
+        """Reset the yosys design"""
+        self.command("design -reset")
+
+    def close(self):
+        """Stop the yosys process"""
+        if self.is_alive:
+            with contextlib.suppress(OSError):
+                self._pexp.sendline("exit")
+        self._alive = False
+        if isinstance(self._pexp, pexpect.spawn):
+            self._pexp.close(force=True)
+        elif self._pexp.proc.poll() is None:
+            self._pexp.kill(signal.SIGTERM)
+
+
+class YosysWorkerPool:
+    """
+    A pool of warm yosys processes (workers), the workers are started when they are needed
+    (or with start()) and a crashed worker is restarted.
+    The environment variable DIGSIM_YOSYS_WORKERS selects the size of the default pool.
+    """
+
+    DEFAULT_TIMEOUT = 300
+
+    _default_pool = None
+    _default_pool_lock = threading.Lock()
+
+    def __init__(self, size=None, timeout=None):
+        """
+        size: The max number of yosys processes
+        timeout: The max time (seconds) per job
+        """
+        if size is None:
+            size = int(os.environ.get("DIGSIM_YOSYS_WORKERS", min(4, os.cpu_count() or 1)))
+        self._size = max(size, 1)
+        self._timeout = timeout if timeout is not None else self.DEFAULT_TIMEOUT
+        self._idle_workers = []
+        self._workers = 0
+        self._condition = threading.Condition()
+        self._closed = False
+
+    @classmethod
+    def default(cls):
+        """Get the default yosys worker pool, the workers are stopped at exit"""
+        with cls._default_pool_lock:
+            if cls._default_pool is None:
+                cls._default_pool = cls()
+                atexit.register(cls._default_pool.close)
+            return cls._default_pool
+
+    @property
+    def size(self):
+        """Get the max number of yosys processes"""
+        return self._size
+
+    @property
+    def timeout(self):
+        """Get the max time (seconds) per job"""
+        return self._timeout
+
+    @property
+    def workers(self):
+        """Get the number of started yosys processes"""
+        return self._workers
+
+    def _acquire(self):
+        stopped_workers = []
+        worker = None
+        with self._condition:
+            while worker is None:
+                if self._closed:
+                    raise YosysWorkerException("The yosys worker pool is closed")
+                if self._idle_workers:
+                    worker = self._idle_workers.pop()
+                    if not worker.is_usable:
+                        # Crashed (or another working folder), start a new worker
+                        stopped_workers.append(worker)
+                        self._workers -= 1
+                        worker = None
+                elif self._workers < self._size:
+                    self._workers += 1
+                    break
+                else:
+                    self._condition.wait()
+        for stopped_worker in stopped_workers:
+            stopped_worker.close()
+        if worker is not None:
+            return worker
+        try:
+            return YosysWorker(find_yosys_executable(), self._timeout)
+        except Exception:
+            with self._condition:
+                self._workers -= 1
+                self._condition.notify()
+            raise
+
+    def _release(self, worker, reuse):
+        with self._condition:
+            reuse = reuse and worker.is_alive and not self._closed
+            if reuse:
+                self._idle_workers.append(worker)
+            else:
+                self._workers -= 1
+            self._condition.notify()
+        if not reuse:
+            worker.close()
+
+    @contextlib.contextmanager
+    def worker(self, timeout=None):
+        """
+        Get a worker for a job (context manager), the design is reset after the job
+        and the worker is stopped if the job fails
+        """
+        worker = self._acquire()
+        reuse = False
+        try:
+            worker.start_job(timeout if timeout is not None else self._timeout)
+            yield worker
+            with contextlib.suppress(YosysWorkerException):
+                # The worker is stopped if the design cannot be reset
+                worker.reset()
+                reuse = True
+        finally:
+            self._release(worker, reuse)
+
+    def start(self, count=None):
+        """Start (warm up) yosys processes, the pool size is used if count is None"""
+        count = self._size if count is None else min(count, self._size)
+        with self._condition:
+            busy_workers = self._workers - len(self._idle_workers)
+        with contextlib.ExitStack() as stack:
+            # Hold the idle workers while new workers are started
+            for _ in range(count - busy_workers):
+                stack.enter_context(self.worker())
+
+    def close(self):
+        """Stop the idle workers, the busy workers are stopped when their jobs are done"""
+        with self._condition:
+            self._closed = True
+            idle_workers = self._idle_workers
+            self._idle_workers = []
+            self._workers -= len(idle_workers)
+            self._condition.notify_all()
+        for worker in idle_workers:
+            worker.close()
@@ -3,4 +3,5 @@
 
 """All classes within digsim.utils namespace"""
 
+from ._cache_dir import digsim_cache_dir  # noqa: F401
 from ._yosys_netlist import YosysCell, YosysModule, YosysNetlist  # noqa: F401
@@ -0,0 +1,18 @@
+# Copyright (c) Fredrik Andersson, 2023-2025
+# All rights reserved
+
+"""Module with the DigSim cache folder"""
+
+import os
+from pathlib import Path
+
+
+def digsim_cache_dir() -> Path:
+    """
+    Get the DigSim cache folder (the folder is not created),
+    the environment variable DIGSIM_CACHE_DIR can be used to select the cache folder.
+    """
+    cache_dir = os.environ.get("DIGSIM_CACHE_DIR")
+    if cache_dir is None:
+        return Path.home() / ".cache" / "digsim"
+    return Path(cache_dir)
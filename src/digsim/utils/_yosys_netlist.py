@@ -54,27 +54,29 @@ class YosysCell:
     parameters: dict[str, Any] = Field(default_factory=dict)
     attributes: dict[str, Any] = Field(default_factory=dict)
 
+    @property
+    def is_word_level(self):
+        """Return True for a word-level (coarse-grain) cell, e.g. $add, $mux or $dff"""
+        return not self.type.startswith("$_")
+
     def get_nets(self, name, nets):
         for port_name, net_list in self.connections.items():
-            if not net_list:
-                # Handle empty net_list, e.g., by skipping or raising an error
-                continue
-            net = net_list[0]
-            port = NetPort(parent=self, parent_name=name, name=port_name)
-            if self.port_directions[port_name] == "input":
-                if net not in nets.sinks:
-                    nets.sinks[net] = []
-                nets.sinks[net].append(port)
-            else:
-                nets.source[net] = port
+            for bit_index, net in enumerate(net_list):
+                port = NetPort(parent=self, parent_name=name, name=port_name, bit_index=bit_index)
+                if self.port_directions[port_name] == "input":
+                    if net not in nets.sinks:
+                        nets.sinks[net] = []
+                    nets.sinks[net].append(port)
+                else:
+                    nets.source[net] = port
 
     def component_name(self, name):
         """Return a friendly name for a netlist cell"""
         return f"{name.split('$')[-1]}_{self.component_type()}"
 
     def component_type(self):
-        """Return a friendly type for a netlist cell"""
-        return f"_{self.type[2:-1]}_"
+        """Return a friendly type for a netlist cell, '$_AND_' => '_AND_', '$add' => '_add'"""
+        return f"_{self.type[1:].lstrip('_')}"
 
 
 @dataclass
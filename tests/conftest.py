@@ -0,0 +1,45 @@
+# Copyright (c) Fredrik Andersson, 2023-2025
+# All rights reserved
+
+"""Pytest fixtures shared by the test modules"""
+
+import pytest
+
+from digsim.circuit import Circuit
+from digsim.circuit.components import Clock, IntegratedCircuit, StaticValue
+
+
+@pytest.fixture(autouse=True, scope="session")
+def digsim_cache_dir(tmp_path_factory):
+    """Fixture: Use a temporary folder for the DigSim caches, not the user cache folder"""
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("DIGSIM_CACHE_DIR", str(tmp_path_factory.mktemp("digsim_cache")))
+        yield
+
+
+def _counter_circuit(init=True, **circuit_kwargs):
+    circuit = Circuit(**circuit_kwargs)
+    clk = Clock(circuit, frequency=1000, name="clk")
+    high = StaticValue(circuit, "high", value=1)
+    data = StaticValue(circuit, "data", width=4, value=0)
+    counter = IntegratedCircuit(circuit, ic_name="74162")
+    counter.set_name("counter")
+    clk.wire = counter.Clk
+    high.wire = counter.Clear_bar
+    high.wire = counter.Load_bar
+    high.wire = counter.ENT
+    high.wire = counter.ENP
+    data.wire = counter.D
+    if init:
+        circuit.init()
+    return circuit, clk, counter
+
+
+@pytest.fixture
+def counter_circuit():
+    """
+    Fixture: get a function that creates a circuit with a 1 kHz clock ("clk")
+    and a 74162 decade counter ("counter"), the function returns (circuit, clk, counter).
+    The circuit is initialized unless init=False, the keyword arguments are passed to Circuit.
+    """
+    return _counter_circuit
@@ -0,0 +1,109 @@
+# Copyright (c) Fredrik Andersson, 2023-2025
+# All rights reserved
+
+"""Pystest module to test functionality of the batch runner"""
+
+import multiprocessing
+from pathlib import Path
+
+import pytest
+
+from digsim.circuit import Circuit, run_many
+from digsim.circuit.components import IntegratedCircuit, PushButton, StaticValue
+
+
+def counter_circuit():
+    """Create a circuit with a 74162 decade counter"""
+    circuit = Circuit(name="counter")
+    clk = PushButton(circuit, "clk")
+    clear_bar = PushButton(circuit, "clear_bar")
+    high = StaticValue(circuit, "high", value=1)
+    data = StaticValue(circuit, "data", width=4, value=0)
+    counter = IntegratedCircuit(circuit, ic_name="74162")
+    counter.set_name("counter")
+    clk.wire = counter.Clk
+    clear_bar.wire = counter.Clear_bar
+    high.wire = counter.Load_bar
+    high.wire = counter.ENT
+    high.wire = counter.ENP
+    data.wire = counter.D
+    return circuit
+
+
+def count_clocks(circuit, clocks):
+    """Testbench: clear the counter and count a number of clocks"""
+    clk = circuit.get_component("clk")
+    clear_bar = circuit.get_component("clear_bar")
+    counter = circuit.get_component("counter")
+    clk.push()
+    circuit.run(ms=1)
+    clk.release()
+    clear_bar.push()
+    circuit.run(ms=1)
+    for _ in range(clocks):
+        clk.push()
+        circuit.run(ms=1)
+        clk.release()
+        circuit.run(ms=1)
+    assert clocks < 20, "Too many clocks"
+    return counter.Q.value
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run_many(workers):
+    """Test that the results are returned in stimuli order"""
+    stimuli = [3, 12, 0, 7, 25, 9]
+    results = run_many(counter_circuit, count_clocks, stimuli, workers=workers)
+    assert [result.index for result in results] == list(range(len(stimuli)))
+    assert [result.stimulus for result in results] == stimuli
+    for result in results:
+        if result.stimulus < 20:
+            assert result.ok
+            assert result.value == result.stimulus % 10
+        else:
+            assert not result.ok
+            assert "Too many clocks" in result.error
+
+
+def test_run_many_circuit_dataclass(tmp_path):
+    """Test the batch runner with a circuit dataclass and VCD files"""
+    circuit_dc = counter_circuit().to_dataclass()
+    results = run_many(circuit_dc, count_clocks, [4, 5], workers=2, vcd_folder=str(tmp_path))
+    assert [result.value for result in results] == [4, 5]
+    for result in results:
+        assert Path(result.vcd_path).is_file()
+
+
+def test_run_many_circuit_file(tmp_path):
+    """Test the batch runner with a circuit json file"""
+    circuit_file = tmp_path / "counter.circuit"
+    counter_circuit().to_json_file(str(circuit_file))
+    results = run_many(circuit_file, count_clocks, [8, 11], workers=1)
+    assert [result.value for result in results] == [8, 1]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run_many_missing_circuit_file(tmp_path, workers):
+    """Test that a missing or broken circuit file raises an exception"""
+    with pytest.raises(FileNotFoundError):
+        run_many(tmp_path / "missing.circuit", count_clocks, [1, 2], workers=workers)
+    broken_file = tmp_path / "broken.circuit"
+    broken_file.write_text("{broken", encoding="utf-8")
+    with pytest.raises(ValueError):
+        run_many(broken_file, count_clocks, [1, 2], workers=workers)
+
+
+def worker_only_circuit():
+    """Create a circuit that cannot be built in a worker process"""
+    if multiprocessing.current_process().name != "MainProcess":
+        raise RuntimeError("Worker circuit error")
+    return counter_circuit()
+
+
+def test_run_many_worker_error():
+    """Test that a circuit error in the worker processes is returned in the results"""
+    results = run_many(worker_only_circuit, count_clocks, [1, 2, 3], workers=2)
+    assert [result.index for result in results] == [0, 1, 2]
+    for result in results:
+        assert not result.ok
+        assert "Worker circuit error" in result.error
@@ -0,0 +1,151 @@
+# Copyright (c) Fredrik Andersson, 2023-2025
+# All rights reserved
+
+"""Pystest module to test functionality of the circuit batch update mode"""
+
+from pathlib import Path
+
+import pytest
+
+from digsim.circuit import Circuit
+from digsim.circuit.components import (
+    Clock,
+    IntegratedCircuit,
+    Mem64kByte,
+    PushButton,
+    StaticValue,
+    YosysComponent,
+)
+from digsim.circuit.components._yosys_atoms import _AND_, _NOT_
+
+
+class CountingAnd(_AND_):
+    """AND gate that counts the number of updates"""
+
+    def __init__(self, circuit, name=None):
+        super().__init__(circuit, name)
+        self.update_count = 0
+
+    def update(self):
+        self.update_count += 1
+        super().update()
+
+
+@pytest.mark.parametrize(
+    "batch_update, update_count",
+    [
+        (False, 2),
+        (True, 1),
+    ],
+)
+def test_batch_update_count(batch_update, update_count):
+    """Test that a component is updated once per delta cycle in batch update mode"""
+    circuit = Circuit(batch_update=batch_update)
+    button = PushButton(circuit, "button")
+    not_a = _NOT_(circuit, "not_a")
+    not_b = _NOT_(circuit, "not_b")
+    and_gate = CountingAnd(circuit, "and")
+    button.wire = not_a.A
+    button.wire = not_b.A
+    not_a.Y.wire = and_gate.A
+    not_b.Y.wire = and_gate.B
+    circuit.init()
+    circuit.run(ms=1)
+    assert and_gate.Y.value == 1
+
+    and_gate.update_count = 0
+    button.push()
+    circuit.run(ms=1)
+    assert and_gate.Y.value == 0
+    assert and_gate.update_count == update_count
+
+
+def test_batch_update_external_change():
+    """Test that changes made outside of the simulation are updated when the simulation runs"""
+    circuit = Circuit(batch_update=True)
+    and_gate = _AND_(circuit, "and")
+    circuit.init()
+    and_gate.A.value = 1
+    and_gate.B.value = 1
+    circuit.run(ns=1)
+    assert and_gate.Y.value == 1
+    and_gate.B.value = 0
+    circuit.run(ns=1)
+    assert and_gate.Y.value == 0
+
+
+def test_batch_update_decade_counter():
+    """Test a yosys decade counter in batch update mode"""
+    circuit = Circuit(batch_update=True)
+    clk = PushButton(circuit, "clk")
+    clear_bar = PushButton(circuit, "clear_bar")
+    high = StaticValue(circuit, "high", value=1)
+    data = StaticValue(circuit, "data", width=4, value=0)
+    counter = IntegratedCircuit(circuit, ic_name="74162")
+    clk.wire = counter.Clk
+    clear_bar.wire = counter.Clear_bar
+    high.wire = counter.Load_bar
+    high.wire = counter.ENT
+    high.wire = counter.ENP
+    data.wire = counter.D
+    circuit.init()
+
+    # Synchronous clear (active low)
+    clk.push()
+    circuit.run(ms=1)
+    clk.release()
+    clear_bar.push()
+    circuit.run(ms=1)
+    assert counter.Q.value == 0
+
+    for count in range(1, 25):
+        clk.push()
+        circuit.run(ms=1)
+        clk.release()
+        circuit.run(ms=1)
+        assert counter.Q.value == count % 10
+
+
+def _run_6502(batch_update):
+    """Run the 6502 example netlist, return the address bus values and the profiler"""
+    example_path = Path(__file__).resolve().parent.parent / "examples" / "yosys_6502"
+    example_path = example_path.relative_to(Path.cwd())
+    circuit = Circuit(batch_update=batch_update)
+    rst = PushButton(circuit, "RST")
+    clk = Clock(circuit, frequency=1000000, name="CLK")
+    low = StaticValue(circuit, "low", value=0)
+    high = StaticValue(circuit, "high", value=1)
+    cpu = YosysComponent(circuit, path=example_path / "6502.json")
+    mem = Mem64kByte(circuit, rom_filename=example_path / "code.bin", rom_address=0xF800)
+    clk.wire = mem.clk
+    cpu.AB.wire = mem.Address
+    cpu.DO.wire = mem.DataIn
+    cpu.WE.wire = mem.WE
+    mem.DataOut.wire = cpu.DI
+    rst.O.wire = cpu.reset
+    clk.O.wire = cpu.clk
+    low.O.wire = cpu.IRQ
+    low.O.wire = cpu.NMI
+    high.O.wire = cpu.RDY
+    circuit.init()
+    rst.push()
+    circuit.run(us=1)
+    rst.release()
+
+    addresses = []
+    with circuit.profile() as profiler:
+        for _ in range(20):
+            circuit.run(us=1)
+            addresses.append(cpu.AB.value)
+    return addresses, profiler
+
+
+def test_batch_update_6502():
+    """Test that the batch update mode updates the 6502 netlist fewer times"""
+    addresses, profiler = _run_6502(batch_update=False)
+    batch_addresses, batch_profiler = _run_6502(batch_update=True)
+    assert batch_addresses == addresses
+    updates = sum(stats.updates for stats in profiler.class_stats().values())
+    batch_updates = sum(stats.updates for stats in batch_profiler.class_stats().values())
+    assert batch_updates < updates
+    assert batch_profiler.class_stats()["_AND_"].updates < profiler.class_stats()["_AND_"].updates
@@ -0,0 +1,82 @@
+# Copyright (c) Fredrik Andersson, 2023-2025
+# All rights reserved
+
+"""Pystest module to test the in-memory waveform capture"""
+
+import pytest
+
+from digsim.circuit import Circuit, WaveCaptureException
+from digsim.circuit.components import NOT, PushButton
+
+
+def test_capture_changes(counter_circuit):
+    """Test the captured value changes of a counter"""
+    circuit, clk, counter = counter_circuit()
+    capture = circuit.capture([counter.Q, counter.Clk])
+    circuit.run(ms=12)
+
+    changes = capture.changes(counter.Q)
+    assert changes[0] == (0, "X")
+    assert [value for _, value in changes[1:]] == [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 0, 1, 2]
+    # counter.Clk is captured through the clk.O driver
+    clk_times = capture.times(counter.Clk)
+    assert len(clk_times) == 25
+    assert capture.values(counter.Clk)[:3] == [0, 1, 0]
+    assert capture.sample(counter.Q, [t + 1 for t, _ in changes[1:]]) == [
+        v for _, v in changes[1:]
+    ]
+    assert capture.value_at(counter.Q, -1) == "X"
+    assert capture.sample_period(counter.Q, 1_000_000, start_ns=1_000_000) == [
+        capture.value_at(counter.Q, time_ns) for time_ns in range(1_000_000, 12_000_001, 1_000_000)
+    ]
+
+
+def test_capture_clear_stop(counter_circuit):
+    """Test that clear keeps the current values and that stop stops the recording"""
+    circuit, _, counter = counter_circuit()
+    with circuit.capture(counter.Q) as capture:
+        circuit.run(ms=5)
+        capture.clear()
+        assert capture.changes(counter.Q) == [(circuit.time_ns, counter.Q.value)]
+        circuit.run(ms=2)
+        assert len(capture.changes(counter.Q)) == 3
+    assert not capture.active
+    circuit.run(ms=2)
+    assert len(capture.changes(counter.Q)) == 3
+
+
+def test_capture_glitch():
+    """Test that only the last value at a timestamp is captured"""
+    circuit = Circuit()
+    button = PushButton(circuit)
+    inverter = NOT(circuit)
+    button.O.wire = inverter.A
+    circuit.init()
+    circuit.run(ms=1)
+    capture = circuit.capture([button.O, inverter.Y])
+    button.push()
+    button.release()
+    button.push()
+    circuit.run(ms=1)
+    assert capture.changes(button.O) == [(1_000_000, 1)]
+    assert capture.changes(inverter.Y) == [(1_000_000, 1), (1_000_001, 0)]
+
+
+def test_capture_numpy(counter_circuit):
+    """Test the captured value changes as NumPy arrays"""
+    np = pytest.importorskip("numpy")
+    circuit, _, counter = counter_circuit()
+    capture = circuit.capture(counter.Q)
+    circuit.run(ms=5)
+    times, values = capture.to_numpy(counter.Q)
+    assert times.dtype == np.int64
+    assert list(times) == list(capture.times(counter.Q))
+    assert list(values) == [-1, 0, 1, 2, 3, 4, 5]
+
+
+def test_capture_errors(counter_circuit):
+    """Test the waveform capture exceptions"""
+    circuit, clk, counter = counter_circuit()
+    capture = circuit.capture(counter.Q)
+    with pytest.raises(WaveCaptureException):
+        capture.changes(clk.O)
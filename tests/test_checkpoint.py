@@ -0,0 +1,124 @@
+# Copyright (c) Fredrik Andersson, 2023-2025
+# All rights reserved
+
+"""Pystest module to test functionality of circuit checkpoint and restore"""
+
+import pytest
+
+from digsim.circuit import Circuit
+from digsim.circuit._circuit import CircuitError
+from digsim.circuit.components import Clock, Mem64kByte, StaticValue
+from digsim.circuit.components._yosys_numpy import numpy_available
+
+
+ENGINES = [
+    "event",
+    "levelized",
+    "compiled",
+    pytest.param(
+        "numpy", marks=pytest.mark.skipif(not numpy_available(), reason="numpy not installed")
+    ),
+]
+
+
+def _trace(circuit, counter, steps=25):
+    trace = []
+    for _ in range(steps):
+        circuit.run(us=100)
+        trace.append((circuit.time_ns, counter.Q.value, counter.RCO.value))
+    return trace
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("scheduler", ["heap", "bucket"])
+@pytest.mark.parametrize("batch_update", [False, True])
+def test_checkpoint_restore(counter_circuit, engine, scheduler, batch_update):
+    """Test that a restored circuit continues exactly as from the checkpoint"""
+    circuit, _, counter = counter_circuit(
+        scheduler=scheduler, batch_update=batch_update, yosys_engine=engine
+    )
+    circuit.run(ms=3.25)
+    checkpoint = circuit.checkpoint()
+    assert checkpoint.time_ns == circuit.time_ns
+    trace = _trace(circuit, counter)
+    assert len({value for _, value, _ in trace}) > 1
+
+    # A checkpoint can be restored several times
+    for _ in range(2):
+        circuit.restore(checkpoint)
+        assert circuit.time_ns == checkpoint.time_ns
+        assert _trace(circuit, counter) == trace
+
+
+def test_checkpoint_restore_earlier(counter_circuit):
+    """Test restore of a checkpoint after the circuit has been running a long time"""
+    circuit, _, counter = counter_circuit()
+    circuit.run(ms=2)
+    checkpoint = circuit.checkpoint()
+    reference = _trace(circuit, counter, steps=10)
+    circuit.run(ms=17)
+    circuit.restore(checkpoint)
+    assert _trace(circuit, counter, steps=10) == reference
+
+
+def test_checkpoint_memory():
+    """Test that the memory contents is a part of the checkpoint"""
+    circuit = Circuit()
+    mem = Mem64kByte(circuit)
+    clk = Clock(circuit, frequency=1000)
+    clk.wire = mem.clk
+    circuit.init()
+    mem.Address.value = 0x1234
+    mem.DataIn.value = 0x55
+    mem.WE.value = 1
+    circuit.run(ms=1)
+    checkpoint = circuit.checkpoint()
+
+    mem.DataIn.value = 0xAA
+    circuit.run(ms=1)
+    mem.WE.value = 0
+    circuit.run(ms=1)
+    assert mem.DataOut.value == 0xAA
+
+    circuit.restore(checkpoint)
+    assert mem.WE.value == 1
+    assert mem.DataIn.value == 0x55
+    mem.WE.value = 0
+    circuit.run(ms=1)
+    assert mem.DataOut.value == 0x55
+
+
+def test_checkpoint_circuit_changed(counter_circuit):
+    """Test that a checkpoint cannot be restored if the circuit has changed"""
+    circuit, _, _ = counter_circuit()
+    checkpoint = circuit.checkpoint()
+    StaticValue(circuit, "low", value=0)
+    with pytest.raises(CircuitError):
+        circuit.restore(checkpoint)
+
+
+@pytest.mark.parametrize("suffix", [".vcd", ".dsw"])
+def test_checkpoint_restore_waves(counter_circuit, tmp_path, suffix):
+    """Test that an earlier checkpoint cannot be restored while waves are collected"""
+    filename = str(tmp_path / f"waves{suffix}")
+    circuit, _, counter = counter_circuit()
+    circuit.run(ms=2)
+    checkpoint = circuit.checkpoint()
+    circuit.vcd(filename)
+    capture = circuit.capture(counter.Q)
+
+    # A checkpoint at the current simulation time can be restored
+    circuit.restore(checkpoint)
+    circuit.run(ms=2)
+    with pytest.raises(CircuitError):
+        circuit.restore(checkpoint)
+    capture.stop()
+    with pytest.raises(CircuitError):
+        circuit.restore(checkpoint)
+    circuit.vcd_close()
+
+    # No waves are collected, the checkpoint can be restored
+    circuit.restore(checkpoint)
+    assert circuit.time_ns == checkpoint.time_ns
+    times = capture.times(counter.Q)
+    assert list(times) == sorted(times)
@@ -0,0 +1,136 @@
+# Copyright (c) Fredrik Andersson, 2023-2025
+# All rights reserved
+
+"""Pystest module to test the logic analyzer component"""
+
+from array import array
+
+from digsim.circuit import Circuit
+from digsim.circuit.components import Clock, LogicAnalyzer, PushButton
+
+
+def _analyzer_circuit(**parameters):
+    circuit = Circuit()
+    button_a = PushButton(circuit, "button_a")
+    button_b = PushButton(circuit, "button_b")
+    analyzer = LogicAnalyzer(circuit, sample_rate=100, **parameters)
+    button_a.O.wire = analyzer.A
+    button_b.O.wire = analyzer.B
+    circuit.init()
+    return circuit, button_a, button_b, analyzer
+
+
+def _push(circuit, button, ms):
+    button.push()
+    circuit.run(ms=ms)
+    button.release()
+
+
+def test_logic_analyzer_free_running():
+    """Test that the last 'depth' samples are available, oldest sample first"""
+    circuit, button_a, _, analyzer = _analyzer_circuit(depth=20)
+    circuit.run(ms=95)
+    _push(circuit, button_a, 50)
+    circuit.run(ms=50)
+    signal_data = analyzer.signal_data()
+    assert analyzer.state == LogicAnalyzer.FREE_RUNNING
+    assert len(signal_data["A"]) == 20
+    assert list(signal_data["A"]) == [0] * 10 + [1] * 5 + [0] * 5
+    assert list(signal_data["B"]) == [0] * 20
+
+
+def test_logic_analyzer_edge_trigger():
+    """Test the edge trigger and the pre-trigger samples"""
+    circuit, button_a, _, analyzer = _analyzer_circuit(
+        depth=20, trigger="rising", trigger_channel="A", pre_trigger=25
+    )
+    circuit.run(ms=300)
+    assert analyzer.state == LogicAnalyzer.ARMED
+    _push(circuit, button_a, 50)
+    assert analyzer.state == LogicAnalyzer.TRIGGERED
+    circuit.run(ms=300)
+    assert analyzer.state == LogicAnalyzer.DONE
+    assert list(analyzer.signal_data()["A"]) == [0] * 5 + [1] * 5 + [0] * 10
+
+    analyzer.arm()
+    assert analyzer.state == LogicAnalyzer.ARMED
+    assert list(analyzer.signal_data()["A"]) == [0] * 20
+
+
+def test_logic_analyzer_pattern_trigger():
+    """Test the pattern trigger"""
+    circuit, button_a, button_b, analyzer = _analyzer_circuit(
+        depth=10, trigger="pattern", trigger_pattern=0x03, trigger_mask=0x03, pre_trigger=0
+    )
+    _push(circuit, button_a, 50)
+    circuit.run(ms=50)
+    assert analyzer.state == LogicAnalyzer.ARMED
+    button_a.push()
+    _push(circuit, button_b, 30)
+    button_a.release()
+    circuit.run(ms=100)
+    assert analyzer.state == LogicAnalyzer.DONE
+    assert list(analyzer.signal_data()["A"]) == [1] * 3 + [0] * 7
+    assert list(analyzer.signal_data()["B"]) == [1] * 3 + [0] * 7
+
+
+def test_logic_analyzer_reconfigure():
+    """Test that the depth can be reconfigured (max 1M samples)"""
+    circuit, _, _, analyzer = _analyzer_circuit()
+    analyzer.update_settings({"depth": 1_000_000})
+    circuit.run(ms=100)
+    buffers, start, stop = analyzer.signal_window()
+    assert stop - start == 1_000_000
+    assert len(buffers["A"]) == 2_000_000
+
+
+def test_logic_analyzer_event_mode():
+    """Test that the level changes are recorded and resampled in event mode"""
+    circuit, button_a, _, analyzer = _analyzer_circuit(depth=20, mode="event")
+    events = []
+    circuit.add_trace_callback(lambda port, _: events.append(port.parent()))
+    circuit.run(ms=95)
+    _push(circuit, button_a, 50)
+    circuit.run(ms=50)
+    assert analyzer not in events
+    assert analyzer.level_changes("A") == (0, array("q", [95_000_000, 145_000_000]))
+    # The samples are taken every 10 ms, the last sample at the current time (195 ms)
+    assert list(analyzer.signal_data()["A"]) == [0] * 9 + [1] * 5 + [0] * 6
+
+    buffer = bytearray(6)
+    analyzer.resample("A", 90_000_000, 20_000_000, buffer)
+    assert list(buffer) == [0, 1, 1, 0, 0, 0]
+
+    circuit.init()
+    assert analyzer.level_changes("A") == (0, array("q"))
+
+
+def test_logic_analyzer_event_mode_fast_signal():
+    """Test that a signal faster than the sample rate is recorded in event mode"""
+    circuit = Circuit()
+    clk = Clock(circuit, frequency=1_000_000)
+    analyzer = LogicAnalyzer(circuit, sample_rate=100, depth=10, mode="event")
+    clk.O.wire = analyzer.A
+    circuit.init()
+    circuit.run(ms=1)
+    first_level, times = analyzer.level_changes("A")
+    assert first_level == 0
+    assert len(times) == 2000
+    assert times[1] - times[0] == 500
+    assert analyzer.signal_data()["A"][-1] == (1 if clk.O.value == 1 else 0)
+
+
+def test_logic_analyzer_event_mode_trim():
+    """Test that the level changes before the last 'depth' samples are removed"""
+    circuit = Circuit()
+    clk = Clock(circuit, frequency=1000)
+    analyzer = LogicAnalyzer(circuit, sample_rate=100, depth=10, mode="event")
+    clk.O.wire = analyzer.A
+    circuit.init()
+    circuit.run(s=1)
+    first_level, times = analyzer.level_changes("A")
+    # 200 level changes in the 100 ms covered by the samples
+    assert 200 <= len(times) <= 800
+    assert times[0] <= circuit.time_ns - 90_000_000
+    assert list(times) == sorted(times)
+    assert first_level ^ (len(times) & 1) == (1 if clk.O.value == 1 else 0)
@@ -0,0 +1,134 @@
+# Copyright (c) Fredrik Andersson, 2023-2025
+# All rights reserved
+
+"""Pystest module to test the value propagation of wired ports and buses"""
+
+from digsim.circuit import Circuit
+from digsim.circuit.components import NOT, Bus2Wires, PushButton, Wires2Bus
+from digsim.circuit.components._yosys_atoms import _AND_
+from digsim.circuit.components.atoms import Component, PortWire
+
+
+class PassThrough(Component):
+    """Component with a single pass-through port"""
+
+    def __init__(self, circuit, name=None):
+        super().__init__(circuit, name)
+        self.add_port(PortWire(self, "W"))
+
+
+def _chain_circuit():
+    circuit = Circuit()
+    button = PushButton(circuit)
+    pass_1 = PassThrough(circuit, "pass_1")
+    pass_2 = PassThrough(circuit, "pass_2")
+    inverter = NOT(circuit)
+    button.O.wire = pass_1.W
+    pass_1.W.wire = pass_2.W
+    pass_2.W.wire = inverter.A
+    circuit.init()
+    circuit.run(ms=1)
+    return circuit, button, pass_1, pass_2, inverter
+
+
+def test_net_pass_through_chain():
+    """Test that values reach the sinks and the pass-through ports of a wire chain"""
+    circuit, button, pass_1, pass_2, inverter = _chain_circuit()
+    assert pass_1.W.value == 0
+    assert pass_2.W.value == 0
+    assert inverter.Y.value == 1
+
+    button.push()
+    circuit.run(ms=1)
+    assert pass_1.W.value == 1
+    assert pass_2.W.value == 1
+    assert inverter.Y.value == 0
+
+
+def test_net_rewire_after_init():
+    """Test that wire changes after circuit init are propagated"""
+    circuit, button, pass_1, pass_2, inverter = _chain_circuit()
+    inverter_2 = NOT(circuit, "inverter_2")
+    pass_2.W.wire = inverter_2.A
+    circuit.run(ms=1)
+    assert inverter_2.Y.value == 1
+
+    button.push()
+    circuit.run(ms=1)
+    assert inverter.Y.value == 0
+    assert inverter_2.Y.value == 0
+
+    pass_1.W.disconnect(pass_2.W)
+    button.release()
+    circuit.run(ms=1)
+    assert pass_1.W.value == 0
+    assert pass_2.W.value == 1
+    assert inverter.Y.value == 0
+    assert inverter_2.Y.value == 0
+
+
+def test_bus_bit_updates():
+    """Test that bit updates are collected to one bus update"""
+    circuit = Circuit()
+    wires_to_bus = Wires2Bus(circuit, width=4)
+    buttons = [PushButton(circuit, f"button_{bit_id}") for bit_id in range(4)]
+    for bit_id, button in enumerate(buttons):
+        button.O.wire = wires_to_bus.port(f"bus_{bit_id}")
+    circuit.init()
+    assert wires_to_bus.bus.value == 0
+
+    for button in buttons:
+        button.push()
+    assert wires_to_bus.bus.value == 0
+    assert circuit.has_pending_event(wires_to_bus.bus)
+    circuit.run(ms=1)
+    assert wires_to_bus.bus.value == 15
+    assert not circuit.has_pending_event(wires_to_bus.bus)
+
+
+def test_bus_word_update():
+    """Test that a word update sets the bus value and the bit values at once"""
+    circuit = Circuit()
+    bus_to_wires = Bus2Wires(circuit, width=4)
+    circuit.init()
+    assert bus_to_wires.bus.value == "X"
+
+    bus_to_wires.bus.value = 0xA
+    assert bus_to_wires.bus.value == 0xA
+    assert [bus_to_wires.port(f"bus_{bit_id}").value for bit_id in range(4)] == [0, 1, 0, 1]
+    circuit.run(ms=1)
+    assert bus_to_wires.bus.value == 0xA
+
+
+def test_out_delta_unchanged_value():
+    """Test that an output that keeps its value does not add an event"""
+    circuit = Circuit()
+    and_gate = _AND_(circuit, "and")
+    circuit.init()
+    and_gate.A.value = 0
+    and_gate.B.value = 0
+    circuit.run(ns=1)
+    assert and_gate.Y.value == 0
+
+    and_gate.B.value = 1
+    assert not circuit.has_pending_event(and_gate.Y)
+    and_gate.B.value = 0
+    assert not circuit.has_pending_event(and_gate.Y)
+
+
+def test_out_delta_superseded_glitch():
+    """Test that a pending event is superseded when the output returns to its value"""
+    circuit = Circuit()
+    and_gate = _AND_(circuit, "and")
+    circuit.init()
+    and_gate.A.value = 1
+    and_gate.B.value = 0
+    circuit.run(ns=1)
+    assert and_gate.Y.value == 0
+
+    and_gate.B.value = 1
+    assert circuit.has_pending_event(and_gate.Y)
+    and_gate.B.value = 0
+    assert circuit.has_pending_event(and_gate.Y)
+    circuit.run(ns=1)
+    assert and_gate.Y.value == 0
@@ -0,0 +1,60 @@
+# Copyright (c) Fredrik Andersson, 2023-2025
+# All rights reserved
+
+"""Pystest module to test the simulation profiler"""
+
+import pathlib
+
+from digsim.circuit import Circuit
+from digsim.circuit.components import NOT, Clock
+from digsim.circuit.profile import main, parse_time_ns
+
+
+def _clock_circuit(scheduler="heap"):
+    circuit = Circuit(scheduler=scheduler)
+    clk = Clock(circuit, frequency=1000, name="clk")
+    inv = NOT(circuit, name="inv")
+    clk.wire = inv.A
+    circuit.init()
+    return circuit, clk, inv
+
+
+def test_profiler_counts():
+    """Test the events per port and the component updates"""
+    circuit, _, inv = _clock_circuit()
+    with circuit.profile() as profiler:
+        circuit.run(ms=10)
+    assert profiler.sim_time_ns == 10_000_000
+    assert profiler.port_events() == {"clk.feedback": 20, "inv.Y": 20}
+    assert profiler.events == 40
+    assert profiler.component_stats()["inv"].updates == 20
+    assert profiler.class_stats()["NOT"].updates == 20
+    assert profiler.wall_time_s > 0
+    assert profiler.events_per_second > 0
+    assert "inv.Y" in profiler.report()
+
+    # The profiled functions are removed when the profiler is stopped
+    assert "update" not in vars(inv)
+    assert "pop" not in vars(circuit._scheduler)
+    circuit.run(ms=10)
+    assert profiler.events == 40
+
+
+def test_profiler_queue_sizes():
+    """Test that the scheduler queue sizes are sampled, for both schedulers"""
+    for scheduler in ["heap", "bucket"]:
+        circuit, _, _ = _clock_circuit(scheduler)
+        with circuit.profile() as profiler:
+            circuit.run(ms=1)
+        assert profiler.max_queue_size >= 1
+        assert 0.0 <= profiler.stale_event_ratio < 1.0
+
+
+def test_profile_cli(capsys):
+    """Test the profiler command line interface"""
+    assert parse_time_ns("10ms") == 10_000_000
+    assert parse_time_ns("1.5us") == 1_500
+    assert parse_time_ns("100") == 100
+    circuit_file = pathlib.Path(__file__).parent.parent / "example_circuits/74162_counter.circuit"
+    assert main([str(circuit_file), "--until", "5ms", "--top", "3"]) == 0
+    assert "Simulation time: 5000000 ns" in capsys.readouterr().out
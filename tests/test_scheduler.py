@@ -0,0 +1,114 @@
+# Copyright (c) Fredrik Andersson, 2023-2025
+# All rights reserved
+
+"""Pystest module to test functionality of the circuit event schedulers"""
+
+import pytest
+
+from digsim.circuit import Circuit
+from digsim.circuit._circuit import CircuitError
+from digsim.circuit._scheduler import HeapScheduler, TimeBucketScheduler
+from digsim.circuit.components import IntegratedCircuit, PushButton, StaticValue
+
+
+@pytest.mark.parametrize("scheduler_class", [HeapScheduler, TimeBucketScheduler])
+def test_scheduler_order(scheduler_class):
+    """Test that events are popped in time order"""
+    port_a, port_b, port_c = object(), object(), object()
+    scheduler = scheduler_class()
+    scheduler.add(30, port_a, 1)
+    scheduler.add(10, port_b, 0)
+    scheduler.add(20, port_c, 1)
+    assert scheduler.has_events()
+    assert scheduler.next_port() == port_b
+    assert scheduler.pop() == (10, port_b, 0)
+    assert scheduler.pop() == (20, port_c, 1)
+    assert scheduler.pop() == (30, port_a, 1)
+    assert scheduler.pop() is None
+
+
+@pytest.mark.parametrize("scheduler_class", [HeapScheduler, TimeBucketScheduler])
+def test_scheduler_supersede(scheduler_class):
+    """Test that a new event for a port supersedes the pending event"""
+    port_a, port_b = object(), object()
+    scheduler = scheduler_class()
+    scheduler.add(10, port_a, 1)
+    scheduler.add(15, port_b, 1)
+    scheduler.add(20, port_a, 0)
+    assert scheduler.pop() == (15, port_b, 1)
+    assert scheduler.pop() == (20, port_a, 0)
+    assert scheduler.pop() is None
+    assert not scheduler.has_events()
+
+
+def test_bucket_scheduler_next_port():
+    """Test that next_port skips the superseded buckets"""
+    port_a, port_b, port_c = object(), object(), object()
+    scheduler = TimeBucketScheduler()
+    scheduler.add(10, port_a, 1)
+    scheduler.add(20, port_b, 1)
+    scheduler.add(30, port_c, 1)
+    scheduler.add(40, port_a, 0)
+    assert scheduler.next_port() == port_b
+    scheduler.add(50, port_b, 0)
+    assert scheduler.next_port() == port_c
+    assert scheduler.queue_sizes() == (3, 3)
+    assert scheduler.pop() == (30, port_c, 1)
+    assert scheduler.pop() == (40, port_a, 0)
+    assert scheduler.pop() == (50, port_b, 0)
+    assert scheduler.next_port() is None
+
+
+@pytest.mark.parametrize("scheduler_class", [HeapScheduler, TimeBucketScheduler])
+def test_scheduler_stop_time(scheduler_class):
+    """Test that events after the stop time are kept in the scheduler"""
+    port_a = object()
+    scheduler = scheduler_class()
+    scheduler.add(100, port_a, 1)
+    assert scheduler.pop(stop_time_ns=50) is None
+    assert scheduler.has_events()
+    assert scheduler.pop(stop_time_ns=100) == (100, port_a, 1)
+    scheduler.add(200, port_a, 0)
+    scheduler.clear()
+    assert not scheduler.has_events()
+    assert scheduler.pop() is None
+
+
+def test_unknown_scheduler():
+    """Test that an unknown scheduler raises an exception"""
+    with pytest.raises(CircuitError):
+        Circuit(scheduler="unknown")
+
+
+@pytest.mark.parametrize("scheduler", ["heap", "bucket"])
+def test_scheduler_decade_counter(scheduler):
+    """Test a yosys decade counter with the different schedulers"""
+    circuit = Circuit(scheduler=scheduler)
+    clk = PushButton(circuit, "clk")
+    clear_bar = PushButton(circuit, "clear_bar")
+    high = StaticValue(circuit, "high", value=1)
+    data = StaticValue(circuit, "data", width=4, value=0)
+    counter = IntegratedCircuit(circuit, ic_name="74162")
+    clk.wire = counter.Clk
+    clear_bar.wire = counter.Clear_bar
+    high.wire = counter.Load_bar
+    high.wire = counter.ENT
+    high.wire = counter.ENP
+    data.wire = counter.D
+    circuit.init()
+
+    # Synchronous clear (active low)
+    clk.push()
+    circuit.run(ms=1)
+    clk.release()
+    clear_bar.push()
+    circuit.run(ms=1)
+    assert counter.Q.value == 0
+
+    for count in range(1, 25):
+        clk.push()
+        circuit.run(ms=1)
+        clk.release()
+        circuit.run(ms=1)
+        assert counter.Q.value == count % 10
+        assert counter.RCO.value == (1 if count % 10 == 9 else 0)
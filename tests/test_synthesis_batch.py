@@ -0,0 +1,134 @@
+# Copyright (c) Fredrik Andersson, 2023-2025
+# All rights reserved
+
+"""Pystest module to test the batch synthesis"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from digsim.synth import (
+    SynthesisException,
+    SynthesisResult,
+    SynthesisTarget,
+    load_manifest,
+    synth_many,
+)
+
+
+@pytest.fixture
+def verilog_path(tmp_path, monkeypatch):
+    """Fixture: get path to verilog modules, with an empty synthesis cache"""
+    monkeypatch.setenv("DIGSIM_CACHE_DIR", str(tmp_path / "cache"))
+    test_path = Path(__file__).resolve().relative_to(Path.cwd())
+    return Path(test_path).parent / "verilog"
+
+
+def _targets(verilog_path, output_path):
+    return [
+        SynthesisTarget(
+            [str(verilog_path / "one_module.v")], "module_one", str(output_path / "one.json")
+        ),
+        SynthesisTarget(
+            [str(verilog_path / "multiple_modules.v")],
+            "multi_module_two",
+            str(output_path / "two.json"),
+        ),
+    ]
+
+
+def test_synth_many(verilog_path, tmp_path):
+    """Test that the targets are synthesized, and skipped when they are up to date"""
+    targets = _targets(verilog_path, tmp_path)
+    results = synth_many(targets, jobs=2)
+    assert [result.target for result in results] == targets
+    assert [result.status for result in results] == [SynthesisResult.SYNTHESIZED] * 2
+    assert "module_one" in json.loads((tmp_path / "one.json").read_text())["modules"]
+    assert "multi_module_two" in json.loads((tmp_path / "two.json").read_text())["modules"]
+
+    results = synth_many(targets, jobs=2)
+    assert [result.status for result in results] == [SynthesisResult.UP_TO_DATE] * 2
+
+    (tmp_path / "two.json").write_text("{}")
+    results = synth_many(targets, jobs=1)
+    assert [result.status for result in results] == [
+        SynthesisResult.UP_TO_DATE,
+        SynthesisResult.SYNTHESIZED,
+    ]
+
+    results = synth_many(targets, force=True)
+    assert [result.status for result in results] == [SynthesisResult.SYNTHESIZED] * 2
+
+
+def test_synth_many_without_cache(verilog_path, tmp_path, monkeypatch):
+    """Test that the up to date check does not depend on the synthesis cache"""
+    targets = _targets(verilog_path, tmp_path)[:1]
+    results = synth_many(targets)
+    assert results[0].status == SynthesisResult.SYNTHESIZED
+    assert (tmp_path / "one.json.sha256").is_file()
+
+    monkeypatch.setenv("DIGSIM_SYNTH_CACHE", "0")
+    results = synth_many(targets)
+    assert results[0].status == SynthesisResult.UP_TO_DATE
+
+    (tmp_path / "one.json.sha256").unlink()
+    results = synth_many(targets)
+    assert results[0].status == SynthesisResult.SYNTHESIZED
+    results = synth_many(targets)
+    assert results[0].status == SynthesisResult.UP_TO_DATE
+
+
+def test_synth_many_error(verilog_path, tmp_path):
+    """Test that a failing target does not stop the other targets"""
+    targets = [
+        SynthesisTarget(
+            [str(verilog_path / "module_with_error.v")], "error_module", str(tmp_path / "e.json")
+        ),
+        *_targets(verilog_path, tmp_path),
+    ]
+    results = synth_many(targets, jobs=2)
+    assert not results[0].ok
+    assert "ERROR" in results[0].error
+    assert results[1].ok and results[2].ok
+
+
+def test_load_manifest(tmp_path):
+    """Test that the manifest paths are relative to the manifest folder"""
+    manifest_path = tmp_path / "synth.json"
+    manifest_path.write_text(
+        json.dumps(
+            {"targets": [{"input_files": ["a.v", "b.v"], "top": "top", "output_file": "o.json"}]}
+        )
+    )
+    assert load_manifest(manifest_path) == [
+        SynthesisTarget(
+            [str(tmp_path / "a.v"), str(tmp_path / "b.v")], "top", str(tmp_path / "o.json")
+        )
+    ]
+    manifest_path.write_text(json.dumps({"targets": [{"top": "top"}]}))
+    with pytest.raises(SynthesisException):
+        load_manifest(manifest_path)
+
+
+def test_synth_batch_cli(verilog_path, tmp_path):
+    """Test the batch subcommand"""
+    command = [sys.executable, "-m", "digsim.synth", "batch", "-j", "1"]
+    command += ["-T", "module_one", str(tmp_path / "one.json"), str(verilog_path / "one_module.v")]
+    result = subprocess.run(command, capture_output=True, text=True, check=False)
+    assert result.returncode == 0
+    assert "1 synthesized, 0 up to date, 0 failed" in result.stdout
+    result = subprocess.run(command, capture_output=True, text=True, check=False)
+    assert "0 synthesized, 1 up to date, 0 failed" in result.stdout
+
+
+def test_synth_batch_cli_profile(verilog_path, tmp_path):
+    """Test that the batch subcommand profile is used for the --target targets"""
+    command = [sys.executable, "-m", "digsim.synth", "batch", "-j", "1", "-p", "fast-sim"]
+    command += ["-T", "module_one", str(tmp_path / "one.json"), str(verilog_path / "one_module.v")]
+    result = subprocess.run(command, capture_output=True, text=True, check=False)
+    assert result.returncode == 0
+    assert "(fast-sim)" in result.stdout
+    assert "(faithful)" not in result.stdout
@@ -0,0 +1,133 @@
+# Copyright (c) Fredrik Andersson, 2023-2025
+# All rights reserved
+
+"""Pystest module to test the content-addressed synthesis cache"""
+
+import json
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from digsim.synth import Synthesis, SynthesisCache, SynthesisException, YosysWorkerPool
+
+
+@pytest.fixture
+def verilog_file():
+    """Fixture: get the path to a verilog module (relative, for yowasp-yosys)"""
+    test_path = Path(__file__).resolve().relative_to(Path.cwd())
+    return test_path.parent / "verilog" / "one_module.v"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Fixture: get an empty synthesis cache"""
+    return SynthesisCache(tmp_path / "cache")
+
+
+def test_synthesis_cache_hit(verilog_file, cache):
+    """Test that yosys is not executed when the synthesis result is in the cache"""
+    synthesis = Synthesis(str(verilog_file), "module_one", cache=cache)
+    netlist_dict = synthesis.synth_to_dict(silent=True)
+    modules = Synthesis.list_modules(str(verilog_file), cache=cache)
+    # The netlist, the cell counts and the module list
+    assert len(list(cache.cache_dir.glob("*.json"))) == 3
+
+    # Yosys cannot be executed with a closed worker pool
+    pool = YosysWorkerPool()
+    pool.close()
+    synthesis = Synthesis(str(verilog_file), "module_one", cache=cache, pool=pool)
+    assert synthesis.synth_to_dict(silent=True) == netlist_dict
+    assert "from cache" in synthesis.get_log()[0]
+    modules_from_cache = Synthesis.list_modules(str(verilog_file), cache=cache, pool=pool)
+    assert modules_from_cache == modules == ["module_one"]
+
+    # Another top module is another cache entry
+    with pytest.raises(SynthesisException):
+        Synthesis(str(verilog_file), "module_two", cache=cache, pool=pool).synth_to_json()
+
+
+def test_synthesis_cache_key(verilog_file, cache, tmp_path):
+    """Test that the cache key depends on the verilog source, the script and the yosys version"""
+    synthesis = Synthesis(str(verilog_file), "module_one", cache=cache)
+    assert synthesis.cache_key() == cache.key(
+        [str(verilog_file)], synthesis.synth_script(), Synthesis.yosys_version()
+    )
+
+    # A copy of the verilog file that can be modified
+    verilog_file = shutil.copy(verilog_file, tmp_path / "one_module.v")
+    key = cache.key([str(verilog_file)], "script", "yosys 1")
+    assert key == cache.key([str(verilog_file)], "script", "yosys 1")
+    assert key != cache.key([str(verilog_file)], "script", "yosys 2")
+    assert key != cache.key([str(verilog_file)], "another script", "yosys 1")
+    verilog_file.write_text(verilog_file.read_text() + "\n// Modified\n")
+    assert key != cache.key([str(verilog_file)], "script", "yosys 1")
+
+
+def test_synthesis_cache_invalidate(verilog_file, cache):
+    """Test the cache invalidation"""
+    synthesis = Synthesis(str(verilog_file), "module_one", cache=cache)
+    yosys_json = synthesis.synth_to_json(silent=True)
+    assert cache.get(synthesis.cache_key()) == yosys_json
+    synthesis.invalidate_cache()
+    assert cache.get(synthesis.cache_key()) is None
+
+    cache.put("a", json.dumps({}))
+    cache.put("b", json.dumps({}))
+    cache.invalidate()
+    assert cache.size() == 0
+
+
+def test_synthesis_cache_eviction(tmp_path):
+    """Test that the least recently used entries are removed"""
+    cache = SynthesisCache(tmp_path, max_size=25)
+    cache.put("a", "a" * 10)
+    cache.put("b", "b" * 10)
+    os.utime(tmp_path / "a.json", (1000, 1000))
+    os.utime(tmp_path / "b.json", (2000, 2000))
+    # The entry is used, "b" is the least recently used entry
+    assert cache.get("a") == "a" * 10
+    cache.put("c", "c" * 10)
+    assert cache.get("a") == "a" * 10
+    assert cache.get("b") is None
+    assert cache.get("c") == "c" * 10
+    assert cache.size() == 20
+
+
+def test_synthesis_cache_disabled(verilog_file, tmp_path, monkeypatch):
+    """Test that the default cache can be disabled with DIGSIM_SYNTH_CACHE=0"""
+    monkeypatch.setenv("DIGSIM_CACHE_DIR", str(tmp_path / "digsim"))
+    synthesis = Synthesis(str(verilog_file), "module_one")
+    synthesis.synth_to_json(silent=True)
+    assert len(list((tmp_path / "digsim" / "synth").glob("*.json"))) == 2
+
+    monkeypatch.setenv("DIGSIM_SYNTH_CACHE", "0")
+    synthesis = Synthesis(str(verilog_file), "module_one")
+    assert synthesis.cache_key() is None
+
+
+def test_synthesis_yosys_version(tmp_path, monkeypatch):
+    """Test that the yosys version is found without executing yosys"""
+
+    def run(*_, **__):
+        raise OSError("yosys executed")
+
+    monkeypatch.setattr(Synthesis, "_yosys_versions", {})
+    monkeypatch.setattr("digsim.synth._synthesis.subprocess.run", run)
+    yosys_exe = tmp_path / "yosys"
+    yosys_exe.write_bytes(b"yosys")
+    monkeypatch.setattr("digsim.synth._synthesis.find_yosys_executable", lambda: str(yosys_exe))
+    version = Synthesis.yosys_version()
+    assert str(yosys_exe) in version
+
+    # A changed executable is another version
+    Synthesis._yosys_versions.clear()
+    yosys_exe.write_bytes(b"yosys 2")
+    assert Synthesis.yosys_version() != version
+
+    # yosys -V is only used if the executable is not found
+    Synthesis._yosys_versions.clear()
+    yosys_exe.unlink()
+    with pytest.raises(SynthesisException):
+        Synthesis.yosys_version()
@@ -0,0 +1,63 @@
+# Copyright (c) Fredrik Andersson, 2023-2025
+# All rights reserved
+
+"""Pystest module to test the circuit trace callbacks"""
+
+from digsim.circuit import Circuit
+from digsim.circuit.components import NOT, Bus2Wires, PushButton
+
+
+def _button_circuit():
+    circuit = Circuit()
+    button = PushButton(circuit)
+    inverter = NOT(circuit)
+    button.O.wire = inverter.A
+    circuit.init()
+    circuit.run(ms=1)
+    return circuit, button, inverter
+
+
+def test_trace_callback():
+    """Test that the trace callback gets immediate value changes and events"""
+    circuit, button, inverter = _button_circuit()
+    changes = []
+
+    def trace(port, time_ns):
+        changes.append((port, port.value, time_ns))
+
+    circuit.add_trace_callback(trace)
+    button.push()
+    assert changes == [(button.O, 1, 1_000_000)]
+    circuit.run(ms=1)
+    assert changes[1:] == [(inverter.Y, 0, 1_000_001)]
+
+    circuit.remove_trace_callback(trace)
+    button.release()
+    circuit.run(ms=1)
+    assert len(changes) == 2
+
+
+def test_trace_no_callbacks():
+    """Test that no wave events are added without trace callbacks"""
+    circuit, button, _ = _button_circuit()
+    button.push()
+    assert not circuit.has_pending_event(button.O)
+
+    bus_to_wires = Bus2Wires(circuit, width=4)
+    circuit.init()
+    bus_to_wires.bus.value = 5
+    assert not circuit.has_pending_event(bus_to_wires.bus)
+
+
+def test_trace_vcd(tmp_path):
+    """Test that the immediate value changes are written to the vcd file"""
+    vcd_path = tmp_path / "trace.vcd"
+    circuit, button, _ = _button_circuit()
+    circuit.vcd(str(vcd_path))
+    circuit.run(ms=1)
+    button.push()
+    circuit.run(ms=1)
+    circuit.vcd_close()
+    vcd_lines = vcd_path.read_text(encoding="utf-8").splitlines()
+    assert "#2000000" in vcd_lines
+    assert "#2000001" in vcd_lines
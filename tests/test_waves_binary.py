@@ -0,0 +1,191 @@
+# Copyright (c) Fredrik Andersson, 2023-2025
+# All rights reserved
+
+"""Pystest module to test the DigSim waveform format"""
+
+import subprocess
+import sys
+
+import pytest
+
+from digsim.circuit import (
+    BinaryWavesReader,
+    BinaryWavesWriter,
+    WavesFormatException,
+    binary_waves_to_vcd,
+)
+from digsim.circuit._circuit import CircuitError
+
+
+def _record(circuit, counter, filename=None):
+    """Run the circuit, return the counter output changes seen by a trace callback"""
+    changes = []
+
+    def trace(_, time_ns):
+        if changes and changes[-1][0] == time_ns:
+            changes.pop()
+        if not changes or changes[-1][1] != counter.Q.value:
+            changes.append((time_ns, counter.Q.value))
+
+    if filename is not None:
+        circuit.vcd(str(filename), max_depth=1)
+        circuit.init()
+    circuit.add_trace_callback(trace)
+    circuit.run(ms=25)
+    circuit.vcd_close()
+    return changes
+
+
+@pytest.mark.parametrize("block_size", [3, 65536])
+def test_binary_waves_changes(counter_circuit, tmp_path, block_size):
+    """Test the signal changes and sampling read from a waveform file"""
+    circuit, _, counter = counter_circuit(init=False)
+    writer = BinaryWavesWriter(str(tmp_path / "counter.dsw"), block_size=block_size, max_depth=1)
+    circuit.init()
+    writer.init([port for component in circuit.components for port in component.ports])
+    circuit.add_trace_callback(writer.write)
+    reference = _record(circuit, counter)
+    writer.close()
+
+    with BinaryWavesReader(str(tmp_path / "counter.dsw")) as reader:
+        assert "counter.Q" in reader.signals
+        assert "counter.gates.VDD.O" not in reader.signals
+        assert reader.width("counter.Q") == 4
+        times, values = reader.changes("counter.Q")
+        assert list(zip(times, values))[-len(reference) :] == reference
+        for time_ns, value in reference:
+            assert reader.value_at("counter.Q", time_ns) == value
+            assert reader.value_at("counter.Q", time_ns + 1000) == value
+        assert reader.sample("counter.Q", [t + 1 for t, _ in reference]) == [
+            v for _, v in reference
+        ]
+        assert reader.value_at("clk.O", -1) == "X"
+
+
+def test_binary_waves_to_vcd(counter_circuit, tmp_path):
+    """Test that the converted vcd file is the same as a vcd file written directly"""
+    circuit, _, counter = counter_circuit(init=False)
+    _record(circuit, counter, tmp_path / "counter.vcd")
+    circuit, _, counter = counter_circuit(init=False)
+    _record(circuit, counter, tmp_path / "counter.dsw")
+    binary_waves_to_vcd(str(tmp_path / "counter.dsw"), str(tmp_path / "converted.vcd"))
+
+    def vcd_body(path):
+        """Get the last value per variable and timestamp"""
+        lines = path.read_text(encoding="utf-8").splitlines()
+        body = {}
+        timestamp = None
+        for line in lines[lines.index("$enddefinitions $end") + 1 :]:
+            if line.startswith("#"):
+                timestamp = int(line[1:])
+            elif line.startswith("b"):
+                value, var = line.split()
+                body.setdefault(timestamp, {})[var] = value[1:]
+            elif not line.startswith("$"):
+                body.setdefault(timestamp, {})[line[1:]] = line[0]
+        return body
+
+    assert vcd_body(tmp_path / "converted.vcd") == vcd_body(tmp_path / "counter.vcd")
+
+
+def test_binary_waves_errors(counter_circuit, tmp_path):
+    """Test the waveform reader exceptions"""
+    not_waves = tmp_path / "not_waves.dsw"
+    not_waves.write_bytes(b"not a waveform file, not a waveform file")
+    with pytest.raises(WavesFormatException):
+        BinaryWavesReader(str(not_waves))
+
+    circuit, _, counter = counter_circuit(init=False)
+    _record(circuit, counter, tmp_path / "counter.dsw")
+    with BinaryWavesReader(str(tmp_path / "counter.dsw")) as reader:
+        with pytest.raises(WavesFormatException):
+            reader.changes("counter.unknown")
+
+
+def _decimate_reference(times, values, start_ns, stop_ns, buckets):
+    """Decimate all changes, one bucket at a time"""
+    decimated = [(start_ns, "X", 0)]
+    for time_ns, value in zip(times, values):
+        if time_ns <= start_ns:
+            decimated[0] = (start_ns, value, 0)
+        elif time_ns <= stop_ns:
+            bucket = (time_ns - start_ns) * buckets // (stop_ns - start_ns)
+            if len(decimated) > 1 and decimated[-1][0] == bucket:
+                decimated[-1] = (bucket, decimated[-1][1], value, decimated[-1][3] + 1)
+            else:
+                decimated.append((bucket, time_ns, value, 1))
+    return [decimated[0]] + [(time_ns, value, count) for _, time_ns, value, count in decimated[1:]]
+
+
+@pytest.mark.parametrize("block_size", [4, 65536])
+@pytest.mark.parametrize(
+    "start_ns,stop_ns,buckets",
+    [
+        (0, 25_000_000, 1),
+        (0, 25_000_000, 7),
+        (0, 25_000_000, 100_000),
+        (3_000_000, 7_500_000, 3),
+        (3_500_001, 3_600_000, 10),
+    ],
+)
+def test_binary_waves_decimate(counter_circuit, tmp_path, block_size, start_ns, stop_ns, buckets):
+    """Test the level-of-detail decimation"""
+    circuit, _, _ = counter_circuit(init=False)
+    writer = BinaryWavesWriter(str(tmp_path / "counter.dsw"), block_size=block_size, max_depth=1)
+    circuit.init()
+    writer.init([port for component in circuit.components for port in component.ports])
+    circuit.add_trace_callback(writer.write)
+    circuit.run(ms=25)
+    writer.close()
+
+    with BinaryWavesReader(str(tmp_path / "counter.dsw")) as reader:
+        for signal in ["clk.O", "counter.Q"]:
+            times, values = reader.changes(signal)
+            assert reader.decimate(signal, start_ns, stop_ns, buckets) == _decimate_reference(
+                times, values, start_ns, stop_ns, buckets
+            )
+
+
+def test_binary_waves_reader_snapshot(counter_circuit, tmp_path):
+    """Test reading the waves collected so far, while the waveform file is written"""
+    circuit, _, counter = counter_circuit(init=False)
+    circuit.vcd(str(tmp_path / "counter.dsw"), max_depth=1)
+    circuit.init()
+    circuit.run(ms=5)
+    with circuit.waves_reader() as reader:
+        assert reader.changes("counter.Q")[1][-1] == 5
+    circuit.run(ms=5)
+    with circuit.waves_reader() as reader:
+        assert reader.changes("counter.Q")[1][-1] == 0
+        assert reader.value_at("counter.Q", 5_000_000) == 5
+        assert reader.time_range == (0, 10_000_000)
+    circuit.vcd_close()
+
+    circuit.vcd(str(tmp_path / "counter.vcd"))
+    with pytest.raises(CircuitError):
+        circuit.waves_reader()
+    circuit.vcd_close()
+
+
+def test_binary_waves_exit_without_close(tmp_path):
+    """Test that the waveform file is completed at exit if it is not closed"""
+    dsw_path = tmp_path / "exit.dsw"
+    script = (
+        "import sys\n"
+        "from digsim.circuit import Circuit\n"
+        "from digsim.circuit.components import PushButton\n"
+        "circuit = Circuit()\n"
+        "button = PushButton(circuit, 'button')\n"
+        "circuit.vcd(sys.argv[1])\n"
+        "circuit.init()\n"
+        "for _ in range(10):\n"
+        "    button.push()\n"
+        "    circuit.run(ms=1)\n"
+        "    button.release()\n"
+        "    circuit.run(ms=1)\n"
+    )
+    subprocess.run([sys.executable, "-c", script, str(dsw_path)], check=True, timeout=60)
+    with BinaryWavesReader(str(dsw_path)) as reader:
+        times, values = reader.changes("button.O")
+    assert times[-1] == 19000000
+    assert values[-1] == 0
@@ -0,0 +1,100 @@
+# Copyright (c) Fredrik Andersson, 2023-2025
+# All rights reserved
+
+"""Pystest module to test the trigger gated wave collection"""
+
+import pytest
+
+from digsim.circuit import BinaryWavesReader, WavesTrigger, WavesTriggerException
+
+
+def _record(counter_circuit, tmp_path, trigger_func):
+    circuit, _, counter = counter_circuit(init=False)
+    waves_path = tmp_path / "trigger.dsw"
+    trigger = trigger_func(counter)
+    circuit.vcd(str(waves_path), max_depth=1, trigger=trigger)
+    circuit.init()
+    circuit.run(ms=20)
+    circuit.vcd_close()
+    with BinaryWavesReader(str(waves_path)) as reader:
+        return trigger, list(zip(*reader.changes("counter.Q"))), reader.changes("clk.O")[0]
+
+
+@pytest.mark.parametrize(
+    "pre_trigger_ns,expected_changes",
+    [
+        (0, [(4500001, 5), (5500001, 6), (6500001, 7), (7500001, 8)]),
+        (1_000_000, [(3500001, 4), (4500001, 5), (5500001, 6), (6500001, 7), (7500001, 8)]),
+    ],
+)
+def test_waves_trigger_port_values(counter_circuit, tmp_path, pre_trigger_ns, expected_changes):
+    """Test that waves are only written between the start and stop port values"""
+    trigger, changes, clk_times = _record(
+        counter_circuit,
+        tmp_path,
+        lambda counter: WavesTrigger(
+            start_port=counter.Q,
+            start_value=5,
+            stop_port=counter.Q,
+            stop_value=8,
+            pre_trigger_ns=pre_trigger_ns,
+        ),
+    )
+    assert changes == expected_changes
+    assert trigger.state == WavesTrigger.STOPPED
+    assert trigger.start_time_ns == 4500001
+    assert trigger.stop_time_ns == 7500001
+    assert clk_times[0] == expected_changes[0][0]
+    assert clk_times[-1] <= 7500001
+
+
+def test_waves_trigger_time(counter_circuit, tmp_path):
+    """Test the start and stop time trigger"""
+    _, changes, clk_times = _record(
+        counter_circuit, tmp_path, lambda _: WavesTrigger(start_ns=10_000_000, stop_ns=12_000_000)
+    )
+    assert changes == [(10_000_000, 0), (10500001, 1), (11500001, 2)]
+    assert clk_times[0] == 10_000_000
+    assert clk_times[-1] == 12_000_000
+
+
+def test_waves_trigger_ring_overflow(counter_circuit, tmp_path):
+    """Test that the pre-trigger window is limited by the ring buffer size"""
+    trigger, changes, _ = _record(
+        counter_circuit,
+        tmp_path,
+        lambda counter: WavesTrigger(
+            start_port=counter.Q, start_value=5, pre_trigger_ns=10_000_000, pre_trigger_changes=4
+        ),
+    )
+    assert trigger.state == WavesTrigger.RECORDING
+    assert changes[0][0] > 0
+    assert (4500001, 5) in changes
+
+
+def test_waves_trigger_errors(counter_circuit):
+    """Test the waves trigger exceptions"""
+    _, _, counter = counter_circuit(init=False)
+    with pytest.raises(WavesTriggerException):
+        WavesTrigger(start_port=counter.Q)
+    with pytest.raises(WavesTriggerException):
+        WavesTrigger(stop_value=1)
+
+
+def test_waves_trigger_vcd(counter_circuit, tmp_path):
+    """Test the start and stop trigger with a vcd file"""
+    circuit, _, counter = counter_circuit(init=False)
+    vcd_path = tmp_path / "trigger.vcd"
+    trigger = WavesTrigger(start_port=counter.Q, start_value=5, stop_ns=6_000_000)
+    circuit.vcd(str(vcd_path), max_depth=1, trigger=trigger)
+    circuit.init()
+    circuit.run(ms=10)
+    circuit.vcd_close()
+    timestamps = [
+        int(line[1:])
+        for line in vcd_path.read_text(encoding="utf-8").splitlines()
+        if line.startswith("#")
+    ]
+    # The vcd writer dumps the variables as "x" at #0
+    assert timestamps[:2] == [0, 4500001]
+    assert timestamps[-1] == 6_000_000
@@ -0,0 +1,127 @@
+# Copyright (c) Fredrik Andersson, 2023-2025
+# All rights reserved
+
+"""Pystest module to test the buffered vcd writer"""
+
+import subprocess
+import sys
+import time
+
+import pytest
+
+from digsim.circuit import Circuit
+from digsim.circuit.components import NOT, IntegratedCircuit, PushButton
+
+
+def _run_button_circuit(vcd_path, flush_interval):
+    circuit = Circuit()
+    button = PushButton(circuit)
+    inverter = NOT(circuit)
+    button.O.wire = inverter.A
+    circuit.vcd(str(vcd_path), flush_interval=flush_interval)
+    circuit.init()
+    for _ in range(10):
+        button.push()
+        circuit.run(ms=1)
+        button.release()
+        circuit.run(ms=1)
+    return circuit
+
+
+def test_waves_writer_close(tmp_path):
+    """Test that all buffered value changes are written when the vcd file is closed"""
+    vcd_path = tmp_path / "close.vcd"
+    circuit = _run_button_circuit(vcd_path, flush_interval=60)
+    assert "#19000001" not in vcd_path.read_text(encoding="utf-8").splitlines()
+    circuit.vcd_close()
+    assert "#19000001" in vcd_path.read_text(encoding="utf-8").splitlines()
+
+
+def test_waves_writer_flush_interval(tmp_path):
+    """Test that the buffered value changes are written by the writer thread"""
+    vcd_path = tmp_path / "interval.vcd"
+    circuit = _run_button_circuit(vcd_path, flush_interval=0.01)
+    for _ in range(100):
+        if "#19000001" in vcd_path.read_text(encoding="utf-8").splitlines():
+            break
+        time.sleep(0.01)
+    assert "#19000001" in vcd_path.read_text(encoding="utf-8").splitlines()
+    circuit.vcd_close()
+
+
+def test_waves_writer_exit_without_close(tmp_path):
+    """Test that the buffered value changes are written at exit if the file is not closed"""
+    vcd_path = tmp_path / "exit.vcd"
+    script = (
+        "import sys\n"
+        "from digsim.circuit import Circuit\n"
+        "from digsim.circuit.components import NOT, PushButton\n"
+        "circuit = Circuit()\n"
+        "button = PushButton(circuit)\n"
+        "button.O.wire = NOT(circuit).A\n"
+        "circuit.vcd(sys.argv[1], flush_interval=60)\n"
+        "circuit.init()\n"
+        "for _ in range(10):\n"
+        "    button.push()\n"
+        "    circuit.run(ms=1)\n"
+        "    button.release()\n"
+        "    circuit.run(ms=1)\n"
+    )
+    subprocess.run([sys.executable, "-c", script, str(vcd_path)], check=True, timeout=60)
+    timestamps = [
+        line for line in vcd_path.read_text(encoding="utf-8").splitlines() if line[:1] == "#"
+    ]
+    assert timestamps[-1] == "#19000001"
+
+
+def _vcd_ports(vcd_path):
+    """Get the registered '<scope path>.<name>' in a vcd file"""
+    ports = []
+    scope = []
+    for line in vcd_path.read_text(encoding="utf-8").splitlines():
+        fields = line.split()
+        if fields[:1] == ["$scope"]:
+            scope.append(fields[2])
+        elif fields[:1] == ["$upscope"]:
+            scope.pop()
+        elif fields[:1] == ["$var"]:
+            ports.append(".".join([*scope, fields[4]]))
+    return ports
+
+
+@pytest.mark.parametrize(
+    "vcd_filter,expected_ports,unexpected_ports",
+    [
+        ({"max_depth": 1}, ["counter.Q", "clk.O"], ["counter.gates.290__MUX_.Y"]),
+        (
+            {"include": ["counter.*"]},
+            ["counter.Q", "counter.Clk"],
+            ["clk.O", "counter.gates.VDD.O"],
+        ),
+        ({"include": ["counter.*"], "exclude": ["*.Clk"]}, ["counter.Q"], ["counter.Clk"]),
+        ({"include": ["counter.**.Y"]}, ["counter.gates.290__MUX_.Y"], ["counter.gates.VDD.O"]),
+        ({"exclude": ["counter.gates.**"]}, ["counter.Q", "clk.O"], ["counter.gates.VDD.O"]),
+    ],
+)
+def test_waves_writer_filter(tmp_path, vcd_filter, expected_ports, unexpected_ports):
+    """Test the vcd port filters"""
+    vcd_path = tmp_path / "filter.vcd"
+    circuit = Circuit()
+    clk = PushButton(circuit, "clk")
+    counter = IntegratedCircuit(circuit, ic_name="74162")
+    counter.set_name("counter")
+    clk.O.wire = counter.Clk
+    circuit.vcd(str(vcd_path), **vcd_filter)
+    circuit.init()
+    for _ in range(5):
+        clk.push()
+        circuit.run(ms=1)
+        clk.release()
+        circuit.run(ms=1)
+    circuit.vcd_close()
+
+    ports = _vcd_ports(vcd_path)
+    for port in expected_ports:
+        assert port in ports
+    for port in unexpected_ports:
+        assert port not in ports
@@ -0,0 +1,136 @@
+# Copyright (c) Fredrik Andersson, 2023-2025
+# All rights reserved
+
+"""Pystest module to test functionality of the bit-parallel yosys netlist evaluator"""
+
+import json
+import random
+from pathlib import Path
+
+import pytest
+
+from digsim.circuit import Circuit
+from digsim.circuit.components import (
+    BitParallelException,
+    BitParallelNetlist,
+    IntegratedCircuit,
+)
+from digsim.circuit.components._yosys_levelized import COMBINATIONAL_CELLS, LevelizedNetlist
+from digsim.synth import Synthesis
+from digsim.utils import YosysNetlist
+
+
+TOP_PATH = Path(__file__).parent.parent
+IC_7448_NETLIST = TOP_PATH / "src/digsim/circuit/components/ic/7448.json"
+IC_74162_NETLIST = TOP_PATH / "src/digsim/circuit/components/ic/74162.json"
+ALU_VERILOG = TOP_PATH / "examples/pytest_tb/alu.v"
+
+
+def _load_netlist(path):
+    with open(path, encoding="utf-8") as json_file:
+        return YosysNetlist(**json.load(json_file))
+
+
+def test_bitparallel_7448():
+    """Test all input vectors for the 7448 BCD to 7-segment decoder against the event engine"""
+    netlist = BitParallelNetlist(_load_netlist(IC_7448_NETLIST))
+    assert netlist.inputs == {"bcd": 4, "lt": 1}
+    vectors = {"bcd": [bcd for bcd in range(16) for _ in range(2)], "lt": [0, 1] * 16}
+    outputs = netlist.evaluate(vectors)
+
+    circuit = Circuit()
+    ic = IntegratedCircuit(circuit, ic_name="7448")
+    circuit.init()
+    for index, (bcd, lt) in enumerate(zip(vectors["bcd"], vectors["lt"])):
+        ic.bcd.value = bcd
+        ic.lt.value = lt
+        circuit.run(ms=1)
+        for segment in "abcdefg":
+            assert outputs[segment][index] == ic.port(segment).value
+
+
+def _all_cells_netlist():
+    """Create a netlist with one cell of each combinational cell type"""
+    cells = {}
+    ports = {"I": {"direction": "input", "bits": list(range(2, 22))}}
+    output_bits = []
+    for cell_id, (cell_type, (input_ports, _)) in enumerate(COMBINATIONAL_CELLS.items()):
+        output_bit = 100 + cell_id
+        connections = {port: [2 + index] for index, port in enumerate(input_ports)}
+        connections["Y"] = [output_bit]
+        port_directions = {port: "input" for port in input_ports}
+        port_directions["Y"] = "output"
+        cells[f"cell{cell_id}"] = {
+            "type": cell_type,
+            "port_directions": port_directions,
+            "connections": connections,
+        }
+        output_bits.append(output_bit)
+    ports["Y"] = {"direction": "output", "bits": output_bits}
+    return YosysNetlist(**{"modules": {"all_cells": {"ports": ports, "cells": cells}}})
+
+
+def test_bitparallel_all_cells():
+    """Test all combinational cells against the levelized engine"""
+    yosys_netlist = _all_cells_netlist()
+    netlist = BitParallelNetlist(yosys_netlist)
+    rnd = random.Random(5)
+    vectors = [rnd.getrandbits(20) for _ in range(500)]
+    outputs = netlist.evaluate({"I": vectors})
+
+    levelized_netlist = LevelizedNetlist(yosys_netlist.modules["all_cells"])
+    levelized_netlist.reset()
+    for index, vector in enumerate(vectors):
+        levelized_netlist.set_inputs({"I": vector})
+        assert outputs["Y"][index] == levelized_netlist.output_values()["Y"]
+
+
+def _alu_model(op, a, b):
+    """Python model of the example ALU"""
+    if op == 0:
+        return (a + b) & 0xFF
+    if op == 1:
+        return (a - b) & 0xFF
+    if op == 2:
+        return a & b
+    if op == 3:
+        return a | b
+    if op == 4:
+        return a ^ b
+    if not 1 <= b <= 7:
+        # Shift 1-7 bits, otherwise 0
+        return 0
+    if op == 5:
+        return (a << b) & 0xFF
+    if op == 6:
+        return a >> b
+    sign = 0xFF if a & 0x80 else 0
+    return ((a | (sign << 8)) >> b) & 0xFF
+
+
+def test_bitparallel_alu():
+    """Test the example ALU with random input vectors"""
+    synthesis = Synthesis(str(ALU_VERILOG), "alu")
+    netlist = BitParallelNetlist(YosysNetlist(**synthesis.synth_to_dict(silent=True)))
+    rnd = random.Random(8)
+    vectors = {
+        "op": [rnd.randrange(8) for _ in range(2000)],
+        "A": [rnd.randrange(256) for _ in range(2000)],
+        "B": [rnd.choice([rnd.randrange(10), rnd.randrange(256)]) for _ in range(2000)],
+    }
+    outputs = netlist.evaluate(vectors)
+    for index, (op, a, b) in enumerate(zip(vectors["op"], vectors["A"], vectors["B"])):
+        assert outputs["O"][index] == _alu_model(op, a, b), (op, a, b)
+
+
+def test_bitparallel_errors():
+    """Test the bit-parallel evaluator exceptions"""
+    with pytest.raises(BitParallelException):
+        BitParallelNetlist(_load_netlist(IC_74162_NETLIST))
+
+    netlist = BitParallelNetlist(_load_netlist(IC_7448_NETLIST))
+    assert netlist.evaluate({"bcd": [], "lt": []}) == {segment: [] for segment in "abcdefg"}
+    with pytest.raises(BitParallelException):
+        netlist.evaluate({"bcd": [1, 2]})
+    with pytest.raises(BitParallelException):
+        netlist.evaluate({"bcd": [1, 2], "lt": [1]})
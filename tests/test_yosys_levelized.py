@@ -0,0 +1,236 @@
+# Copyright (c) Fredrik Andersson, 2023-2025
+# All rights reserved
+
+"""Pystest module to test functionality of the levelized and compiled yosys engines"""
+
+import json
+import random
+from pathlib import Path
+
+import pytest
+
+from digsim.circuit import Circuit
+from digsim.circuit.components import (
+    YosysComponent,
+    YosysComponentException,
+    _yosys_compiled,
+    _yosys_component,
+)
+from digsim.circuit.components._yosys_numpy import YosysNumpyCore, numpy_available
+from digsim.utils import YosysNetlist
+
+
+IC_74162_NETLIST = Path(__file__).parent.parent / "src/digsim/circuit/components/ic/74162.json"
+COUNTER_NETLIST = Path(__file__).parent.parent / "examples/yosys_counter/counter.json"
+
+LEVELIZED_ENGINES = [
+    "levelized",
+    "compiled",
+    pytest.param(
+        "numpy", marks=pytest.mark.skipif(not numpy_available(), reason="numpy not installed")
+    ),
+]
+
+
+@pytest.fixture(autouse=True)
+def compiled_cache(tmp_path, monkeypatch):
+    """Use a temporary cache folder for the compiled netlists"""
+    monkeypatch.setenv("DIGSIM_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(_yosys_compiled, "_STEP_FUNCTIONS", {})
+    return tmp_path / "compiled"
+
+
+def _create_component(netlist_dict, yosys_engine):
+    circuit = Circuit(yosys_engine=yosys_engine)
+    comp = YosysComponent(circuit)
+    comp.create_from_netlist(YosysNetlist(**netlist_dict))
+    circuit.init()
+    return circuit, comp
+
+
+def _load_netlist(path):
+    with open(path, encoding="utf-8") as json_file:
+        return json.load(json_file)
+
+
+def _clock(circuit, clock_port):
+    clock_port.value = 1
+    circuit.run(ms=1)
+    clock_port.value = 0
+    circuit.run(ms=1)
+
+
+@pytest.mark.parametrize("engine", LEVELIZED_ENGINES)
+def test_levelized_engine_74162(engine):
+    """Test the 74162 decade counter with the levelized engines against the event engine"""
+    netlist_dict = _load_netlist(IC_74162_NETLIST)
+    circuits = [_create_component(netlist_dict, engine) for engine in ["event", engine]]
+    assert circuits[0][1].engine == "event"
+    assert circuits[1][1].engine == engine
+
+    rnd = random.Random(74162)
+    for _ in range(200):
+        stimuli = {
+            "Clear_bar": rnd.choice([0, 1, 1, 1]),
+            "Load_bar": rnd.choice([0, 1, 1, 1]),
+            "ENT": rnd.choice([0, 1, 1]),
+            "ENP": rnd.choice([0, 1, 1]),
+            "D": rnd.randint(0, 15),
+        }
+        for circuit, comp in circuits:
+            for portname, value in stimuli.items():
+                comp.port(portname).value = value
+            circuit.run(ms=1)
+            _clock(circuit, comp.Clk)
+        assert circuits[0][1].Q.value == circuits[1][1].Q.value
+        assert circuits[0][1].RCO.value == circuits[1][1].RCO.value
+
+
+@pytest.mark.parametrize("engine", LEVELIZED_ENGINES)
+def test_levelized_engine_async_reset(engine):
+    """Test the counter with asynchronous reset with the levelized engines"""
+    circuit, comp = _create_component(_load_netlist(COUNTER_NETLIST), engine)
+    assert comp.engine == engine
+
+    comp.up.value = 1
+    comp.clk.value = 0
+    comp.reset.value = 1
+    circuit.run(ms=1)
+    assert comp.cnt.value == 0
+    comp.reset.value = 0
+    circuit.run(ms=1)
+
+    for count in range(1, 20):
+        _clock(circuit, comp.clk)
+        assert comp.cnt.value == count % 16
+
+    # Asynchronous reset without clock
+    comp.reset.value = 1
+    circuit.run(ms=1)
+    assert comp.cnt.value == 0
+    _clock(circuit, comp.clk)
+    assert comp.cnt.value == 0
+
+
+@pytest.mark.parametrize("engine", LEVELIZED_ENGINES)
+def test_levelized_engine_fallback_latch(engine):
+    """Test that a netlist with a latch falls back to the event engine"""
+    netlist_dict = {
+        "modules": {
+            "latch": {
+                "ports": {
+                    "D": {"direction": "input", "bits": [2]},
+                    "E": {"direction": "input", "bits": [3]},
+                    "Q": {"direction": "output", "bits": [4]},
+                },
+                "cells": {
+                    "latch": {
+                        "type": "$_DLATCH_P_",
+                        "port_directions": {"D": "input", "E": "input", "Q": "output"},
+                        "connections": {"D": [2], "E": [3], "Q": [4]},
+                    }
+                },
+            }
+        }
+    }
+    circuit, comp = _create_component(netlist_dict, engine)
+    assert comp.engine == "event"
+    comp.D.value = 1
+    comp.E.value = 1
+    circuit.run(ms=1)
+    assert comp.Q.value == 1
+
+
+@pytest.mark.parametrize("engine", LEVELIZED_ENGINES)
+def test_levelized_engine_fallback_loop(engine):
+    """Test that a netlist with a combinational loop falls back to the event engine"""
+    netlist_dict = {
+        "modules": {
+            "sr": {
+                "ports": {
+                    "S": {"direction": "input", "bits": [2]},
+                    "R": {"direction": "input", "bits": [3]},
+                    "Q": {"direction": "output", "bits": [4]},
+                },
+                "cells": {
+                    "nor_s": {
+                        "type": "$_NOR_",
+                        "port_directions": {"A": "input", "B": "input", "Y": "output"},
+                        "connections": {"A": [2], "B": [4], "Y": [5]},
+                    },
+                    "nor_r": {
+                        "type": "$_NOR_",
+                        "port_directions": {"A": "input", "B": "input", "Y": "output"},
+                        "connections": {"A": [3], "B": [5], "Y": [4]},
+                    },
+                },
+            }
+        }
+    }
+    circuit, comp = _create_component(netlist_dict, engine)
+    assert comp.engine == "event"
+    comp.S.value = 1
+    comp.R.value = 0
+    circuit.run(ms=1)
+    comp.S.value = 0
+    circuit.run(ms=1)
+    assert comp.Q.value == 1
+
+
+def test_compiled_engine_cache(compiled_cache):
+    """Test that the generated source is cached on disk and reused"""
+    netlist_dict = _load_netlist(COUNTER_NETLIST)
+    _create_component(netlist_dict, "compiled")
+    cached_files = list(compiled_cache.glob("*.py"))
+    assert len(cached_files) == 1
+    assert "def step(" in cached_files[0].read_text(encoding="utf-8")
+
+    # Load from the disk cache, the source is not generated again
+    _yosys_compiled._STEP_FUNCTIONS.clear()
+    cached_files[0].write_text(
+        cached_files[0].read_text(encoding="utf-8") + "CACHED = True\n", encoding="utf-8"
+    )
+    _, comp = _create_component(netlist_dict, "compiled")
+    assert comp.engine == "compiled"
+    digest = _yosys_compiled.netlist_hash(YosysNetlist(**netlist_dict).modules["counter"])
+    assert _yosys_compiled._STEP_FUNCTIONS[digest]["CACHED"]
+
+
+def test_compiled_engine_broken_cache(compiled_cache):
+    """Test that a partially written cache file is regenerated"""
+    netlist_dict = _load_netlist(COUNTER_NETLIST)
+    _create_component(netlist_dict, "compiled")
+    cached_file = list(compiled_cache.glob("*.py"))[0]
+    source = cached_file.read_text(encoding="utf-8")
+
+    for broken_source in [source[: len(source) // 2], source[: source.index("def step(")]]:
+        _yosys_compiled._STEP_FUNCTIONS.clear()
+        cached_file.write_text(broken_source, encoding="utf-8")
+        _, comp = _create_component(netlist_dict, "compiled")
+        assert comp.engine == "compiled"
+        assert cached_file.read_text(encoding="utf-8") == source
+    assert list(compiled_cache.iterdir()) == [cached_file]
+
+
+@pytest.mark.skipif(not numpy_available(), reason="numpy not installed")
+def test_numpy_engine_netlist():
+    """Test the NumPy arrays for the 74162 netlist"""
+    circuit, _ = _create_component(_load_netlist(IC_74162_NETLIST), "numpy")
+    core = [comp for comp in circuit.components if isinstance(comp, YosysNumpyCore)][0]
+    netlist = core.netlist
+    assert len(netlist.cell_types) == len(netlist.cell_outputs) == len(netlist.cell_levels)
+    assert netlist.levels == netlist.cell_levels.max() + 1
+    assert netlist.cell_inputs.shape[0] == len(netlist.cell_types)
+
+
+def test_numpy_engine_not_available(monkeypatch):
+    """Test that the numpy engine raises an exception if numpy is not installed"""
+    monkeypatch.setattr(_yosys_component, "numpy_available", lambda: False)
+    with pytest.raises(YosysComponentException):
+        _create_component(_load_netlist(COUNTER_NETLIST), "numpy")
+
+
+def test_levelized_engine_unknown():
+    """Test that an unknown yosys engine raises an exception"""
+    with pytest.raises(YosysComponentException):
+        _create_component(_load_netlist(COUNTER_NETLIST), "unknown")
@@ -7,6 +7,8 @@ from pathlib import Path
 
 import pytest
 
+from digsim.circuit import Circuit
+from digsim.circuit.components import PushButton, YosysComponent
 from digsim.synth import Synthesis, SynthesisException
 
 
@@ -81,3 +83,45 @@ def test_yosys_synth_module_with_error(verilog_path):
 
     with pytest.raises(SynthesisException):
         synthesis.synth_to_dict()
+
+
+def test_yosys_synth_profiles(verilog_path):
+    """test the cell counts of the synthesis profiles"""
+    synthesis = Synthesis(str(verilog_path / "redundant_module.v"), "redundant_module")
+    assert synthesis.cell_counts() == (None, None)
+    synthesis.synth_to_dict(silent=True)
+    assert synthesis.cell_counts() == (5, 5)
+
+    synthesis = Synthesis(
+        str(verilog_path / "redundant_module.v"), "redundant_module", profile="fast-sim"
+    )
+    netlist_dict = synthesis.synth_to_dict(silent=True)
+    assert synthesis.cell_counts() == (5, 3)
+    assert len(netlist_dict["modules"]["redundant_module"]["cells"]) == 3
+
+    with pytest.raises(SynthesisException):
+        Synthesis(str(verilog_path / "redundant_module.v"), "redundant_module", profile="none")
+
+
+@pytest.mark.parametrize("profile", ["faithful", "fast-sim"])
+def test_yosys_component_profile(verilog_path, profile):
+    """test that the synthesis profiles simulate the same function"""
+    circuit = Circuit()
+    component = YosysComponent(
+        circuit, path=str(verilog_path / "redundant_module.v"), profile=profile
+    )
+    buttons = [PushButton(circuit, portname) for portname in ["a", "b", "c"]]
+    for button in buttons:
+        button.O.wire = component.port(button.name())
+    circuit.init()
+    assert component.settings_to_dict()["profile"] == profile
+    for value in range(8):
+        for bit, button in enumerate(buttons):
+            if value & (1 << bit):
+                button.push()
+            else:
+                button.release()
+        circuit.run(ms=1)
+        expected = 1 if value & 1 and value & 6 else 0
+        assert component.y.value == expected
+        assert component.z.value == expected
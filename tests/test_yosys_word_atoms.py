@@ -0,0 +1,171 @@
+# Copyright (c) Fredrik Andersson, 2023-2025
+# All rights reserved
+
+"""Pystest module to test the word-level yosys atoms"""
+
+import random
+from pathlib import Path
+
+import pytest
+
+from digsim.circuit import Circuit
+from digsim.circuit.components import YosysComponent, _yosys_word_atoms
+from digsim.synth import WORD_LEVEL_CELLS, Synthesis
+from digsim.utils import YosysCell
+
+
+@pytest.fixture
+def verilog_path(tmp_path, monkeypatch):
+    """Fixture: get path to verilog modules, with an empty synthesis cache"""
+    monkeypatch.setenv("DIGSIM_CACHE_DIR", str(tmp_path / "cache"))
+    test_path = Path(__file__).resolve().relative_to(Path.cwd())
+    return Path(test_path).parent / "verilog"
+
+
+def _cell(cell_type, parameters, **ports):
+    """Create a yosys cell, the ports are given as port name => (direction, width)"""
+    connections = {}
+    port_directions = {}
+    net = 2
+    for port_name, (direction, width) in ports.items():
+        port_directions[port_name] = direction
+        connections[port_name] = list(range(net, net + width))
+        net += width
+    return YosysCell(
+        type=cell_type,
+        port_directions=port_directions,
+        connections=connections,
+        parameters=parameters,
+    )
+
+
+def test_word_atoms_implemented():
+    """Test that all word-level cells that are kept by the synthesis have an atom"""
+    for cell_type in WORD_LEVEL_CELLS:
+        cell = YosysCell(type=cell_type)
+        assert cell.is_word_level
+        assert hasattr(_yosys_word_atoms, cell.component_type()), cell_type
+    assert not YosysCell(type="$_AND_").is_word_level
+
+
+def test_word_level_synthesis(verilog_path):
+    """Test that the word-level profile keeps the coarse-grain cells"""
+    verilog_file = str(verilog_path / "word_cells.v")
+    synthesis = Synthesis(verilog_file, "word_cells", profile="word-level")
+    cells = synthesis.synth_to_dict(silent=True)["modules"]["word_cells"]["cells"]
+    cell_types = {cell["type"] for cell in cells.values()}
+    assert {"$add", "$sub", "$mul", "$pmux", "$sshr", "$shiftx", "$sdffe", "$adffe"} <= cell_types
+    assert cell_types <= set(WORD_LEVEL_CELLS)
+
+    faithful = Synthesis(verilog_file, "word_cells")
+    faithful.synth_to_dict(silent=True)
+    assert synthesis.cell_counts()[1] < faithful.cell_counts()[1] // 10
+
+
+@pytest.mark.parametrize("yosys_engine", ["event", "levelized"])
+def test_word_level_simulation(verilog_path, yosys_engine):
+    """Test that the word-level netlist simulates as the gate-level netlist"""
+    components = []
+    for profile in ["faithful", "word-level"]:
+        circuit = Circuit(yosys_engine=yosys_engine)
+        component = YosysComponent(
+            circuit, path=str(verilog_path / "word_cells.v"), profile=profile
+        )
+        circuit.init()
+        components.append((circuit, component))
+    # The levelized engine does not support the word-level cells
+    assert components[1][1].engine == "event"
+
+    rng = random.Random(1)
+    for _ in range(200):
+        input_values = {port.name(): rng.getrandbits(port.width) for port in component.inports()}
+        output_values = []
+        for circuit, component in components:
+            for portname, value in input_values.items():
+                component.port(portname).value = value
+            circuit.run(us=1)
+            output_values.append({port.name(): port.value for port in component.outports()})
+        assert output_values[0] == output_values[1]
+
+
+@pytest.mark.parametrize("cell_type, enable_first", [("$sdffe", False), ("$sdffce", True)])
+def test_word_sync_reset_enable(cell_type, enable_first):
+    """Test the priority of the synchronous reset and the clock enable"""
+    parameters = {"CLK_POLARITY": "1", "EN_POLARITY": "1", "SRST_POLARITY": "0"}
+    parameters["SRST_VALUE"] = "10100101"
+    cell = _cell(
+        cell_type,
+        parameters,
+        CLK=("input", 1),
+        SRST=("input", 1),
+        EN=("input", 1),
+        D=("input", 8),
+        Q=("output", 8),
+    )
+    circuit = Circuit()
+    dut = getattr(_yosys_word_atoms, cell.component_type())(circuit, cell, "DUT")
+    circuit.init()
+    dut.CLK.value = 0
+    dut.SRST.value = 1
+    dut.EN.value = 1
+    for bit_id in range(8):
+        dut.D.get_bit(bit_id).value = (0x3C >> bit_id) & 1
+    circuit.run(ms=1)
+    dut.CLK.value = 1
+    circuit.run(ms=1)
+    assert dut.Q.value == 0x3C
+
+    # Reset without enable
+    dut.CLK.value = 0
+    dut.SRST.value = 0
+    dut.EN.value = 0
+    circuit.run(ms=1)
+    dut.CLK.value = 1
+    circuit.run(ms=1)
+    assert dut.Q.value == (0x3C if enable_first else 0xA5)
+
+
+def test_word_dlatch():
+    """Test the word-level latch, the output bits are wired separately"""
+    cell = _cell("$dlatch", {"EN_POLARITY": "0"}, EN=("input", 1), D=("input", 4), Q=("output", 4))
+    circuit = Circuit()
+    dut = _yosys_word_atoms._dlatch(circuit, cell, "DUT")
+    circuit.init()
+    dut.EN.value = 0
+    for bit_id in range(4):
+        dut.D.get_bit(bit_id).value = bit_id % 2
+    circuit.run(ms=1)
+    assert dut.Q.value == 0b1010
+    assert [dut.Q.get_bit(bit_id).value for bit_id in range(4)] == [0, 1, 0, 1]
+
+    dut.EN.value = 1
+    dut.D.get_bit(0).value = 1
+    circuit.run(ms=1)
+    assert dut.Q.value == 0b1010
+
+
+@pytest.mark.parametrize(
+    "cell_type, a_signed, b_signed, b_width, b_value, y_value",
+    [
+        ("$shl", 0, 0, 32, 0xFFFFFFF0, 0),
+        ("$shl", 0, 0, 64, 0xFFFFFFFFFFFFFFF0, 0),
+        ("$shr", 0, 0, 64, 0xFFFFFFFFFFFFFFF0, 0),
+        ("$sshr", 1, 0, 64, 0xFFFFFFFFFFFFFFF0, 0xFF),
+        ("$shift", 0, 1, 64, 1 << 63, 0),
+        ("$shiftx", 0, 1, 64, 1 << 63, 0),
+        ("$shiftx", 0, 0, 64, 0xFFFFFFFFFFFFFFF0, 0),
+        ("$shl", 0, 0, 4, 7, 0x80),
+        ("$sshr", 1, 0, 4, 8, 0xFF),
+    ],
+)
+def test_word_wide_shift(cell_type, a_signed, b_signed, b_width, b_value, y_value):
+    """Test that a shift amount wider than the operand shifts out all bits"""
+    parameters = {"A_SIGNED": str(a_signed), "B_SIGNED": str(b_signed)}
+    cell = _cell(cell_type, parameters, A=("input", 8), B=("input", b_width), Y=("output", 8))
+    circuit = Circuit()
+    dut = getattr(_yosys_word_atoms, cell.component_type())(circuit, cell, "DUT")
+    circuit.init()
+    dut.A.value = 0x81
+    dut.B.value = b_value
+    circuit.run(ms=1)
+    assert dut.Y.value == y_value
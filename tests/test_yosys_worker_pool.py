@@ -0,0 +1,115 @@
+# Copyright (c) Fredrik Andersson, 2023-2025
+# All rights reserved
+
+"""Pystest module to test the yosys worker pool"""
+
+import os
+import signal
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from digsim.synth import Synthesis, SynthesisException, YosysWorkerException, YosysWorkerPool
+
+
+@pytest.fixture
+def verilog_path(monkeypatch):
+    """Fixture: get path to verilog modules, the synthesis cache is disabled"""
+    monkeypatch.setenv("DIGSIM_SYNTH_CACHE", "0")
+    test_path = Path(__file__).resolve().relative_to(Path.cwd())
+    return Path(test_path).parent / "verilog"
+
+
+@pytest.fixture
+def pool():
+    """Fixture: get a yosys worker pool with one worker"""
+    worker_pool = YosysWorkerPool(size=1)
+    yield worker_pool
+    worker_pool.close()
+
+
+def _worker_pid(pool):
+    with pool.worker() as worker:
+        return worker.pid
+
+
+def test_worker_pool_reuse(verilog_path, pool):
+    """Test that the yosys process is reused and that the design is reset between jobs"""
+    synthesis = Synthesis(str(verilog_path / "multiple_modules.v"), "multi_module_one", pool=pool)
+    netlist_dict = synthesis.synth_to_dict(silent=True)
+    assert "multi_module_one" in netlist_dict["modules"]
+    pid = _worker_pid(pool)
+
+    modules = Synthesis.list_modules(str(verilog_path / "one_module.v"), pool=pool)
+    assert modules == ["module_one"]
+    assert _worker_pid(pool) == pid
+    assert pool.workers == 1
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Uses SIGKILL")
+def test_worker_pool_restart(verilog_path, pool):
+    """Test that a crashed yosys process, or a failed job, is restarted"""
+    with pool.worker() as worker:
+        pid = worker.pid
+    os.kill(pid, signal.SIGKILL)
+    while worker.is_alive:
+        time.sleep(0.01)
+    modules = Synthesis.list_modules(str(verilog_path / "one_module.v"), pool=pool)
+    assert modules == ["module_one"]
+    assert _worker_pid(pool) != pid
+
+    pid = _worker_pid(pool)
+    with pytest.raises(SynthesisException):
+        Synthesis.list_modules(str(verilog_path / "module_with_error.v"), pool=pool)
+    assert Synthesis.list_modules(str(verilog_path / "one_module.v"), pool=pool) == ["module_one"]
+    assert _worker_pid(pool) != pid
+    assert pool.workers == 1
+
+
+def test_worker_pool_timeout(verilog_path):
+    """Test the job timeout"""
+    pool = YosysWorkerPool(size=1)
+    pool.start()
+    with pytest.raises(YosysWorkerException, match="timeout"):
+        with pool.worker(timeout=0.001) as worker:
+            worker.command("help")
+            worker.command("help")
+    assert pool.workers == 0
+    assert Synthesis.list_modules(str(verilog_path / "one_module.v"), pool=pool) == ["module_one"]
+    pool.close()
+
+
+def test_worker_pool_parallel(verilog_path):
+    """Test that the jobs are executed in parallel by the workers"""
+    pool = YosysWorkerPool(size=2)
+    pool.start()
+    assert pool.workers == 2
+    barrier = threading.Barrier(2, timeout=60)
+    results = {}
+
+    def _list_modules(verilog_file):
+        with pool.worker() as worker:
+            # Both workers are busy at the same time
+            barrier.wait()
+            worker.command(f"read -sv {verilog_path / verilog_file}")
+            results[verilog_file] = worker.command("ls", expect="\n")
+
+    threads = [
+        threading.Thread(target=_list_modules, args=(verilog_file,))
+        for verilog_file in ["one_module.v", "another_module.v"]
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert any("module_one" in line for line in results["one_module.v"])
+    assert not any("module_one" in line for line in results["another_module.v"])
+    assert pool.workers == 2
+
+    pool.close()
+    assert pool.workers == 0
+    with pytest.raises(SynthesisException):
+        Synthesis.list_modules(str(verilog_path / "one_module.v"), pool=pool)
@@ -0,0 +1,10 @@
+module redundant_module(a, b, c, y, z);
+
+   input a, b, c;
+
+   output y, z;
+
+   assign y = (a & b) | (a & c);
+   assign z = a & (b | c);
+
+endmodule
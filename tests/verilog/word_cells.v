@@ -0,0 +1,50 @@
+module word_cells(
+    input clk,
+    input rst,
+    input en,
+    input [7:0] a,
+    input [7:0] b,
+    input [2:0] sel,
+    output reg [7:0] acc,
+    output reg [7:0] cnt,
+    output reg [7:0] op,
+    output [15:0] prod,
+    output [7:0] sra,
+    output [3:0] flags,
+    output idx
+);
+    wire signed [7:0] sa = a;
+    wire signed [7:0] sb = b;
+
+    assign prod = sa * sb;
+    assign sra = sa >>> b[2:0];
+    assign flags = {sa < sb, a >= b, &a, ^b};
+    assign idx = a[b[2:0]];
+
+    always @(*) begin
+        case (sel)
+            3'd0: op = a + b;
+            3'd1: op = a - b;
+            3'd2: op = a << b[2:0];
+            3'd3: op = a >> b[2:0];
+            3'd4: op = a & ~b;
+            3'd5: op = a | b;
+            3'd6: op = -a;
+            default: op = {7'd0, (a != 0) && !(b == 0)};
+        endcase
+    end
+
+    always @(posedge clk) begin
+        if (rst)
+            acc <= 8'd0;
+        else if (en)
+            acc <= acc ^ op;
+    end
+
+    always @(posedge clk or posedge rst) begin
+        if (rst)
+            cnt <= 8'd1;
+        else if (en)
+            cnt <= cnt + 8'd1;
+    end
+endmodule